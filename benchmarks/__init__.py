@@ -0,0 +1 @@
+"""Benchmarks for the trade data processor."""
@@ -0,0 +1,183 @@
+"""Measure ingestion throughput and write comparable JSON results.
+
+Three phases each run in a fresh subprocess, so each reports its own peak
+RSS:
+
+- parse: stream the log through ``TradeParser`` (lines/sec)
+- insert: write already-parsed trades with ``TradeWriter`` into an empty
+  database (rows/sec)
+- end_to_end: ``process_file`` into an empty database (seconds, lines/sec)
+
+Without a log file, one is generated with ``benchmarks.loggen``.
+
+Usage:
+    python -m benchmarks.ingest_bench [log] [--lines 1000000] [--output results.json]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+PHASES = ("parse", "insert", "end_to_end")
+
+
+def peak_rss_bytes() -> int:
+    """Peak resident set size of this process."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def bench_parse(log_path: Path) -> Dict:
+    from src.parser.trade_parser import TradeParser
+
+    parser = TradeParser()
+    lines = trades = 0
+    start = time.perf_counter()
+    with open(log_path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            lines += 1
+            if parser.parse_line(line.rstrip("\n")) is not None:
+                trades += 1
+    seconds = time.perf_counter() - start
+    return {"seconds": seconds, "lines": lines, "trades": trades, "lines_per_sec": lines / seconds}
+
+
+def bench_insert(log_path: Path, workdir: Path, batch_size: int, max_rows: Optional[int]) -> Dict:
+    from src.database.database import Database
+    from src.parser.trade_parser import TradeParser
+
+    parser = TradeParser()
+    rows: List[Dict] = []
+    with open(log_path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            trade = parser.parse_line(line.rstrip("\n"))
+            if trade is not None:
+                rows.append(parser.to_dict(trade))
+                if max_rows is not None and len(rows) >= max_rows:
+                    break
+
+    db = Database(str(workdir / "insert.db"))
+    start = time.perf_counter()
+    with db.writer(batch_size=batch_size) as writer:
+        for row in rows:
+            writer.add(row)
+    seconds = time.perf_counter() - start
+    return {
+        "seconds": seconds,
+        "rows": len(rows),
+        "rows_written": writer.rows_written,
+        "rows_per_sec": len(rows) / seconds if seconds else 0.0,
+    }
+
+
+def bench_end_to_end(log_path: Path, workdir: Path, batch_size: int, workers: int) -> Dict:
+    from src.database.database import init_db
+    from src.main import process_file
+
+    init_db(str(workdir / "end_to_end.db"))
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        process_file(log_path, batch_size=batch_size, workers=workers)
+    seconds = time.perf_counter() - start
+    lines = sum(1 for _ in open(log_path, "rb"))
+    return {"seconds": seconds, "lines": lines, "lines_per_sec": lines / seconds}
+
+
+def run_phase(phase: str, args: argparse.Namespace, workdir: Path) -> Dict:
+    """Run one phase in a child interpreter and return its result."""
+    command = [
+        sys.executable, "-m", "benchmarks.ingest_bench", str(args.log),
+        "--phase", phase, "--workdir", str(workdir),
+        "--batch-size", str(args.batch_size), "--workers", str(args.workers),
+    ]
+    if args.insert_rows is not None:
+        command += ["--insert-rows", str(args.insert_rows)]
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], check=True, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark trade log ingestion")
+    parser.add_argument("log", type=Path, nargs="?", help="Trade log to ingest (generated if omitted)")
+    parser.add_argument("--lines", type=int, default=1_000_000, help="Lines to generate when no log is given")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the generated log")
+    parser.add_argument("--batch-size", type=int, default=500, help="TradeWriter batch size")
+    parser.add_argument("--workers", type=int, default=1, help="Parser processes for the end-to-end phase")
+    parser.add_argument("--insert-rows", type=int, help="Cap on trades written in the insert phase")
+    parser.add_argument("--phases", nargs="+", choices=PHASES, default=list(PHASES), help="Phases to run")
+    parser.add_argument("--output", type=Path, help="Write the JSON results to this file")
+    parser.add_argument("--phase", choices=PHASES, help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.phase:
+        # Child process: run one phase and print its result as JSON
+        if args.phase == "parse":
+            result = bench_parse(args.log)
+        elif args.phase == "insert":
+            result = bench_insert(args.log, args.workdir, args.batch_size, args.insert_rows)
+        else:
+            result = bench_end_to_end(args.log, args.workdir, args.batch_size, args.workers)
+        result["peak_rss_bytes"] = peak_rss_bytes()
+        print(json.dumps(result))
+        return
+
+    with tempfile.TemporaryDirectory(prefix="tradebot-bench-") as tmp:
+        workdir = Path(tmp)
+        generated = args.log is None
+        if generated:
+            from benchmarks.loggen import DEFAULT_SAMPLE, LogGenerator, LogModel
+
+            args.log = workdir / "generated.txt"
+            print(f"📝 Generating {args.lines:,} lines...", file=sys.stderr)
+            LogGenerator(LogModel.from_log(DEFAULT_SAMPLE), seed=args.seed).write(args.log, args.lines)
+
+        results = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "log": {
+                "path": None if generated else str(args.log),
+                "generated_lines": args.lines if generated else None,
+                "seed": args.seed if generated else None,
+                "bytes": args.log.stat().st_size,
+            },
+            "batch_size": args.batch_size,
+            "workers": args.workers,
+            "phases": {},
+        }
+        for phase in args.phases:
+            print(f"⏱️  {phase}...", file=sys.stderr)
+            results["phases"][phase] = run_phase(phase, args, workdir)
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n")
+        print(f"💾 Results written to {args.output}", file=sys.stderr)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
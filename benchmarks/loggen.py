@@ -0,0 +1,172 @@
+"""Generate synthetic Wurm trade logs of any size for benchmarking.
+
+The generator learns from a real log (``data/Trade.2025-05.txt`` by
+default): every chat line becomes a message template with its item links
+and prices cut out, and the observed players, server tags, item links and
+prices become weighted pools. Output lines are drawn from those pools, so
+servers, trade types, item and price density, enchant tails and message
+lengths follow the sample while the file grows to any size.
+
+Usage:
+    python -m benchmarks.loggen out.txt --lines 1000000 [--days 31] [--seed 1]
+"""
+
+import argparse
+import random
+import re
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+DEFAULT_SAMPLE = Path("data/Trade.2025-05.txt")
+
+_CHAT_LINE = re.compile(r'\[\d{2}:\d{2}:\d{2}\] <([^>]+)> \(([^)]+)\) (.*)')
+# An item link, optionally with a [n/m] fragment marker inside it
+_ITEM_LINK = re.compile(r'\[[^\[\]]*(?:\[\d+/\d+\][^\[\]]*)?\]')
+_PRICE = re.compile(r'\b\d+(?:\.\d+)?\s?[gsci]\b')
+_QL = re.compile(r'QL:(\d+\.?\d*)')
+
+# Template slots
+ITEM = 0
+PRICE = 1
+
+Segment = Union[str, int]
+
+
+@dataclass
+class LogModel:
+    """Weighted pools sampled from a real log."""
+
+    templates: List[List[Segment]] = field(default_factory=list)
+    players: List[str] = field(default_factory=list)
+    servers: List[str] = field(default_factory=list)
+    # (text before the QL value, QL, text after it); QL is None if absent
+    items: List[Tuple[str, Optional[float], str]] = field(default_factory=list)
+    prices: List[str] = field(default_factory=list)
+
+    @classmethod
+    def from_log(cls, path: Path) -> "LogModel":
+        model = cls()
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                match = _CHAT_LINE.match(line.rstrip("\n"))
+                if not match:
+                    continue
+                player, server, body = match.groups()
+                model.players.append(player)
+                model.servers.append(server)
+                model.templates.append(model._template(body))
+        if not model.templates:
+            raise ValueError(f"No chat lines found in {path}")
+        return model
+
+    def _template(self, body: str) -> List[Segment]:
+        """Split a message into literal text and item/price slots."""
+        segments: List[Segment] = []
+        position = 0
+        for link in _ITEM_LINK.finditer(body):
+            self._add_text(segments, body[position:link.start()])
+            segments.append(ITEM)
+            ql = _QL.search(link.group())
+            if ql:
+                self.items.append((
+                    link.group()[:ql.start(1)], float(ql.group(1)), link.group()[ql.end(1):]
+                ))
+            else:
+                self.items.append((link.group(), None, ""))
+            position = link.end()
+        self._add_text(segments, body[position:])
+        return segments
+
+    def _add_text(self, segments: List[Segment], text: str):
+        position = 0
+        for price in _PRICE.finditer(text):
+            if price.start() > position:
+                segments.append(text[position:price.start()])
+            segments.append(PRICE)
+            self.prices.append(price.group())
+            position = price.end()
+        if position < len(text):
+            segments.append(text[position:])
+
+
+class LogGenerator:
+    """Draws synthetic log lines from a ``LogModel``."""
+
+    def __init__(self, model: LogModel, seed: int = 1, new_player_rate: float = 0.1):
+        self.model = model
+        self.random = random.Random(seed)
+        self.new_player_rate = new_player_rate
+
+    def player(self) -> str:
+        """An observed player, or now and then a new name spliced from two."""
+        rnd = self.random
+        name = rnd.choice(self.model.players)
+        if rnd.random() < self.new_player_rate:
+            other = rnd.choice(self.model.players)
+            name = (name[:max(2, len(name) // 2)] + other[len(other) // 2:]).capitalize()
+        return name
+
+    def item(self) -> str:
+        head, ql, tail = self.random.choice(self.model.items)
+        if ql is None:
+            return head
+        ql = min(100.0, max(1.0, ql + self.random.gauss(0, 3)))
+        return f"{head}{ql:.4f}{tail}"
+
+    def message(self) -> str:
+        parts = []
+        for segment in self.random.choice(self.model.templates):
+            if segment is ITEM:
+                parts.append(self.item())
+            elif segment is PRICE:
+                parts.append(self.random.choice(self.model.prices))
+            else:
+                parts.append(segment)
+        return "".join(parts)
+
+    def day(self, count: int) -> List[str]:
+        """``count`` chat lines for one day, in timestamp order."""
+        rnd = self.random
+        seconds = sorted(rnd.randrange(86400) for _ in range(count))
+        servers = self.model.servers
+        return [
+            f"[{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}] "
+            f"<{self.player()}> ({rnd.choice(servers)}) {self.message()}\n"
+            for s in seconds
+        ]
+
+    def write(self, path: Path, lines: int, days: int = 31, start: date = date(2025, 5, 1)) -> int:
+        """Write ``lines`` chat lines spread evenly over ``days`` day sections.
+
+        Each day starts with a ``Logging started`` header. Returns the
+        number of lines written, headers included.
+        """
+        days = max(1, min(days, lines))
+        written = 0
+        with open(path, "w", encoding="utf-8") as f:
+            for day in range(days):
+                count = lines * (day + 1) // days - lines * day // days
+                f.write(f"Logging started {start + timedelta(days=day)}\n")
+                f.writelines(self.day(count))
+                written += count + 1
+        return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic trade log")
+    parser.add_argument("output", type=Path, help="Path of the log file to write")
+    parser.add_argument("--lines", type=int, default=1_000_000, help="Number of chat lines")
+    parser.add_argument("--days", type=int, default=31, help="Number of day sections")
+    parser.add_argument("--sample", type=Path, default=DEFAULT_SAMPLE, help="Real log to sample from")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed (same seed, same file)")
+    args = parser.parse_args()
+
+    generator = LogGenerator(LogModel.from_log(args.sample), seed=args.seed)
+    written = generator.write(args.output, args.lines, days=args.days)
+    print(f"📝 Wrote {written:,} lines to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
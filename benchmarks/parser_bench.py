@@ -0,0 +1,124 @@
+"""Compare TradeParser throughput against the previous multi-scan parser.
+
+Usage:
+    python -m benchmarks.parser_bench [files...]
+"""
+
+import argparse
+import re
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from src.parser.trade_parser import (
+    Currency, FilterMode, Item, ItemAttribute, Rarity, Trade, TradeParser, TradeType
+)
+
+DEFAULT_FILES = [
+    Path("data/trade-2025-05--small.txt"),
+    Path("data/Trade.2025-05.txt"),
+]
+
+
+class LegacyTradeParser(TradeParser):
+    """The parser before the single-pass scanner, kept as a baseline.
+
+    It matches the line pattern, then scans the message separately for
+    items, fragments, attributes and the price.
+    """
+
+    def __init__(self, filter_mode: FilterMode = FilterMode.ALL):
+        super().__init__(filter_mode)
+        self.item_pattern = re.compile(r'\[(common|rare|supreme|fantastic)?\s*([^\]]+?)(?:\s+QL:(\d+\.?\d*))?(?:\s+DMG:(\d+\.?\d*))?(?:\s+WT:(\d+\.?\d*))?(?:\s+([^\]]+))?\]')
+        self.price_pattern = re.compile(r'(\d+(?:\.\d+)?)\s*(g|s|c|i)')
+        self.fragment_pattern = re.compile(r'\[(\d+)/(\d+)\]')
+
+    def parse_line(self, line: str) -> Optional[Trade]:
+        match = self.trade_line_pattern.match(line)
+        if not match:
+            return None
+
+        timestamp, player_name, server, trade_type, message = match.groups()
+        items = self._parse_items(message)
+        price_amount, price_currency = self._parse_price(message)
+
+        if self.filter_mode == FilterMode.ITEMS_ONLY and not items:
+            return None
+        if self.filter_mode == FilterMode.NO_ITEMS and items:
+            return None
+
+        return Trade(
+            timestamp=timestamp,
+            player_name=player_name,
+            server=self.server_map.get(server, server),
+            trade_type=TradeType(trade_type),
+            message=message,
+            items=items,
+            price_amount=price_amount,
+            price_currency=Currency(price_currency) if price_currency else None
+        )
+
+    def _parse_items(self, message: str) -> List[Item]:
+        items = []
+        for match in self.item_pattern.finditer(message):
+            rarity, name, ql, dmg, wt, attributes = match.groups()
+
+            fragment = None
+            fragment_match = self.fragment_pattern.search(name)
+            if fragment_match:
+                fragment = f"{fragment_match.group(1)}/{fragment_match.group(2)}"
+                name = name[:fragment_match.start()].strip()
+
+            item_attributes = []
+            if attributes:
+                for attr_match in self.attribute_pattern.finditer(attributes):
+                    attr_name, attr_value = attr_match.groups()
+                    item_attributes.append(ItemAttribute(name=attr_name, value=attr_value))
+
+            items.append(Item(
+                name=name.strip(),
+                rarity=Rarity(rarity or "common"),
+                quality_level=float(ql) if ql else None,
+                weight=float(wt) if wt else None,
+                damage=float(dmg) if dmg else None,
+                attributes=item_attributes,
+                fragment=fragment
+            ))
+        return items
+
+    def _parse_price(self, message: str) -> Tuple[Optional[float], Optional[str]]:
+        match = self.price_pattern.search(message)
+        if not match:
+            return None, None
+        amount, currency = match.groups()
+        return float(amount), {'g': 'gold', 's': 'silver', 'c': 'copper', 'i': 'iron'}.get(currency)
+
+
+def lines_per_second(parser: TradeParser, lines: List[str], repeat: int) -> float:
+    """Best-of-``repeat`` parse throughput over ``lines``."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for line in lines:
+            parser.parse_line(line)
+        best = min(best, time.perf_counter() - start)
+    return len(lines) / best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark TradeParser throughput")
+    parser.add_argument("files", nargs="*", type=Path, default=DEFAULT_FILES)
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per file; the best is reported")
+    args = parser.parse_args()
+
+    print(f"{'file':<36} {'lines':>7} {'legacy l/s':>12} {'current l/s':>12} {'speedup':>8}")
+    for path in args.files:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = [line.strip() for line in f if line.strip()]
+        legacy = lines_per_second(LegacyTradeParser(), lines, args.repeat)
+        current = lines_per_second(TradeParser(), lines, args.repeat)
+        print(f"{str(path):<36} {len(lines):>7} {legacy:>12,.0f} {current:>12,.0f} {current / legacy:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
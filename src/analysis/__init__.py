@@ -0,0 +1 @@
+"""Columnar analysis of parsed trade data."""
@@ -0,0 +1,281 @@
+"""Columnar, NumPy-backed view of parsed trades for price analysis.
+
+``TradeFrame.from_trades`` consumes a stream of ``Trade`` objects once and
+stores them as typed arrays: one row per trade and one row per item, linked
+by an offsets array. Filters and group-bys then run as NumPy operations with
+no per-row Python work.
+"""
+
+from array import array
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from src.config import CURRENCY_RATES
+from src.parser.trade_parser import Currency, Rarity, Trade, TradeType
+
+_EPOCH = date(1970, 1, 1)
+
+_ITEM_COLUMNS = {"item_name", "rarity", "quality_level", "damage", "weight"}
+
+
+class Categorical:
+    """Integer codes into a list of category values (missing = -1)."""
+
+    def __init__(self, codes: np.ndarray, categories: Sequence):
+        self.codes = codes
+        self.categories = list(categories)
+        self._lookup = {value: code for code, value in enumerate(self.categories)}
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def code(self, value) -> int:
+        """Return the code of ``value``, or -1 if it never occurs."""
+        return self._lookup.get(value, -1)
+
+    def isin(self, values: Iterable) -> np.ndarray:
+        """Boolean mask of rows whose value is one of ``values``."""
+        return np.isin(self.codes, [self.code(v) for v in values])
+
+    def __eq__(self, value) -> np.ndarray:  # type: ignore[override]
+        return self.codes == self.code(value)
+
+    def decode(self, codes: Optional[np.ndarray] = None) -> np.ndarray:
+        """Map codes back to their values as an object array."""
+        values = np.array(self.categories + [None], dtype=object)
+        return values[self.codes if codes is None else codes]
+
+    def take(self, index: np.ndarray) -> "Categorical":
+        return Categorical(self.codes[index], self.categories)
+
+
+class _Encoder:
+    """Assigns dense integer codes to values as they are first seen."""
+
+    def __init__(self, categories: Sequence = ()):
+        self.codes: Dict = {value: i for i, value in enumerate(categories)}
+        self.values = array("i")
+
+    def add(self, value) -> None:
+        if value is None:
+            self.values.append(-1)
+            return
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.codes)
+        self.values.append(code)
+
+    def build(self) -> Categorical:
+        return Categorical(np.frombuffer(self.values, dtype=np.int32).copy(), list(self.codes))
+
+
+def _seconds(log_date: Optional[str], timestamp: str) -> int:
+    """Seconds since the epoch for a log date and HH:MM:SS timestamp.
+
+    Without a log date only the time of day is counted.
+    """
+    h, m, s = timestamp.split(":")
+    seconds = int(h) * 3600 + int(m) * 60 + int(s)
+    if log_date:
+        seconds += (date.fromisoformat(log_date) - _EPOCH).days * 86400
+    return seconds
+
+
+class TradeFrame:
+    """Parsed trades as columns.
+
+    Trade columns have one row per trade; item columns have one row per
+    item. The items of trade ``i`` are rows ``item_offsets[i]`` up to
+    ``item_offsets[i + 1]``, and ``item_trade`` maps each item row back to
+    its trade row.
+    """
+
+    def __init__(
+        self,
+        timestamp: np.ndarray,
+        player: Categorical,
+        server: Categorical,
+        trade_type: Categorical,
+        price_amount: np.ndarray,
+        price_currency: Categorical,
+        item_offsets: np.ndarray,
+        item_name: Categorical,
+        rarity: Categorical,
+        quality_level: np.ndarray,
+        damage: np.ndarray,
+        weight: np.ndarray,
+    ):
+        self.timestamp = timestamp
+        self.player = player
+        self.server = server
+        self.trade_type = trade_type
+        self.price_amount = price_amount
+        self.price_currency = price_currency
+        self.item_offsets = item_offsets
+        self.item_name = item_name
+        self.rarity = rarity
+        self.quality_level = quality_level
+        self.damage = damage
+        self.weight = weight
+
+        counts = np.diff(item_offsets)
+        self.item_trade = np.repeat(np.arange(len(counts), dtype=np.int64), counts)
+        rates = np.array(
+            [CURRENCY_RATES[c] for c in price_currency.categories] + [np.nan], dtype=np.float64
+        )
+        self.price_silver = price_amount * rates[price_currency.codes]
+
+    @classmethod
+    def from_trades(cls, trades: Iterable[Trade]) -> "TradeFrame":
+        """Build a frame from a stream of trades in one pass."""
+        timestamp = array("q")
+        price_amount = array("d")
+        player = _Encoder()
+        server = _Encoder()
+        trade_type = _Encoder([t.value for t in TradeType])
+        price_currency = _Encoder([c.value for c in Currency])
+        item_offsets = array("q", [0])
+        item_name = _Encoder()
+        rarity = _Encoder([r.value for r in Rarity])
+        quality_level = array("d")
+        damage = array("d")
+        weight = array("d")
+        nan = float("nan")
+
+        for trade in trades:
+            timestamp.append(_seconds(trade.log_date, trade.timestamp))
+            player.add(trade.player_name)
+            server.add(trade.server)
+            trade_type.add(trade.trade_type.value)
+            price_amount.append(nan if trade.price_amount is None else trade.price_amount)
+            price_currency.add(trade.price_currency.value if trade.price_currency else None)
+            for item in trade.items:
+                item_name.add(item.name)
+                rarity.add(item.rarity.value)
+                quality_level.append(nan if item.quality_level is None else item.quality_level)
+                damage.append(nan if item.damage is None else item.damage)
+                weight.append(nan if item.weight is None else item.weight)
+            item_offsets.append(item_offsets[-1] + len(trade.items))
+
+        def floats(values: array) -> np.ndarray:
+            return np.frombuffer(values, dtype=np.float64).copy()
+
+        return cls(
+            timestamp=np.frombuffer(timestamp, dtype=np.int64).copy(),
+            player=player.build(),
+            server=server.build(),
+            trade_type=trade_type.build(),
+            price_amount=floats(price_amount),
+            price_currency=price_currency.build(),
+            item_offsets=np.frombuffer(item_offsets, dtype=np.int64).copy(),
+            item_name=item_name.build(),
+            rarity=rarity.build(),
+            quality_level=floats(quality_level),
+            damage=floats(damage),
+            weight=floats(weight),
+        )
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    @property
+    def item_count(self) -> int:
+        return len(self.item_trade)
+
+    def item_price_silver(self) -> np.ndarray:
+        """Price of each item in silver.
+
+        A trade has one price for its whole message, so it is only assigned
+        to the item when the trade lists exactly one item; otherwise NaN.
+        """
+        single = np.diff(self.item_offsets) == 1
+        prices = np.where(single, self.price_silver, np.nan)
+        return prices[self.item_trade]
+
+    def item_column(self, name: str):
+        """Return an item-level column, broadcasting trade columns to items."""
+        if name == "price_silver":
+            return self.item_price_silver()
+        value = getattr(self, name)
+        if name in _ITEM_COLUMNS:
+            return value
+        if isinstance(value, Categorical):
+            return value.take(self.item_trade)
+        return value[self.item_trade]
+
+    def items_where(self, **conditions) -> np.ndarray:
+        """Boolean item mask where every column equals the given value.
+
+        A list or tuple value matches any of its elements. Trade columns such
+        as ``server`` or ``trade_type`` apply to each of the trade's items.
+        """
+        mask = np.ones(self.item_count, dtype=bool)
+        for name, value in conditions.items():
+            column = self.item_column(name)
+            if isinstance(value, (list, tuple, set)):
+                mask &= column.isin(value) if isinstance(column, Categorical) else np.isin(column, list(value))
+            else:
+                mask &= column == value
+        return mask
+
+    def group_items(
+        self,
+        by: Sequence[str],
+        value: str = "price_silver",
+        agg: str = "median",
+        mask: Optional[np.ndarray] = None,
+    ) -> Dict[str, np.ndarray]:
+        """Aggregate an item-level value per group of categorical columns.
+
+        ``agg`` is one of count, sum, mean, min, max or median. Rows where the
+        value is NaN are ignored. Returns one array per key column plus one
+        named after ``agg``, with a row per non-empty group.
+        """
+        keys = [self.item_column(name) for name in by]
+        values = np.asarray(self.item_column(value), dtype=np.float64)
+        valid = ~np.isnan(values)
+        for key in keys:
+            valid &= key.codes >= 0
+        if mask is not None:
+            valid &= mask
+
+        codes = [key.codes[valid].astype(np.int64) for key in keys]
+        sizes = [len(key.categories) for key in keys]
+        values = values[valid]
+        group = np.ravel_multi_index(codes, sizes) if codes else np.zeros(len(values), dtype=np.int64)
+
+        order = np.lexsort((values, group))
+        group = group[order]
+        values = values[order]
+        starts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]]) if len(group) else np.array([], dtype=np.int64)
+        counts = np.diff(np.r_[starts, len(group)])
+
+        if agg == "count":
+            result = counts.astype(np.float64)
+        elif agg == "sum":
+            result = np.add.reduceat(values, starts) if len(starts) else np.array([])
+        elif agg == "mean":
+            result = (np.add.reduceat(values, starts) if len(starts) else np.array([])) / counts
+        elif agg == "min":
+            result = values[starts]
+        elif agg == "max":
+            result = values[starts + counts - 1]
+        elif agg == "median":
+            result = (values[starts + (counts - 1) // 2] + values[starts + counts // 2]) / 2
+        else:
+            raise ValueError(f"Unknown aggregation: {agg}")
+
+        out: Dict[str, np.ndarray] = {}
+        group_codes = np.unravel_index(group[starts], sizes) if codes else ()
+        for name, key, key_codes in zip(by, keys, group_codes):
+            out[name] = key.decode(key_codes)
+        out[agg] = result
+        return out
+
+
+def to_records(columns: Dict[str, np.ndarray]) -> List[Dict]:
+    """Turn a ``group_items`` result into a list of row dicts."""
+    names = list(columns)
+    return [dict(zip(names, row)) for row in zip(*(columns[n] for n in names))]
@@ -0,0 +1,49 @@
+"""Transparent reading of compressed trade logs.
+
+Archived logs are recognised by their magic bytes, not their file name,
+and are decompressed as they are read, so an archive is never written out
+to disk. The decompressors (zlib, liblzma, bzip2, zstd) release the GIL,
+so decompression in the pipeline's reader thread runs alongside parsing.
+"""
+
+import bz2
+import gzip
+import io
+import lzma
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+import zstandard
+
+# Format name -> leading bytes of the file
+MAGIC = {
+    "gzip": b"\x1f\x8b",
+    "xz": b"\xfd7zXZ\x00",
+    "zstd": b"\x28\xb5\x2f\xfd",
+    "bzip2": b"BZh",
+}
+
+
+def detect_compression(file_path: Path) -> Optional[str]:
+    """Name of the compression format of ``file_path``, or None if plain."""
+    with open(file_path, "rb") as f:
+        head = f.read(max(len(magic) for magic in MAGIC.values()))
+    for name, magic in MAGIC.items():
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def open_compressed(file_path: Path, compression: str) -> BinaryIO:
+    """Open a compressed log for streaming, line-iterable reads."""
+    if compression == "gzip":
+        return gzip.open(file_path, "rb")
+    if compression == "xz":
+        return lzma.open(file_path, "rb")
+    if compression == "bzip2":
+        return bz2.open(file_path, "rb")
+    if compression == "zstd":
+        raw = open(file_path, "rb")
+        reader = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True)
+        return io.BufferedReader(reader, buffer_size=1 << 20)
+    raise ValueError(f"Unknown compression format: {compression}")
@@ -6,10 +6,8 @@ from dotenv import load_dotenv
 env_path = Path(__file__).parent.parent / '.env'
 load_dotenv(env_path)
 
-# API Keys
+# API Keys (checked by the LLM clients, so non-LLM code can import config)
 ANTHROPIC_API_KEY = os.getenv('ANTHROPIC_API_KEY')
-if not ANTHROPIC_API_KEY:
-    raise ValueError("ANTHROPIC_API_KEY environment variable is not set")
 
 # Database Configuration
 DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///trades.db')
@@ -21,7 +19,14 @@ LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
 SERVER_MAPPINGS = {
     'Har': 'Harmony',
     'Mel': 'Melody',
-    'Cad': 'Cadence'
+    'Cad': 'Cadence',
+    'Cel': 'Celebration',
+    'Del': 'Deliverance',
+    'Exo': 'Exodus',
+    'Ind': 'Independence',
+    'Pri': 'Pristine',
+    'Rel': 'Release',
+    'Xan': 'Xanadu'
 }
 
 # Currency Conversion Rates
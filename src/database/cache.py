@@ -0,0 +1,150 @@
+"""Bounded LRU/TTL cache for Database read queries.
+
+Entries are keyed by (method, arguments) and tagged with the tables they
+read. Writes invalidate every entry carrying one of their tags, so a cached
+result is never older than the last write through the Database, and never
+older than the TTL for changes made behind its back. Each invalidation also
+bumps its tags' generation; a query loaded across a bump is returned but not
+stored, since it may have read the table before the write.
+"""
+
+import functools
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterable, Tuple
+
+# Tags for the tables a cached query depends on
+ANALYSES = 'analyses'
+TRADES = 'trades'
+
+
+class QueryCache:
+    """Least-recently-used cache whose entries also expire after ``ttl`` seconds."""
+
+    def __init__(self, max_entries: int = 256, ttl: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        # key -> (expires_at, tags, value), least recently used first
+        self._entries: 'OrderedDict[Hashable, Tuple[float, frozenset, object]]' = OrderedDict()
+        # tag -> number of invalidations, and the number of clear() calls
+        self._generations: Dict[str, int] = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_load(self, key: Hashable, tags: Iterable[str], load: Callable[[], object]):
+        """Return the cached value for ``key``, calling ``load`` on a miss.
+
+        ``load`` runs outside the lock; its result is only cached if no
+        invalidation of ``tags`` (or clear) happened meanwhile.
+        """
+        tags = frozenset(tags)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > self.clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[2]
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+            generation = self._generation(tags)
+
+        value = load()
+
+        with self._lock:
+            if self._generation(tags) != generation:
+                return value
+            self._entries[key] = (self.clock() + self.ttl, tags, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def invalidate(self, *tags: str):
+        """Drop every entry tagged with one of ``tags``."""
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+            stale = [key for key, (_, entry_tags, _) in self._entries.items() if not entry_tags.isdisjoint(tags)]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        """Drop all entries, keeping the counters."""
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+
+    def _generation(self, tags: frozenset) -> Tuple[int, ...]:
+        return (self._epoch,) + tuple(self._generations.get(tag, 0) for tag in sorted(tags))
+
+    def stats(self) -> Dict[str, int]:
+        """Counters for sizing the cache."""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations,
+        }
+
+
+def cached(*tags: str):
+    """Cache a Database read method in ``self.cache`` when one is configured.
+
+    Arguments are bound to the method's signature with defaults applied,
+    so ``f("x", 7)``, ``f("x", days=7)`` and, where 7 is the default,
+    ``f("x")`` share one entry. Calls with unhashable arguments bypass the
+    cache. Lists and dict rows
+    are copied one level deep, so callers can sort, extend or update what
+    they get back; ORM objects and values nested inside the rows are still
+    shared between callers and must be treated as read-only.
+    """
+    def decorator(method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            cache = self.cache
+            if cache is None:
+                return method(self, *args, **kwargs)
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            key = (method.__name__, tuple(bound.arguments.items())[1:])
+            try:
+                hash(key)
+            except TypeError:
+                return method(self, *args, **kwargs)
+            value = cache.get_or_load(key, tags, lambda: method(self, *args, **kwargs))
+            return _copy(value)
+        return wrapper
+    return decorator
+
+
+def _copy(value):
+    """Copy a cached result's list and dict rows, sharing everything below."""
+    if isinstance(value, list):
+        return [dict(row) if isinstance(row, dict) else row for row in value]
+    if isinstance(value, dict):
+        return dict(value)
+    return value
@@ -1,20 +1,31 @@
+import hashlib
+import heapq
 import os
 from contextlib import contextmanager
-from typing import Dict, List, Optional
-from sqlalchemy import create_engine
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from sqlalchemy import create_engine, func, inspect, select, text
+from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.exc import SQLAlchemyError
 
-from .models import Base, TextAnalysis
+from src.metrics import METRICS
+
+from .. import models as schema
+from .cache import ANALYSES, TRADES, QueryCache, cached
+from .models import Base, IngestCheckpoint, IngestedFile, TextAnalysis
+from .partitions import archives_for, attach_archives, detach_month, detached_months, list_partitions
+from .prices import price_observations, rebuild_price_index, to_silver, update_price_index
+from .search import create_search_indexes, fts_query
 
 # Global database instance
 _db = None
 
-def init_db(db_path: str = "trades.db"):
+def init_db(db_path: str = "trades.db", cache_size: int = 0, cache_ttl: float = 30.0):
     """Initialize the database connection."""
     global _db
     if _db is None:
-        _db = Database(db_path)
+        _db = Database(db_path, cache_size=cache_size, cache_ttl=cache_ttl)
     return _db
 
 def get_db() -> 'Database':
@@ -23,38 +34,356 @@ def get_db() -> 'Database':
         raise RuntimeError("Database not initialized. Call init_db() first.")
     return _db
 
-def add_trade(trade_data: Dict):
-    """Add a new trade to the database."""
+# Stay well below SQLite's limit on bound parameters per statement
+_LOOKUP_CHUNK = 500
+
+_HASH_FIELDS = ('log_date', 'timestamp', 'player_name', 'server', 'message')
+
+def trade_hash(trade_data: Dict) -> str:
+    """Return a stable key for a trade line.
+
+    The key covers the log date, timestamp, player, server and message, so
+    the same line read again from an overlapping log maps to the same key.
+    """
+    key = "\x1f".join(str(trade_data.get(field) or '') for field in _HASH_FIELDS)
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+
+def _trade_row(trade_data: Dict, content_hash: Optional[str] = None) -> Dict:
+    """Map a parsed trade dict onto trades column values.
+
+    Pass the ``trade_hash`` of the trade as ``content_hash`` if it is known
+    already, so it is not computed again.
+    """
+    return {
+        'content_hash': content_hash or trade_hash(trade_data),
+        'log_date': trade_data.get('log_date'),
+        'timestamp': trade_data.get('timestamp'),
+        'server': trade_data.get('server'),
+        'player_name': trade_data.get('player_name'),
+        'trade_type': trade_data.get('trade_type'),
+        'message': trade_data.get('message', ''),
+        'price_amount': trade_data.get('price_amount'),
+        'price_currency': trade_data.get('price_currency'),
+        'price_silver': to_silver(trade_data.get('price_amount'), trade_data.get('price_currency')),
+        'parsed_by': trade_data.get('parsed_by') or 'regex',
+    }
+
+def _item_rows(trade_data: Dict) -> List[Tuple[Dict, List[Dict]]]:
+    """Map a parsed trade's items onto items and item_attributes rows.
+
+    A message has a single price, so it is only stored on the item when the
+    trade lists exactly one item.
+    """
+    items = trade_data.get('items') or []
+    single = len(items) == 1
+    price_silver = to_silver(trade_data.get('price_amount'), trade_data.get('price_currency'))
+    rows = []
+    for item in items:
+        item_row = {
+            'name': item['name'],
+            'rarity': item['rarity'],
+            'quality_level': item.get('quality_level'),
+            'weight': item.get('weight'),
+            'damage': item.get('damage'),
+            'fragment': item.get('fragment'),
+            'price_amount': trade_data.get('price_amount') if single else None,
+            'price_currency': trade_data.get('price_currency') if single else None,
+            'price_silver': price_silver if single else None,
+        }
+        attribute_rows = [
+            {'attribute_name': attr['name'], 'attribute_value': attr['value']}
+            for attr in item.get('attributes', [])
+        ]
+        rows.append((item_row, attribute_rows))
+    return rows
+
+def add_trade(trade_data: Dict) -> Optional[schema.Trade]:
+    """Add a new trade with its items to the database.
+
+    If the same trade line was stored before, the existing row is returned;
+    a trade of a detached month is not stored and None is returned.
+    """
     db = get_db()
-    with db.get_session() as session:
-        # Create a new TextAnalysis instance for the trade
-        analysis = TextAnalysis.create_from_analysis(
-            text=trade_data.get('message', ''),
-            categories={
-                'player_name': trade_data.get('player_name'),
-                'server': trade_data.get('server'),
-                'trade_type': trade_data.get('trade_type')
-            },
-            metadata={
-                'price_amount': trade_data.get('price_amount'),
-                'price_currency': trade_data.get('price_currency'),
-                'items': trade_data.get('items', [])
-            }
-        )
-        session.add(analysis)
+    row = _trade_row(trade_data)
+    with METRICS.timer("db.add_trade"), db.get_session() as session:
+        existing = session.query(schema.Trade).filter(
+            schema.Trade.content_hash == row['content_hash']
+        ).first()
+        if existing is not None:
+            METRICS.incr("db.rows_skipped")
+            return existing
+        if (row['log_date'] or '')[:7] in detached_months(session.connection()):
+            METRICS.incr("db.rows_detached")
+            return None
+        trade = schema.Trade(**row)
+        for item_row, attribute_rows in _item_rows(trade_data):
+            item = schema.Item(**item_row)
+            item.attributes = [schema.ItemAttribute(**attr) for attr in attribute_rows]
+            trade.items.append(item)
+        session.add(trade)
+        session.flush()
+        update_price_index(session.connection(), price_observations(trade_data))
         session.commit()
-        return analysis
+    METRICS.incr("db.rows_written")
+    db.invalidate(TRADES)
+    return trade
+
+def add_trades(trades: Iterable[Dict], batch_size: int = 500) -> int:
+    """Add many trades to the database, one transaction per batch.
+
+    Returns the number of rows written.
+    """
+    with TradeWriter(get_db(), batch_size=batch_size) as writer:
+        for trade_data in trades:
+            writer.add(trade_data)
+    return writer.rows_written
+
+def _filter_trades(query, server=None, since=None, until=None):
+    """Apply server and log date filters on the trades table."""
+    if server is not None:
+        query = query.where(schema.Trade.server == server)
+    if since is not None:
+        query = query.where(schema.Trade.log_date >= since)
+    if until is not None:
+        query = query.where(schema.Trade.log_date <= until)
+    return query
+
+def _enum_value(value):
+    return value.value if value is not None else None
+
+def _number(value):
+    return float(value) if value is not None else None
+
+def _trade_dict(trade: schema.Trade) -> Dict:
+    return {
+        'id': trade.id,
+        'log_date': trade.log_date,
+        'timestamp': trade.timestamp,
+        'server': _enum_value(trade.server),
+        'player_name': trade.player_name,
+        'trade_type': _enum_value(trade.trade_type),
+        'message': trade.message,
+        'price_amount': _number(trade.price_amount),
+        'price_currency': _enum_value(trade.price_currency),
+        'price_silver': trade.price_silver,
+        'parsed_by': trade.parsed_by,
+    }
+
+def _item_dict(item: schema.Item) -> Dict:
+    return {
+        'id': item.id,
+        'trade_id': item.trade_id,
+        'name': item.name,
+        'rarity': _enum_value(item.rarity),
+        'quality_level': _number(item.quality_level),
+        'weight': _number(item.weight),
+        'damage': _number(item.damage),
+        'fragment': item.fragment,
+        'price_amount': _number(item.price_amount),
+        'price_currency': _enum_value(item.price_currency),
+        'price_silver': item.price_silver,
+    }
+
+def _summary_dict(summary: schema.PriceSummary) -> Dict:
+    return {
+        'item_name': summary.item_name,
+        'rarity': _enum_value(summary.rarity),
+        'server': _enum_value(summary.server),
+        'day': summary.day,
+        'count': summary.count,
+        'min': summary.min_silver,
+        'max': summary.max_silver,
+        'mean': summary.mean_silver,
+        'p25': summary.p25_silver,
+        'median': summary.median_silver,
+        'p75': summary.p75_silver,
+    }
+
+def _merge_partitions(partitions: List[List[Dict]], key: Callable, limit: Optional[int]) -> List[Dict]:
+    """Merge results sorted by ``key`` from the live tables and archives."""
+    if len(partitions) == 1:
+        return partitions[0]
+    return list(islice(heapq.merge(*partitions, key=key), limit))
+
+def _in_schema(name: str) -> Dict:
+    """Execution options running a statement on the tables of one attached schema."""
+    return {'schema_translate_map': {None: name}}
+
+def _log_order(trade: Dict):
+    # SQLite sorts NULL log dates first
+    return (trade['log_date'] is not None, trade['log_date'] or '', trade['timestamp'])
+
+def _add_missing_columns(conn, table):
+    """Add columns of ``table`` missing from an older database; they need a server default."""
+    existing = {column['name'] for column in inspect(conn).get_columns(table.name)}
+    for column in table.columns:
+        if column.name not in existing:
+            conn.exec_driver_sql(
+                f"ALTER TABLE {table.name} ADD COLUMN {column.name} "
+                f"{column.type.compile(dialect=conn.dialect)} NOT NULL DEFAULT '{column.server_default.arg}'"
+            )
+
+class TradeWriter:
+    """Buffer parsed trades and insert them in batches.
+
+    Each batch is written inside one transaction with one Core-level
+    executemany per table (trades, items, item_attributes), bypassing the ORM
+    unit of work. Trade ids are read back with RETURNING to link items to
+    trades; item ids are allocated after the current maximum to link
+    attributes to items.
+
+    Trades are keyed by ``trade_hash``. Duplicates within a batch are dropped
+    in memory, keys already in the database are filtered out with one indexed
+    lookup per batch, and the insert itself uses ON CONFLICT DO NOTHING, so
+    re-ingesting an overlapping log never stores a line twice. Trades of a
+    month detached to an archive are not stored either, and are counted in
+    ``rows_detached``: a corrected log of that month has to be ingested
+    into its archive. Only trades that were actually inserted are folded
+    into the price index, in the same transaction.
+    """
+
+    def __init__(self, db: 'Database', batch_size: int = 500):
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self.db = db
+        self.batch_size = batch_size
+        self.rows_written = 0
+        self.rows_skipped = 0
+        self.rows_detached = 0
+        self._pending: Dict[str, Dict] = {}
+
+    def add(self, trade_data: Dict):
+        """Queue a trade, flushing once a full batch is pending."""
+        key = trade_hash(trade_data)
+        if key in self._pending:
+            self.rows_skipped += 1
+            METRICS.incr("db.rows_skipped")
+            return
+        self._pending[key] = trade_data
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write all pending trades in one transaction."""
+        if not self._pending:
+            return
+        trades = schema.Trade.__table__
+        items = schema.Item.__table__
+        attributes = schema.ItemAttribute.__table__
+        with METRICS.timer("db.flush"), self.db.engine.begin() as conn:
+            keys = list(self._pending)
+            known = []
+            for i in range(0, len(keys), _LOOKUP_CHUNK):
+                known.extend(conn.execute(
+                    select(trades.c.content_hash).where(trades.c.content_hash.in_(keys[i:i + _LOOKUP_CHUNK]))
+                ).scalars())
+            for key in known:
+                del self._pending[key]
+            # Lines of detached months belong in their archive
+            detached = detached_months(conn)
+            in_archive = [
+                key for key, data in self._pending.items()
+                if (data.get('log_date') or '')[:7] in detached
+            ] if detached else []
+            for key in in_archive:
+                del self._pending[key]
+
+            trade_ids: Dict[str, int] = {}
+            if self._pending:
+                result = conn.execute(
+                    insert(trades)
+                    .on_conflict_do_nothing(index_elements=['content_hash'])
+                    .returning(trades.c.id, trades.c.content_hash),
+                    [_trade_row(data, key) for key, data in self._pending.items()]
+                )
+                trade_ids = {key: trade_id for trade_id, key in result}
+
+            item_rows = []
+            item_attribute_rows = []
+            for key, trade_id in trade_ids.items():
+                for item_row, attribute_rows in _item_rows(self._pending[key]):
+                    item_row['trade_id'] = trade_id
+                    item_rows.append(item_row)
+                    item_attribute_rows.append(attribute_rows)
+            if item_rows:
+                # Assign item ids up front so the insert is one batched
+                # executemany; RETURNING in parameter order would make SQLite
+                # run it row by row. The trades insert above already holds
+                # the write lock, so no other writer can take these ids.
+                next_id = conn.execute(select(func.coalesce(func.max(items.c.id), 0))).scalar() + 1
+                item_ids = range(next_id, next_id + len(item_rows))
+                for item_id, item_row in zip(item_ids, item_rows):
+                    item_row['id'] = item_id
+                conn.execute(insert(items), item_rows)
+                attribute_rows = [
+                    dict(attr, item_id=item_id)
+                    for item_id, attrs in zip(item_ids, item_attribute_rows)
+                    for attr in attrs
+                ]
+                if attribute_rows:
+                    conn.execute(insert(attributes), attribute_rows)
+            with METRICS.timer("db.price_index"):
+                update_price_index(conn, [
+                    observation
+                    for key in trade_ids
+                    for observation in price_observations(self._pending[key])
+                ])
+            inserted = len(trade_ids)
+        if inserted:
+            self.db.invalidate(TRADES)
+        skipped = len(known) + len(self._pending) - inserted
+        self.rows_skipped += skipped
+        self.rows_detached += len(in_archive)
+        self.rows_written += inserted
+        METRICS.incr("db.batches")
+        METRICS.incr("db.rows_written", inserted)
+        METRICS.incr("db.rows_skipped", skipped)
+        METRICS.incr("db.rows_detached", len(in_archive))
+        self._pending = {}
+
+    def __enter__(self):
+        """Enter the context manager."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Flush remaining trades, or drop them if the block failed."""
+        if exc_type is None:
+            self.flush()
+        else:
+            self._pending = {}
 
 class Database:
-    def __init__(self, db_path: str):
-        """Initialize the database connection."""
+    def __init__(self, db_path: str, cache_size: int = 0, cache_ttl: float = 30.0):
+        """Initialize the database connection.
+
+        With ``cache_size`` > 0, read queries are served from an LRU cache of
+        that many results, each kept for at most ``cache_ttl`` seconds and
+        dropped as soon as a write touches its tables.
+        """
         self.engine = create_engine(f"sqlite:///{db_path}")
-        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.cache = QueryCache(cache_size, cache_ttl) if cache_size > 0 else None
+        # Keep loaded attributes after commit so returned rows stay readable
+        self.SessionLocal = sessionmaker(
+            autocommit=False, autoflush=False, expire_on_commit=False, bind=self.engine
+        )
         self._create_tables()
 
     def _create_tables(self):
         """Create database tables if they don't exist."""
+        had_price_index = inspect(self.engine).has_table(schema.PriceSummary.__tablename__)
+        with self.engine.connect() as conn:
+            # Lets detach_month give freed pages back; only a new file takes it
+            conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
         Base.metadata.create_all(bind=self.engine)
+        schema.Base.metadata.create_all(bind=self.engine)
+        with self.engine.begin() as conn:
+            # create_all skips columns and indexes added to tables that already exist
+            _add_missing_columns(conn, schema.Trade.__table__)
+            for index in schema.Trade.__table__.indexes:
+                index.create(conn, checkfirst=True)
+            create_search_indexes(conn)
+            if not had_price_index:
+                rebuild_price_index(conn)
 
     def __enter__(self):
         """Enter the context manager."""
@@ -69,6 +398,37 @@ class Database:
             self.session.commit()
         self.session.close()
 
+    def invalidate(self, *tags: str):
+        """Drop cached query results that depend on the tagged tables."""
+        if self.cache is not None:
+            self.cache.invalidate(*tags)
+
+    def cache_stats(self) -> Optional[Dict]:
+        """Return the query cache counters, or None without a cache."""
+        return self.cache.stats() if self.cache is not None else None
+
+    @contextmanager
+    def _partition_sessions(
+        self, since: Optional[str] = None, until: Optional[str] = None
+    ) -> Iterator[List[Tuple[str, Session]]]:
+        """Sessions over the live trade tables and the archives of a date range.
+
+        Archives holding detached months between the log dates ``since`` and
+        ``until`` are attached to one connection; each session reads one
+        schema, whose name is passed to ``_in_schema`` for each statement.
+        Without relevant archives there is one session.
+        """
+        with self.engine.connect() as conn:
+            paths = archives_for(conn, since, until)
+            conn.rollback()
+            with attach_archives(conn, paths) as names:
+                sessions = [(name, Session(bind=conn)) for name in names]
+                try:
+                    yield sessions
+                finally:
+                    for _, session in sessions:
+                        session.close()
+
     @contextmanager
     def get_session(self) -> Session:
         """Get a database session."""
@@ -89,25 +449,277 @@ class Database:
             session.add(analysis)
             session.commit()
             session.refresh(analysis)
-            return analysis
+        self.invalidate(ANALYSES)
+        return analysis
 
+    @cached(ANALYSES)
     def get_analysis(self, analysis_id: int) -> Optional[TextAnalysis]:
         """Retrieve a text analysis by ID."""
         with self.get_session() as session:
             return session.query(TextAnalysis).filter(TextAnalysis.id == analysis_id).first()
 
+    @cached(ANALYSES)
     def get_recent_analyses(self, limit: int = 10) -> List[TextAnalysis]:
         """Get the most recent text analyses."""
         with self.get_session() as session:
             return session.query(TextAnalysis).order_by(TextAnalysis.created_at.desc()).limit(limit).all()
 
-    def search_analyses(self, query: str) -> List[TextAnalysis]:
-        """Search text analyses by content."""
+    @cached(ANALYSES)
+    def search_analyses(self, query: str, limit: int = 50) -> List[TextAnalysis]:
+        """Search text analyses by content, best matches first.
+
+        Uses the FTS5 index; see ``search.fts_query`` for the query syntax.
+        """
+        match = fts_query(query)
+        if not match:
+            return []
+        statement = text(
+            "SELECT text_analyses.* FROM text_analyses_fts "
+            "JOIN text_analyses ON text_analyses.id = text_analyses_fts.rowid "
+            "WHERE text_analyses_fts MATCH :match "
+            "ORDER BY bm25(text_analyses_fts) LIMIT :limit"
+        )
         with self.get_session() as session:
-            return session.query(TextAnalysis).filter(
-                TextAnalysis.text_content.ilike(f"%{query}%")
+            return session.query(TextAnalysis).from_statement(statement).params(
+                match=match, limit=limit
             ).all()
 
+    @cached(TRADES)
+    def search_trades(
+        self, query: str, limit: int = 50, highlight: Tuple[str, str] = ('<b>', '</b>')
+    ) -> List[Dict]:
+        """Full-text search over trade messages, ranked by BM25.
+
+        Each result is a trade dict with a ``snippet`` of the message around
+        the matches and its ``rank`` (lower is better). Detached months are
+        searched in their archives; ids there are the archive's own. BM25
+        scores depend on the index they come from, so ranking is per
+        partition: the live results come first, then each archive's, most
+        recent archive first, up to ``limit`` in all.
+        """
+        match = fts_query(query)
+        if not match:
+            return []
+        results = []
+        with self._partition_sessions() as sessions:
+            for name, session in sessions:
+                statement = text(
+                    "SELECT trades_fts.rowid, bm25(trades_fts) AS rank, "
+                    "snippet(trades_fts, 0, :open, :close, '…', 12) AS snippet "
+                    f"FROM {name}.trades_fts AS trades_fts WHERE trades_fts MATCH :match "
+                    "ORDER BY rank LIMIT :limit"
+                )
+                hits = session.execute(statement, {
+                    'match': match, 'limit': limit, 'open': highlight[0], 'close': highlight[1]
+                }).all()
+                trades = {
+                    trade.id: trade for trade in session.execute(
+                        select(schema.Trade).where(schema.Trade.id.in_([hit.rowid for hit in hits])),
+                        execution_options=_in_schema(name),
+                    ).scalars()
+                }
+                results.append([
+                    {**_trade_dict(trades[hit.rowid]), 'snippet': hit.snippet, 'rank': hit.rank}
+                    for hit in hits
+                ])
+        return [trade for partition in results for trade in partition][:limit]
+
+    @cached(TRADES)
+    def find_items(
+        self,
+        name: Optional[str] = None,
+        rarity: Optional[str] = None,
+        server: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict]:
+        """Find stored items, e.g. all rare iron pickaxes on Cadence this week.
+
+        ``since`` and ``until`` are inclusive YYYY-MM-DD log dates. Name and
+        rarity are served by the items index, server and dates by the trades
+        index. Detached months in the range are read from their archives.
+        """
+        query = select(schema.Item, schema.Trade).join(schema.Trade, schema.Item.trade_id == schema.Trade.id)
+        if name is not None:
+            query = query.where(schema.Item.name == name)
+        if rarity is not None:
+            query = query.where(schema.Item.rarity == rarity)
+        query = _filter_trades(query, server=server, since=since, until=until)
+        query = query.order_by(schema.Trade.log_date, schema.Trade.timestamp, schema.Item.id)
+        if limit is not None:
+            query = query.limit(limit)
+        with self._partition_sessions(since, until) as sessions:
+            results = [
+                [
+                    {**_item_dict(item), 'trade': _trade_dict(trade)}
+                    for item, trade in session.execute(query, execution_options=_in_schema(name))
+                ]
+                for name, session in sessions
+            ]
+        return _merge_partitions(results, lambda item: _log_order(item['trade']), limit)
+
+    @cached(TRADES)
+    def find_trades(
+        self,
+        player_name: Optional[str] = None,
+        trade_type: Optional[str] = None,
+        server: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict]:
+        """Find stored trades by player, trade type, server and log date.
+
+        Detached months in the range are read from their archives.
+        """
+        query = select(schema.Trade)
+        if player_name is not None:
+            query = query.where(schema.Trade.player_name == player_name)
+        if trade_type is not None:
+            query = query.where(schema.Trade.trade_type == trade_type)
+        query = _filter_trades(query, server=server, since=since, until=until)
+        query = query.order_by(schema.Trade.log_date, schema.Trade.timestamp, schema.Trade.id)
+        if limit is not None:
+            query = query.limit(limit)
+        with self._partition_sessions(since, until) as sessions:
+            results = [
+                [
+                    _trade_dict(trade)
+                    for trade in session.execute(query, execution_options=_in_schema(name)).scalars()
+                ]
+                for name, session in sessions
+            ]
+        return _merge_partitions(results, _log_order, limit)
+
+    @cached(TRADES)
+    def price_summary(self, name: str, rarity: str, server: str, day: str) -> Optional[Dict]:
+        """Return the daily asking-price summary for an item, or None.
+
+        Prices are in silver. This is a single lookup on the summary key.
+        """
+        with self.get_session() as session:
+            summary = session.execute(
+                select(schema.PriceSummary).where(
+                    schema.PriceSummary.item_name == name,
+                    schema.PriceSummary.rarity == rarity,
+                    schema.PriceSummary.server == server,
+                    schema.PriceSummary.day == day,
+                )
+            ).scalar_one_or_none()
+            return _summary_dict(summary) if summary is not None else None
+
+    @cached(TRADES)
+    def price_history(
+        self,
+        name: str,
+        rarity: Optional[str] = None,
+        server: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> List[Dict]:
+        """Return the daily price summaries of an item, oldest day first."""
+        query = select(schema.PriceSummary).where(schema.PriceSummary.item_name == name)
+        if rarity is not None:
+            query = query.where(schema.PriceSummary.rarity == rarity)
+        if server is not None:
+            query = query.where(schema.PriceSummary.server == server)
+        if since is not None:
+            query = query.where(schema.PriceSummary.day >= since)
+        if until is not None:
+            query = query.where(schema.PriceSummary.day <= until)
+        query = query.order_by(schema.PriceSummary.day, schema.PriceSummary.server)
+        with self.get_session() as session:
+            return [_summary_dict(summary) for summary in session.execute(query).scalars()]
+
+    def rebuild_price_index(self) -> int:
+        """Recompute all price summaries from the stored trades."""
+        with self.engine.begin() as conn:
+            written = rebuild_price_index(conn)
+        self.invalidate(TRADES)
+        return written
+
+    def partitions(self) -> List[Dict]:
+        """Trade count and first/last log date of each stored month."""
+        with self.engine.connect() as conn:
+            return list_partitions(conn)
+
+    def detach_month(self, month: str, archive_path: str) -> Dict[str, int]:
+        """Move a month (YYYY-MM) of trades into a separate database file.
+
+        The archive gets the same schema and can be opened with
+        ``Database(archive_path)``; several months may share one archive.
+        Afterwards the month's trades are still found by ``find_trades``,
+        ``find_items`` and ``search_trades``, and ingesting its log again
+        stores nothing. Returns the number of rows moved per table.
+        """
+        Database(archive_path).engine.dispose()
+        with METRICS.timer("db.detach_month"), self.engine.connect() as conn:
+            moved = detach_month(conn, month, archive_path)
+        self.invalidate(TRADES)
+        return moved
+
+    def compact(self):
+        """Rewrite the database file without its free pages.
+
+        This also switches a file created without incremental auto-vacuum
+        to it, so that later ``detach_month`` calls shrink the file. It
+        rewrites the whole file, so it takes about as long as copying it.
+        """
+        with self.engine.connect() as conn:
+            conn.connection.dbapi_connection.executescript("PRAGMA auto_vacuum = INCREMENTAL; VACUUM")
+
+    def get_checkpoint(self, path: str) -> Optional[Dict]:
+        """Get the stored read position for a followed log file."""
+        with self.get_session() as session:
+            checkpoint = session.query(IngestCheckpoint).filter(IngestCheckpoint.path == path).first()
+            return checkpoint.to_dict() if checkpoint else None
+
+    def save_checkpoint(self, path: str, device: int, inode: int, offset: int, log_date: Optional[str] = None):
+        """Store the read position for a followed log file."""
+        with self.get_session() as session:
+            checkpoint = session.query(IngestCheckpoint).filter(IngestCheckpoint.path == path).first()
+            if checkpoint is None:
+                checkpoint = IngestCheckpoint(path=path)
+                session.add(checkpoint)
+            checkpoint.device = device
+            checkpoint.inode = inode
+            checkpoint.offset = offset
+            checkpoint.log_date = log_date
+
+    def get_manifest_entry(self, path: str) -> Optional[Dict]:
+        """Get the manifest entry of a log file ingested as a whole."""
+        with self.get_session() as session:
+            entry = session.query(IngestedFile).filter(IngestedFile.path == path).first()
+            return entry.to_dict() if entry else None
+
+    def save_manifest_entry(
+        self,
+        path: str,
+        size: int,
+        mtime: float,
+        content_hash: Optional[str],
+        status: str,
+        rows: int = 0,
+        error: Optional[str] = None,
+    ):
+        """Record the state of a log file in the ingestion manifest."""
+        with self.get_session() as session:
+            entry = session.query(IngestedFile).filter(IngestedFile.path == path).first()
+            if entry is None:
+                entry = IngestedFile(path=path)
+                session.add(entry)
+            entry.size = size
+            entry.mtime = mtime
+            entry.content_hash = content_hash
+            entry.status = status
+            entry.rows = rows
+            entry.error = error
+
+    def writer(self, batch_size: int = 500) -> TradeWriter:
+        """Create a batched trade writer bound to this database."""
+        return TradeWriter(self, batch_size=batch_size)
+
     def backup_database(self, backup_path: str):
         """Create a backup of the database."""
         import shutil
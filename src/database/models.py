@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Dict, List, Optional
-from sqlalchemy import Column, DateTime, Integer, JSON, String, create_engine
+from sqlalchemy import Column, DateTime, Float, Integer, JSON, String, create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -37,4 +37,74 @@ class TextAnalysis(Base):
             "created_at": self.created_at.isoformat(),
             "updated_at": self.updated_at.isoformat(),
             "metadata": self.analysis_metadata
-        } 
\ No newline at end of file
+        } 
+
+class IngestCheckpoint(Base):
+    __tablename__ = "ingest_checkpoints"
+
+    id = Column(Integer, primary_key=True)
+    path = Column(String, nullable=False, unique=True)
+    device = Column(Integer, nullable=False)  # st_dev and st_ino identify the file across renames
+    inode = Column(Integer, nullable=False)
+    offset = Column(Integer, nullable=False, default=0)  # byte offset of the next unread line
+    log_date = Column(String(10), nullable=True)  # last "Logging started" date seen
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<IngestCheckpoint(path={self.path}, offset={self.offset})>"
+
+    def to_dict(self) -> Dict:
+        """Convert the instance to a dictionary."""
+        return {
+            "path": self.path,
+            "device": self.device,
+            "inode": self.inode,
+            "offset": self.offset,
+            "log_date": self.log_date,
+        }
+
+
+class IngestedFile(Base):
+    """Manifest entry for a log file ingested as a whole."""
+
+    __tablename__ = "ingested_files"
+
+    id = Column(Integer, primary_key=True)
+    path = Column(String, nullable=False, unique=True)
+    size = Column(Integer, nullable=False)
+    mtime = Column(Float, nullable=False)
+    content_hash = Column(String(64), nullable=True)  # of the file as stored, compressed or not
+    status = Column(String(16), nullable=False)  # running, done or failed
+    rows = Column(Integer, nullable=False, default=0)  # trades stored from this file
+    error = Column(String, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<IngestedFile(path={self.path}, status={self.status})>"
+
+    def to_dict(self) -> Dict:
+        """Convert the instance to a dictionary."""
+        return {
+            "path": self.path,
+            "size": self.size,
+            "mtime": self.mtime,
+            "content_hash": self.content_hash,
+            "status": self.status,
+            "rows": self.rows,
+            "error": self.error,
+        }
+
+
+class DetachedMonth(Base):
+    """A month of trades moved out to an archive database."""
+
+    __tablename__ = "detached_months"
+
+    id = Column(Integer, primary_key=True)
+    month = Column(String(7), nullable=False, unique=True)  # YYYY-MM
+    archive_path = Column(String, nullable=False)
+    trades = Column(Integer, nullable=False, default=0)
+    detached_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<DetachedMonth(month={self.month}, archive_path={self.archive_path})>"
@@ -0,0 +1,177 @@
+"""Month partitions of the trade tables.
+
+Every trade carries the date of its log's ``Logging started`` section, and
+``ix_trades_log_date`` orders the trades table by it, so one month's trades
+form one contiguous index range: a date-range query reads only the months
+it covers, and a month can be moved out without scanning the others.
+
+``detach_month`` copies a month's trades, with their items, attributes,
+traits and price summaries, into a standalone archive database with the
+same schema (searchable on its own with ``Database(archive_path)``) and
+deletes them from the live one, in a single transaction across both files.
+Ids are shifted past the archive's largest ones, so several months can
+share one archive. The month is recorded in ``detached_months``: ingesting
+its log again stores nothing, and ``archives_for`` routes date-range
+queries to the archives holding the months they cover, which
+``attach_archives`` attaches next to the live tables. Trades without a log
+date belong to no month and are never detached.
+
+The cost is one indexed copy and one delete of the month's rows; a larger
+page cache for the duration keeps the index updates off the disk. Pages
+freed in the live file are returned to the filesystem when it uses
+incremental auto-vacuum, as databases created by ``Database`` do.
+"""
+
+import re
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import Table, insert
+from sqlalchemy.engine import Connection
+
+from .. import models as schema
+from .models import DetachedMonth
+
+_MONTH = re.compile(r'(\d{4})-(\d{2})')
+
+# Page cache per database while detaching, in KiB (negative: a size, not pages)
+_DETACH_CACHE_KIB = 64 * 1024
+
+# Foreign key column -> table whose ids it refers to
+_REFERENCES = {"trade_id": "trades", "item_id": "items"}
+
+
+def month_bounds(month: str) -> Tuple[str, str]:
+    """Return the half-open log date range [first day, next month) of YYYY-MM."""
+    match = _MONTH.fullmatch(month)
+    if not match or not 1 <= int(match.group(2)) <= 12:
+        raise ValueError(f"Expected a month as YYYY-MM, got {month!r}")
+    year, number = int(match.group(1)), int(match.group(2))
+    following = f"{year + 1:04d}-01" if number == 12 else f"{year:04d}-{number + 1:02d}"
+    return f"{month}-01", f"{following}-01"
+
+
+def list_partitions(conn: Connection) -> List[Dict]:
+    """Trade count and first/last log date per month, oldest first."""
+    rows = conn.exec_driver_sql(
+        "SELECT substr(log_date, 1, 7) AS month, count(*), min(log_date), max(log_date) "
+        "FROM trades WHERE log_date IS NOT NULL GROUP BY month ORDER BY month"
+    )
+    return [
+        {"month": month, "trades": count, "first_day": first, "last_day": last}
+        for month, count, first, last in rows
+    ]
+
+
+def detached_months(conn: Connection) -> Set[str]:
+    """Months (YYYY-MM) moved out to archives."""
+    return {month for (month,) in conn.exec_driver_sql("SELECT month FROM detached_months")}
+
+
+def archives_for(conn: Connection, since: Optional[str] = None, until: Optional[str] = None) -> List[str]:
+    """Archives holding detached months within the inclusive log dates [since, until].
+
+    The archive with the most recent month comes first.
+    """
+    rows = conn.exec_driver_sql(
+        "SELECT archive_path FROM detached_months "
+        "WHERE (? IS NULL OR month >= substr(?, 1, 7)) AND (? IS NULL OR month <= substr(?, 1, 7)) "
+        "GROUP BY archive_path ORDER BY max(month) DESC",
+        (since, since, until, until),
+    )
+    return [path for (path,) in rows]
+
+
+@contextmanager
+def attach_archives(conn: Connection, paths: List[str]) -> Iterator[List[str]]:
+    """Attach archive databases to ``conn`` for the duration of the block.
+
+    Yields the schema names to query, ``main`` first. ``conn`` must not be
+    inside a transaction; SQLite attaches at most 10 databases by default.
+    """
+    names = [f"archive_{i}" for i in range(len(paths))]
+    attached = []
+    try:
+        for name, path in zip(names, paths):
+            conn.exec_driver_sql(f"ATTACH DATABASE ? AS {name}", (path,))
+            attached.append(name)
+        conn.commit()
+        yield ["main"] + names
+    finally:
+        conn.rollback()
+        for name in attached:
+            conn.exec_driver_sql(f"DETACH DATABASE {name}")
+        conn.commit()
+
+
+def _copy(conn: Connection, table: Table, where: str, params: Tuple, offsets: Dict[str, int]) -> int:
+    """Copy rows into the archive with ids (and references) shifted by ``offsets``."""
+    columns = [column.name for column in table.columns]
+    values = []
+    for name in columns:
+        if name == "id":
+            values.append(f"id + {offsets[table.name]}")
+        elif name in _REFERENCES:
+            values.append(f"{name} + {offsets[_REFERENCES[name]]}")
+        else:
+            values.append(name)
+    result = conn.exec_driver_sql(
+        f"INSERT INTO archive.{table.name} ({', '.join(columns)}) "
+        f"SELECT {', '.join(values)} FROM main.{table.name} WHERE {where}",
+        params,
+    )
+    return result.rowcount
+
+
+def detach_month(conn: Connection, month: str, archive_path: str) -> Dict[str, int]:
+    """Move one month into ``archive_path``, which must already have the schema.
+
+    ``conn`` must not be inside a transaction (SQLite cannot attach a
+    database within one). Returns the number of rows moved per table.
+    Raises ValueError if the month was already detached to another archive.
+    """
+    since, until = month_bounds(month)
+    recorded = conn.exec_driver_sql(
+        "SELECT archive_path FROM detached_months WHERE month = ?", (month,)
+    ).scalar()
+    conn.rollback()
+    if recorded is not None and recorded != archive_path:
+        raise ValueError(f"{month} was already detached to {recorded}")
+    trade_ids = "SELECT id FROM main.trades WHERE log_date >= ? AND log_date < ?"
+    item_ids = f"SELECT id FROM main.items WHERE trade_id IN ({trade_ids})"
+    # Children first, so foreign keys never point at a missing row
+    plan = [
+        (schema.ItemAttribute.__table__, f"item_id IN ({item_ids})"),
+        (schema.ItemTrait.__table__, f"item_id IN ({item_ids})"),
+        (schema.Item.__table__, f"trade_id IN ({trade_ids})"),
+        (schema.Trade.__table__, "log_date >= ? AND log_date < ?"),
+        (schema.PriceSummary.__table__, "day >= ? AND day < ?"),
+    ]
+
+    conn.exec_driver_sql("ATTACH DATABASE ? AS archive", (archive_path,))
+    cache_size = conn.exec_driver_sql("PRAGMA main.cache_size").scalar()
+    for name in ("main", "archive"):
+        conn.exec_driver_sql(f"PRAGMA {name}.cache_size = -{_DETACH_CACHE_KIB}")
+    conn.commit()
+    moved = {}
+    try:
+        with conn.begin():
+            offsets = {
+                table.name: conn.exec_driver_sql(f"SELECT coalesce(max(id), 0) FROM archive.{table.name}").scalar()
+                for table, _ in plan
+            }
+            for table, where in reversed(plan):
+                moved[table.name] = _copy(conn, table, where, (since, until), offsets)
+            for table, where in plan:
+                conn.exec_driver_sql(f"DELETE FROM main.{table.name} WHERE {where}", (since, until))
+            if moved["trades"] and recorded is None:
+                conn.execute(insert(DetachedMonth.__table__).values(
+                    month=month, archive_path=archive_path, trades=moved["trades"]
+                ))
+    finally:
+        conn.exec_driver_sql("DETACH DATABASE archive")
+        conn.exec_driver_sql(f"PRAGMA main.cache_size = {cache_size}")
+        conn.commit()
+    # Stepped to completion by executescript; execute() would free one page
+    conn.connection.dbapi_connection.executescript("PRAGMA main.incremental_vacuum")
+    return moved
@@ -0,0 +1,219 @@
+"""Silver-normalized price index maintained as trades are written.
+
+Every stored price is converted to silver with ``CURRENCY_RATES``. Asking
+prices (WTS) of single-item trades also feed one ``price_summaries`` row per
+(item name, rarity, server, day). That row keeps the count, min, max and mean,
+plus a quantile sketch, and is updated in place as trades arrive, so a price
+lookup reads one row instead of aggregating raw trades.
+"""
+
+import math
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.engine import Connection
+
+from src.config import CURRENCY_RATES
+
+from .. import models as schema
+
+# Only asking prices are indexed; WTB and PC prices are bids and checks
+INDEXED_TRADE_TYPES = {'WTS'}
+
+# Summary key: (item name, rarity, server, day)
+PriceKey = Tuple[str, str, str, str]
+
+_LOOKUP_CHUNK = 200  # four bound parameters per key
+
+
+def to_silver(amount: Optional[float], currency: Optional[str]) -> Optional[float]:
+    """Convert an amount in ``currency`` to silver, or None without a price."""
+    if amount is None or currency is None:
+        return None
+    return float(amount) * CURRENCY_RATES[currency]
+
+
+class QuantileSketch:
+    """Log-bucketed histogram answering quantiles with bounded relative error.
+
+    Values fall into buckets whose bounds grow by a factor ``gamma``, so any
+    quantile is returned within ``relative_accuracy`` of the true value
+    while the sketch only holds one counter per occupied bucket. Sketches
+    merge by adding counters, which is what lets daily summaries be updated
+    batch by batch.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+
+    def add(self, value: float, count: int = 1):
+        """Record ``value`` (>= 0) ``count`` times."""
+        if value <= 0:
+            self.zeros += count
+        else:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += count
+
+    def merge(self, other: 'QuantileSketch'):
+        """Add the counts of another sketch with the same accuracy."""
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Return the ``q``-quantile (0 <= q <= 1), or None if empty."""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if seen > rank:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def to_dict(self) -> Dict:
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'zeros': self.zeros,
+            'buckets': {str(index): count for index, count in self.buckets.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'QuantileSketch':
+        sketch = cls(data['relative_accuracy'])
+        sketch.buckets = {int(index): count for index, count in data['buckets'].items()}
+        sketch.zeros = data['zeros']
+        sketch.count = sketch.zeros + sum(sketch.buckets.values())
+        return sketch
+
+
+def price_observations(trade_data: Dict) -> List[Tuple[PriceKey, float]]:
+    """Return the index entries a parsed trade contributes.
+
+    A trade counts when it is an asking price with a known day and exactly one
+    item, since a message's single price cannot be split between items.
+    """
+    items = trade_data.get('items') or []
+    if trade_data.get('trade_type') not in INDEXED_TRADE_TYPES or len(items) != 1:
+        return []
+    day = trade_data.get('log_date')
+    silver = to_silver(trade_data.get('price_amount'), trade_data.get('price_currency'))
+    if day is None or silver is None:
+        return []
+    item = items[0]
+    return [((item['name'], item['rarity'], trade_data['server'], day), silver)]
+
+
+def _summary_row(key: PriceKey, sketch: QuantileSketch, count: int,
+                 low: float, high: float, total: float) -> Dict:
+    name, rarity, server, day = key
+
+    def clamp(value: float) -> float:
+        # Bucket midpoints can fall just outside the observed range
+        return min(max(value, low), high)
+
+    return {
+        'item_name': name,
+        'rarity': rarity,
+        'server': server,
+        'day': day,
+        'count': count,
+        'min_silver': low,
+        'max_silver': high,
+        'mean_silver': total / count,
+        'p25_silver': clamp(sketch.quantile(0.25)),
+        'median_silver': clamp(sketch.quantile(0.5)),
+        'p75_silver': clamp(sketch.quantile(0.75)),
+        'sketch': sketch.to_dict(),
+    }
+
+
+def update_price_index(conn: Connection, observations: Iterable[Tuple[PriceKey, float]]) -> int:
+    """Fold new prices into their daily summaries inside ``conn``'s transaction.
+
+    Existing summaries for the touched keys are read with one lookup per
+    chunk, merged in memory and written back with a single upsert. Returns
+    the number of summary rows written.
+    """
+    grouped: Dict[PriceKey, List[float]] = defaultdict(list)
+    for key, silver in observations:
+        grouped[key].append(silver)
+    if not grouped:
+        return 0
+
+    table = schema.PriceSummary.__table__
+    key_columns = (table.c.item_name, table.c.rarity, table.c.server, table.c.day)
+    keys = list(grouped)
+    current = {}
+    for i in range(0, len(keys), _LOOKUP_CHUNK):
+        rows = conn.execute(
+            select(table).where(tuple_(*key_columns).in_(keys[i:i + _LOOKUP_CHUNK]))
+        )
+        for row in rows:
+            key = (row.item_name, row.rarity.value, row.server.value, row.day)
+            current[key] = row
+
+    summaries = []
+    for key, prices in grouped.items():
+        sketch = QuantileSketch()
+        for price in prices:
+            sketch.add(price)
+        count, low, high, total = len(prices), min(prices), max(prices), sum(prices)
+        row = current.get(key)
+        if row is not None:
+            sketch.merge(QuantileSketch.from_dict(row.sketch))
+            count += row.count
+            low = min(low, row.min_silver)
+            high = max(high, row.max_silver)
+            total += row.mean_silver * row.count
+        summaries.append(_summary_row(key, sketch, count, low, high, total))
+
+    statement = insert(table)
+    conn.execute(
+        statement.on_conflict_do_update(
+            index_elements=['item_name', 'rarity', 'server', 'day'],
+            set_={
+                name: statement.excluded[name]
+                for name in ('count', 'min_silver', 'max_silver', 'mean_silver',
+                             'p25_silver', 'median_silver', 'p75_silver', 'sketch', 'updated_at')
+            }
+        ),
+        summaries
+    )
+    return len(summaries)
+
+
+def rebuild_price_index(conn: Connection, batch_size: int = 5000) -> int:
+    """Recompute every summary from the stored trades."""
+    trades = schema.Trade.__table__
+    items = schema.Item.__table__
+    conn.execute(schema.PriceSummary.__table__.delete())
+    rows = conn.execute(
+        select(items.c.name, items.c.rarity, trades.c.server, trades.c.log_date, items.c.price_silver)
+        .join(trades, items.c.trade_id == trades.c.id)
+        .where(
+            trades.c.trade_type.in_(INDEXED_TRADE_TYPES),
+            trades.c.log_date.is_not(None),
+            items.c.price_silver.is_not(None),
+        )
+    ).all()
+    observations = [
+        ((name, rarity.value, server.value, day), silver)
+        for name, rarity, server, day, silver in rows
+    ]
+    written = 0
+    for i in range(0, len(observations), batch_size):
+        written += update_price_index(conn, observations[i:i + batch_size])
+    return written
@@ -0,0 +1,70 @@
+"""SQLite FTS5 full-text indexes over trade messages and analyses.
+
+Each index is an external-content FTS5 table kept in sync with its source
+table by triggers, so every write path (ORM, Core batches, raw SQL) updates
+it. Queries are ranked with BM25.
+"""
+
+import re
+from typing import List
+
+from sqlalchemy.engine import Connection
+
+# (fts table, source table, indexed column)
+FTS_INDEXES = [
+    ("trades_fts", "trades", "message"),
+    ("text_analyses_fts", "text_analyses", "text_content"),
+]
+
+_TERM_PATTERN = re.compile(r'"([^"]*)"(\*?)|(\S+)')
+
+
+def _index_ddl(fts: str, table: str, column: str) -> List[str]:
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{column}, content='{table}', content_rowid='id', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {column}) VALUES ('delete', old.id, old.{column}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {column} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {column}) VALUES ('delete', old.id, old.{column}); "
+        f"INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); END",
+    ]
+
+
+def create_search_indexes(conn: Connection) -> None:
+    """Create the FTS5 tables and triggers, indexing existing rows once."""
+    existing = {
+        row[0] for row in conn.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'table'"
+        )
+    }
+    for fts, table, column in FTS_INDEXES:
+        for statement in _index_ddl(fts, table, column):
+            conn.exec_driver_sql(statement)
+        if fts not in existing:
+            conn.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def fts_query(query: str) -> str:
+    """Turn user search text into a safe FTS5 query.
+
+    Plain words become tokens that must all match, ``word*`` is a prefix
+    query and ``"two words"`` is a phrase. Everything is quoted, so
+    punctuation common in trade messages (``100+C``, ``[1/3]``) cannot
+    produce FTS syntax errors.
+    """
+    terms = []
+    for phrase, phrase_prefix, word in _TERM_PATTERN.findall(query):
+        if word:
+            prefix = word.endswith("*")
+            text = word.rstrip("*")
+        else:
+            prefix = bool(phrase_prefix)
+            text = phrase
+        if not text.strip():
+            continue
+        quoted = '"' + text.replace('"', '""') + '"'
+        terms.append(quoted + ("*" if prefix else ""))
+    return " ".join(terms)
@@ -0,0 +1,273 @@
+"""Columnar export of the trade tables to Parquet or Arrow IPC files.
+
+Trades, items, item attributes and item traits are streamed out of the
+database ``row_group_size`` rows at a time; each chunk becomes one Parquet
+row group (or one Arrow record batch) and is written before the next is
+read, so memory use does not grow with the size of the database.
+
+Enum columns (server, trade_type, rarity, price_currency) are dictionary
+encoded against the full list of enum values, so every chunk shares one
+dictionary and readers get them back as categoricals. Bookkeeping columns
+(content_hash, created_at, updated_at) are left out.
+
+By default each table is one file, ``<out>/trades.parquet`` and so on.
+With ``partition_by_day`` the files are split by log date in the Hive
+layout, ``<out>/trades/log_date=2025-05-01/part-0.parquet``, which
+``pyarrow.dataset`` and pandas read back as one table with a log_date
+column taken from the directory names (the files themselves leave it
+out); trades without a log date go to ``log_date=__HIVE_DEFAULT_PARTITION__``.
+Child rows are written to the partition of their trade.
+
+Usage::
+
+    python -m src.export trades.db exports/ --format parquet --partition-by-day
+"""
+
+import argparse
+import time
+from enum import Enum
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+from sqlalchemy import Enum as SQLEnum, Float, Integer, Numeric, Table
+from sqlalchemy.engine import Connection
+
+from src import models as schema
+from src.database.database import Database
+from src.metrics import METRICS
+from src.reporting import format_bytes
+
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+# Compression codecs each format can write; "none" writes uncompressed
+CODECS = {
+    "parquet": ("zstd", "lz4", "snappy", "gzip", "brotli", "none"),
+    "arrow": ("zstd", "lz4", "none"),
+}
+
+TABLES = [
+    schema.Trade.__table__,
+    schema.Item.__table__,
+    schema.ItemAttribute.__table__,
+    schema.ItemTrait.__table__,
+]
+
+SKIPPED_COLUMNS = {"content_hash", "created_at", "updated_at"}
+
+PARTITION_COLUMN = "log_date"
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+# Rows of each table belonging to the trades of one log date
+_DAY_TRADES = "SELECT id FROM trades WHERE log_date IS ?"
+_DAY_ITEMS = f"SELECT id FROM items WHERE trade_id IN ({_DAY_TRADES})"
+_DAY_FILTERS = {
+    "trades": "log_date IS ?",
+    "items": f"trade_id IN ({_DAY_TRADES})",
+    "item_attributes": f"item_id IN ({_DAY_ITEMS})",
+    "item_traits": f"item_id IN ({_DAY_ITEMS})",
+}
+
+
+class _Column:
+    """Converts one database column of a chunk to an Arrow array."""
+
+    def __init__(self, column):
+        self.name = column.name
+        self.enum: Optional[type] = None
+        if isinstance(column.type, SQLEnum) and column.type.enum_class is not None:
+            self.enum = column.type.enum_class
+            values: List[Enum] = list(self.enum)
+            # The database stores enum names; the export uses their values
+            self.codes = {member.name: code for code, member in enumerate(values)}
+            self.dictionary = pa.array([member.value for member in values], pa.string())
+            self.type = pa.dictionary(pa.int8(), pa.string())
+        elif isinstance(column.type, Integer):
+            self.type = pa.int64()
+        elif isinstance(column.type, (Float, Numeric)):
+            self.type = pa.float64()
+        else:
+            self.type = pa.string()
+
+    def convert(self, values) -> pa.Array:
+        if self.enum is None:
+            return pa.array(values, self.type)
+        codes = self.codes
+        try:
+            indices = pa.array([codes[value] if value is not None else None for value in values], pa.int8())
+        except KeyError as e:
+            raise ValueError(f"{self.name} holds {e.args[0]!r}, which is not a {self.enum.__name__}") from None
+        return pa.DictionaryArray.from_arrays(indices, self.dictionary)
+
+
+class _TableExport:
+    """Column list, Arrow schema and chunked reads for one table."""
+
+    def __init__(self, table: Table, skipped: Set[str] = SKIPPED_COLUMNS):
+        self.name = table.name
+        self.columns = [_Column(c) for c in table.columns if c.name not in skipped]
+        self.schema = pa.schema([pa.field(c.name, c.type) for c in self.columns])
+        self._select = f"SELECT {', '.join(c.name for c in self.columns)} FROM {table.name}"
+
+    def batches(
+        self, conn: Connection, size: int, where: Optional[str] = None, params: Tuple = ()
+    ) -> Iterator[pa.RecordBatch]:
+        sql = self._select + (f" WHERE {where}" if where else "") + " ORDER BY id"
+        cursor = conn.exec_driver_sql(sql, params)
+        while True:
+            rows = cursor.fetchmany(size)
+            if not rows:
+                return
+            columns = list(zip(*rows))
+            yield pa.RecordBatch.from_arrays(
+                [column.convert(values) for column, values in zip(self.columns, columns)],
+                schema=self.schema,
+            )
+
+
+class _Writer:
+    """Parquet or Arrow IPC file writer, opened on first use."""
+
+    def __init__(self, path: Path, arrow_schema: pa.Schema, fmt: str, compression: Optional[str]):
+        self.path = path
+        self.schema = arrow_schema
+        self.fmt = fmt
+        self.compression = compression
+        self._writer = None
+
+    def open(self):
+        if self._writer is not None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.fmt == "parquet":
+            self._writer = pq.ParquetWriter(self.path, self.schema, compression=self.compression)
+        else:
+            options = ipc.IpcWriteOptions(compression=self.compression)
+            self._writer = ipc.new_file(self.path, self.schema, options=options)
+
+    def write(self, batch: pa.RecordBatch):
+        self.open()
+        if self.fmt == "parquet":
+            self._writer.write_batch(batch, row_group_size=batch.num_rows)
+        else:
+            self._writer.write_batch(batch)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+def _days(conn: Connection) -> List[Optional[str]]:
+    rows = conn.exec_driver_sql("SELECT DISTINCT log_date FROM trades ORDER BY log_date")
+    return [log_date for (log_date,) in rows]
+
+
+def export_database(
+    db: Database,
+    out_dir: Path,
+    fmt: str = "parquet",
+    row_group_size: int = 65536,
+    partition_by_day: bool = False,
+    compression: str = "zstd",
+) -> Dict[str, int]:
+    """Export the trade tables under ``out_dir``; return rows written per table.
+
+    Without ``partition_by_day`` every table gets a file, even when empty.
+    ``compression`` is one of the format's ``CODECS``.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}, expected one of {', '.join(FORMATS)}")
+    if compression not in CODECS[fmt]:
+        raise ValueError(
+            f"{fmt} files cannot use {compression!r} compression, expected one of {', '.join(CODECS[fmt])}"
+        )
+    if row_group_size < 1:
+        raise ValueError("row_group_size must be at least 1")
+    out_dir = Path(out_dir)
+    codec = None if compression == "none" else compression
+    # Partitioned files take the log date from their directory
+    skipped = SKIPPED_COLUMNS | {PARTITION_COLUMN} if partition_by_day else SKIPPED_COLUMNS
+    exports = [_TableExport(table, skipped) for table in TABLES]
+    counts = {export.name: 0 for export in exports}
+
+    def copy(conn, export, path, where=None, params=()):
+        writer = _Writer(path, export.schema, fmt, codec)
+        try:
+            with METRICS.timer(f"export.{export.name}"):
+                for batch in export.batches(conn, row_group_size, where, params):
+                    writer.write(batch)
+                    counts[export.name] += batch.num_rows
+                    METRICS.incr("export.rows", batch.num_rows)
+            if not partition_by_day:
+                writer.open()
+        finally:
+            writer.close()
+
+    with db.engine.connect() as conn:
+        if not partition_by_day:
+            for export in exports:
+                copy(conn, export, out_dir / f"{export.name}{FORMATS[fmt]}")
+            return counts
+        for day in _days(conn):
+            directory = f"{PARTITION_COLUMN}={day if day is not None else NULL_PARTITION}"
+            for export in exports:
+                path = out_dir / export.name / directory / f"part-0{FORMATS[fmt]}"
+                copy(conn, export, path, _DAY_FILTERS[export.name], (day,))
+    return counts
+
+
+def main() -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Export the trade tables to Parquet or Arrow files")
+    parser.add_argument("database", type=Path, help="Path to the trades database")
+    parser.add_argument("output", type=Path, help="Directory receiving the exported files")
+    parser.add_argument(
+        "--format",
+        choices=list(FORMATS),
+        default="parquet",
+        help="File format: parquet or arrow (Arrow IPC)"
+    )
+    parser.add_argument(
+        "--row-group-size",
+        type=int,
+        default=65536,
+        help="Rows read and written at a time (one Parquet row group each)"
+    )
+    parser.add_argument(
+        "--partition-by-day",
+        action="store_true",
+        help="Split the files by log date (Hive layout: <table>/log_date=YYYY-MM-DD/)"
+    )
+    parser.add_argument(
+        "--compression",
+        default="zstd",
+        help="Compression codec: zstd, lz4 or none; parquet also takes snappy, gzip or brotli"
+    )
+    args = parser.parse_args()
+    if not args.database.exists():
+        parser.error(f"Database not found: {args.database}")
+    if args.compression not in CODECS[args.format]:
+        parser.error(f"--format {args.format} takes --compression {', '.join(CODECS[args.format])}")
+    if args.row_group_size < 1:
+        parser.error("--row-group-size must be at least 1")
+
+    started = time.perf_counter()
+    counts = export_database(
+        Database(str(args.database)),
+        args.output,
+        fmt=args.format,
+        row_group_size=args.row_group_size,
+        partition_by_day=args.partition_by_day,
+        compression=args.compression,
+    )
+    size = sum(path.stat().st_size for path in args.output.rglob("*") if path.is_file())
+    for name, rows in counts.items():
+        print(f"📦 {name}: {rows} rows")
+    print(f"💾 Wrote {format_bytes(size)} to {args.output} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Follow a growing trade log, like ``tail -f``.
+
+``LogFollower`` reads only complete lines appended since its last position
+and notices when the file is truncated or replaced (log rotation). Its
+position can be saved as a checkpoint so a restart resumes where it left off.
+"""
+
+import os
+import re
+import time
+from pathlib import Path
+from typing import Callable, Iterator, Optional, Tuple
+
+from src.pipeline import IngestStats, LogLine, MappedLog
+
+DATE_HEADER_PATTERN = re.compile(r'Logging started (\d{4}-\d{2}-\d{2})')
+
+
+class LogFollower:
+    def __init__(
+        self,
+        file_path: Path,
+        offset: int = 0,
+        log_date: Optional[str] = None,
+        poll_interval: float = 1.0,
+        on_idle: Optional[Callable[[], None]] = None,
+    ):
+        """Initialize the follower at a byte offset, which must start a line."""
+        self.file_path = Path(file_path)
+        self.offset = offset
+        self.log_date = log_date
+        self.poll_interval = poll_interval
+        self.on_idle = on_idle
+        self.identity: Optional[Tuple[int, int]] = None
+        self._stopped = False
+
+    @classmethod
+    def from_checkpoint(cls, file_path: Path, checkpoint: Optional[dict], **kwargs) -> "LogFollower":
+        """Resume from a stored checkpoint if it still describes the same file.
+
+        The file is identified by (device, inode), which survives renames, so a
+        log that was rotated while we were stopped is read from the start, as
+        is a file rewritten in place so that the offset no longer starts a
+        line. A checkpoint saved before the first day header was read gets
+        its date from the last header before the offset.
+        """
+        if checkpoint:
+            try:
+                st = os.stat(file_path)
+            except FileNotFoundError:
+                st = None
+            if (
+                st is not None
+                and (st.st_dev, st.st_ino) == (checkpoint["device"], checkpoint["inode"])
+                and st.st_size >= checkpoint["offset"]
+            ):
+                offset = checkpoint["offset"]
+                with MappedLog(file_path) as log:
+                    if log.is_line_start(offset):
+                        log_date = checkpoint["log_date"] or log.log_date_before(offset)
+                        return cls(file_path, offset, log_date, **kwargs)
+        return cls(file_path, **kwargs)
+
+    def stop(self):
+        """Stop following after the current poll."""
+        self._stopped = True
+
+    def lines(self, stats: Optional[IngestStats] = None) -> Iterator[LogLine]:
+        """Yield complete lines as they are appended to the file.
+
+        ``on_idle`` is called each time the follower has caught up with the
+        end of the file, before it sleeps. At that point every line yielded
+        so far has been fully consumed.
+        """
+        if stats is None:
+            stats = IngestStats()
+        f = None
+        pending = b""
+        try:
+            while not self._stopped:
+                if f is None:
+                    f = self._open()
+                    if f is None:
+                        self._idle()
+                        continue
+                chunk = f.read(64 * 1024)
+                if chunk:
+                    stats.bytes_read += len(chunk)
+                    data = pending + chunk
+                    end = data.rfind(b"\n") + 1
+                    pending = data[end:]
+                    for raw in data[:end].splitlines(keepends=True):
+                        self.offset += len(raw)
+                        text = raw.decode("utf-8", errors="replace").strip()
+                        if not text:
+                            continue
+                        match = DATE_HEADER_PATTERN.match(text)
+                        if match:
+                            self.log_date = match.group(1)
+                        stats.lines += 1
+                        yield LogLine(stats.lines, self.offset, text)
+                    continue
+
+                if self._replaced_or_truncated():
+                    f.close()
+                    f = None
+                    pending = b""
+                    continue
+                self._idle()
+        finally:
+            if f is not None:
+                f.close()
+
+    def _open(self):
+        """Open the file at the current offset, or return None if it is missing."""
+        try:
+            f = open(self.file_path, "rb")
+        except FileNotFoundError:
+            return None
+        st = os.fstat(f.fileno())
+        identity = (st.st_dev, st.st_ino)
+        if self.identity is not None and identity != self.identity:
+            self.offset = 0  # rotated: start the new file from the top
+        self.identity = identity
+        f.seek(self.offset)
+        return f
+
+    def _replaced_or_truncated(self) -> bool:
+        """Check whether the path now points at a new file or has shrunk."""
+        try:
+            st = os.stat(self.file_path)
+        except FileNotFoundError:
+            return False  # mid-rotation; keep the old handle until a new file appears
+        if (st.st_dev, st.st_ino) != self.identity:
+            return True
+        if st.st_size < self.offset:
+            self.offset = 0
+            return True
+        return False
+
+    def _idle(self):
+        if self.on_idle is not None:
+            self.on_idle()
+        if not self._stopped:
+            time.sleep(self.poll_interval)
@@ -1,16 +1,58 @@
-import os
-import anthropic
+import asyncio
+from typing import Optional
 from src.config import ANTHROPIC_API_KEY
+from src.parser.claude_client import ClaudeClient as AsyncClaudeClient
+from src.parser.rate_limiter import RateLimiter
+from src.parser.response_cache import ResponseCache
 
 class ClaudeClient:
-    def __init__(self):
+    """Blocking client for the batch LLM fallback.
+
+    Requests go through ``src.parser.claude_client.ClaudeClient`` on a
+    private event loop, so they share its response cache, rate limiter and
+    retry policy: timeouts, 429s and server errors are retried with
+    jittered exponential backoff, honouring Retry-After.
+    """
+
+    def __init__(
+        self,
+        model: str = "claude-3-sonnet-20240229",
+        cache: Optional[ResponseCache] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        **options
+    ):
         self.api_key = ANTHROPIC_API_KEY
-        self.client = anthropic.Anthropic(api_key=self.api_key)
+        if not self.api_key:
+            raise ValueError("ANTHROPIC_API_KEY environment variable is not set")
+        self.model = model
+        self.client = AsyncClaudeClient(
+            api_key=self.api_key, model=model, cache=cache, rate_limiter=rate_limiter, **options
+        )
+        self._loop = asyncio.new_event_loop()
 
-    def complete(self, prompt: str, model: str = "claude-3-sonnet-20240229", max_tokens: int = 1024) -> str:
-        response = self.client.messages.create(
-            model=model,
-            max_tokens=max_tokens,
-            messages=[{"role": "user", "content": prompt}]
+    def complete(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        max_tokens: int = 1024,
+        prefix: Optional[str] = None
+    ) -> str:
+        """Send ``prompt`` and return the reply text.
+
+        A static ``prefix`` (the instructions of a template) goes first,
+        marked for prompt caching, so repeated requests read it from the
+        provider's cache instead of paying for it again. Prefixes below
+        the model's minimum cacheable length are simply sent uncached.
+        """
+        return self._loop.run_until_complete(
+            self.client.complete(prompt, max_tokens=max_tokens, prefix=prefix, model=model)
         )
-        return response.content[0].text if response.content else "" 
\ No newline at end of file
+
+    def close(self):
+        """Close the HTTP connection pool, then the event loop the requests run on."""
+        if self._loop.is_closed():
+            return
+        try:
+            self._loop.run_until_complete(self.client.close())
+        finally:
+            self._loop.close()
@@ -0,0 +1,76 @@
+"""Compiled prompt templates with a cacheable static prefix.
+
+A template is text with ``{{name}}`` placeholders. It is split into literal
+segments and field names once, when it is compiled, and rendering only
+joins strings. Everything before the first placeholder (the instructions
+and glossary) is the same for every request; it is returned separately
+from the per-request suffix so the client can mark it for provider-side
+prompt caching, and both parts carry a token estimate so the static and
+dynamic shares of each request can be reported.
+
+Templates loaded from disk are compiled once per path and reused.
+"""
+
+import functools
+import re
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+from src.parser.rate_limiter import estimate_tokens
+
+_PLACEHOLDER = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+
+
+@dataclass(frozen=True)
+class RenderedPrompt:
+    prefix: str  # static, identical for every request from one template
+    suffix: str  # per-request values and the text after them
+    prefix_tokens: int
+    suffix_tokens: int
+
+    @property
+    def text(self) -> str:
+        return self.prefix + self.suffix
+
+    def token_split(self) -> Dict[str, float]:
+        """Estimated static and dynamic tokens of this prompt."""
+        total = self.prefix_tokens + self.suffix_tokens
+        return {
+            "static_tokens": self.prefix_tokens,
+            "dynamic_tokens": self.suffix_tokens,
+            "static_share": self.prefix_tokens / total if total else 0.0,
+        }
+
+
+class PromptTemplate:
+    """A template split into its static prefix and the segments after it."""
+
+    def __init__(self, text: str):
+        pieces = _PLACEHOLDER.split(text)
+        self.source = text
+        self.prefix = pieces[0]
+        self.prefix_tokens = estimate_tokens(self.prefix)
+        # Alternating field names and the literal text following each
+        self._segments: Tuple[Tuple[str, str], ...] = tuple(zip(pieces[1::2], pieces[2::2]))
+        self.fields = tuple(dict.fromkeys(name for name, _ in self._segments))
+
+    def render(self, **values: str) -> RenderedPrompt:
+        """Fill the placeholders; every field must be given."""
+        missing = [name for name in self.fields if name not in values]
+        if missing:
+            raise KeyError(f"Missing prompt fields: {', '.join(missing)}")
+        suffix = "".join(str(values[name]) + literal for name, literal in self._segments)
+        return RenderedPrompt(self.prefix, suffix, self.prefix_tokens, estimate_tokens(suffix))
+
+
+@functools.lru_cache(maxsize=64)
+def compile_template(text: str) -> PromptTemplate:
+    """Compile ``text``, reusing the result for identical text."""
+    return PromptTemplate(text)
+
+
+@functools.lru_cache(maxsize=16)
+def load_template(prompt_path: str) -> PromptTemplate:
+    """Read and compile a template file once per path."""
+    with open(prompt_path, "r", encoding="utf-8") as f:
+        return compile_template(f.read())
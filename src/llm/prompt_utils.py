@@ -1,12 +1,116 @@
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List, Sequence
+import csv
+import io
 import json
 
+from src.parser.rate_limiter import estimate_tokens
+
+from .prompt_engine import RenderedPrompt, compile_template, load_template
+
+# Columns of a batched answer: the regex already has each line's time,
+# player, server, type and message, so only the item fields come back
+BATCH_COLUMNS = (
+    "line_id", "item_name", "rarity", "quality_level", "weight", "damage",
+    "price_amount", "price_currency", "attributes",
+)
+
+BATCH_INSTRUCTIONS = f"""## Batch Input
+Each input line below starts with a line ID and a `|`. Parse every line and answer with a single CSV block using these columns instead of the ones above:
+{",".join(BATCH_COLUMNS)}
+Write one row per item, starting with the ID of the line it came from. For a line without items, write one row with only its line ID. Do not repeat the timestamp, player, server or message."""
+
 def read_prompt_template(prompt_path: str = "data/prompt.md") -> str:
-    with open(prompt_path, "r", encoding="utf-8") as f:
-        return f.read()
+    # Read and compiled once per path
+    return load_template(prompt_path).source
 
 def format_prompt(template: str, trade_data: Dict) -> str:
-    # Insert trade data as JSON for clarity in the prompt
-    trade_json = json.dumps(trade_data, indent=2)
-    return template.replace("{{trade_data}}", trade_json) 
\ No newline at end of file
+    # Insert trade data as compact JSON; the template is compiled once
+    trade_json = json.dumps(trade_data, separators=(",", ":"), ensure_ascii=False)
+    return compile_template(template).render(trade_data=trade_json).text
+
+def parse_csv_response(text: str, first_column: str = "timestamp") -> List[Dict[str, str]]:
+    """Parse the CSV block of a response into one dict per row.
+
+    Code fences and any prose before the header row (the line starting
+    with ``first_column``) are ignored.
+    """
+    lines = [line for line in text.strip().splitlines() if not line.startswith("```")]
+    for start, line in enumerate(lines):
+        if line == first_column or line.startswith(first_column + ","):
+            break
+    else:
+        return []
+    reader = csv.DictReader(io.StringIO("\n".join(lines[start:])))
+    return [
+        {key: (value or "").strip() for key, value in row.items() if key is not None}
+        for row in reader
+        if any(row.values())
+    ]
+
+class BatchPromptBuilder:
+    """Packs many log lines into one prompt within a token budget.
+
+    The instructions are paid for once per request instead of once per
+    line. A prompt holds as many lines as keep the whole request under
+    ``token_budget`` input tokens and the expected answer (about
+    ``output_tokens_per_line`` each) under ``max_output_tokens``.
+    """
+
+    def __init__(
+        self,
+        template: str,
+        token_budget: int = 8000,
+        max_output_tokens: int = 4096,
+        output_tokens_per_line: int = 40
+    ):
+        # The instructions form the static prefix, cacheable once it
+        # reaches the model's minimum length; only the lines change
+        # between requests
+        self.template = compile_template(
+            f"{template.rstrip()}\n\n{BATCH_INSTRUCTIONS}\n\nInput:\n```\n{{{{lines}}}}\n```\n\nOutput:\n"
+        )
+        self.prefix_tokens = self.template.prefix_tokens
+        self.token_budget = token_budget
+        self.max_output_tokens = max_output_tokens
+        self.output_tokens_per_line = output_tokens_per_line
+        self.max_lines = max(1, max_output_tokens // output_tokens_per_line)
+
+    def pack(self, lines: Sequence[str]) -> int:
+        """Return how many leading ``lines`` fit in one prompt (at least one)."""
+        tokens = self.prefix_tokens
+        count = 0
+        for line in lines[:self.max_lines]:
+            tokens += estimate_tokens(line) + 2  # line ID and separator
+            if count and tokens > self.token_budget:
+                break
+            count += 1
+        return max(1, count)
+
+    def render(self, lines: Sequence[str]) -> RenderedPrompt:
+        """Prompt for ``lines``, tagged with line IDs 1..n."""
+        body = "\n".join(f"{line_id}|{line}" for line_id, line in enumerate(lines, 1))
+        return self.template.render(lines=body)
+
+    def build(self, lines: Sequence[str]) -> str:
+        """Prompt text for ``lines``."""
+        return self.render(lines).text
+
+def parse_batch_response(text: str, count: int) -> Dict[int, List[Dict[str, str]]]:
+    """Split a batched CSV answer into item rows per line ID.
+
+    Lines answered with an ID-only row map to an empty list; lines missing
+    from the answer, and rows with IDs outside 1..``count``, are left out.
+    """
+    results: Dict[int, List[Dict[str, str]]] = {}
+    for row in parse_csv_response(text, first_column="line_id"):
+        try:
+            line_id = int(row.get("line_id", ""))
+        except ValueError:
+            continue
+        if not 1 <= line_id <= count:
+            continue
+        rows = results.setdefault(line_id, [])
+        if row.get("item_name"):
+            rows.append(row)
+    return results
@@ -0,0 +1,368 @@
+"""Hybrid parsing: the regex parser first, the LLM only where it falls short.
+
+``TradeParser`` handles a line in microseconds, the LLM takes seconds, and
+most lines are fully understood by the regex. ``ConfidenceScorer`` rates
+how complete a regex result is:
+
+- unparsed_link: a bracketed item link the item pattern did not match
+- unconsumed_attributes: text left in an item's enchant tail after the
+  attributes and valueless flags (runes such as ``RStV``, ``MD``) are taken
+- price_without_item / ql_without_item: a plain-text ad that names a price
+  or QL, so it sells something the regex cannot see
+- ambiguous_price: one price for several items
+
+``HybridRouter`` passes confident results straight through and sends the
+rest to ``LLMResolver`` in batches; the LLM's items and price are merged
+into the same trade dict, so both paths end up in the same tables.
+"""
+
+import logging
+import random
+import re
+import time
+from collections import Counter, OrderedDict, deque
+from dataclasses import dataclass
+from itertools import islice
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from src.metrics import METRICS
+from src.parser.rate_limiter import min_cacheable_tokens
+from src.parser.trade_parser import Currency, Rarity, Trade, TradeParser
+from src.pipeline import ParsedTrade
+
+from .prompt_utils import BatchPromptBuilder, parse_batch_response, read_prompt_template
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD = 0.5
+
+PENALTIES = {
+    "unparsed_link": 0.6,
+    "unconsumed_attributes": 0.6,
+    "price_without_item": 0.6,
+    "ql_without_item": 0.6,
+    "ambiguous_price": 0.2,
+}
+
+# An opening bracket that is not a [n/m] fragment marker
+_OPEN_BRACKET = re.compile(r'\[(?!\d+/\d+\])')
+# Enchants and runes that carry no value, e.g. "MD" or "RStV"
+_FLAG = re.compile(r'[A-Z][A-Za-z]{1,4}')
+_SEPARATORS = re.compile(r'[\s•,;|/+&-]+')
+_QL_MENTION = re.compile(r'\d+\s*\+?\s*ql\b|\bql\s*:?\s*\d+', re.IGNORECASE)
+_URL = re.compile(r'https?://\S+')
+_WORD = re.compile(r'[A-Za-z]{3,}')
+_LLM_ATTRIBUTE = re.compile(r'([A-Za-z][\w ]*?)\s*:\s*([^\s;|,]+)')
+
+# Words that do not name anything for sale; a price among only these is a
+# reply in a conversation ("maybe 5s at most tbh"), not an ad
+CHAT_WORDS = frozenset("""
+    the and for each per maybe most tbh with you your have any can will just
+    also some more than that this are not but from pst offers offer price
+    prices pay buy sell sold selling buying want need looking all
+""".split())
+
+_RARITIES = {r.value for r in Rarity}
+_CURRENCIES = {c.value for c in Currency}
+
+
+@dataclass(frozen=True)
+class Confidence:
+    score: float
+    reasons: Tuple[str, ...] = ()
+
+
+class ConfidenceScorer:
+    """Rates how completely ``TradeParser`` understood a line."""
+
+    def __init__(self, parser: TradeParser):
+        self.token_pattern = parser.token_pattern
+        self.attribute_pattern = parser.attribute_pattern
+
+    def score(self, trade: Trade) -> Confidence:
+        message = trade.message
+        reasons = []
+        if '[' in message:
+            if len(_OPEN_BRACKET.findall(message)) > len(trade.items):
+                reasons.append("unparsed_link")
+            if any(self._leftover(tail) for tail in self._tails(message)):
+                reasons.append("unconsumed_attributes")
+        if not trade.items:
+            if self._names_something(message):
+                if trade.price_amount is not None:
+                    reasons.append("price_without_item")
+                if _QL_MENTION.search(message):
+                    reasons.append("ql_without_item")
+        elif len(trade.items) > 1 and trade.price_amount is not None:
+            reasons.append("ambiguous_price")
+        score = 1.0 - sum(PENALTIES[reason] for reason in reasons)
+        return Confidence(max(0.0, score), tuple(reasons))
+
+    def _tails(self, message: str) -> Iterator[str]:
+        for match in self.token_pattern.finditer(message):
+            tail = match.group('tail')
+            if tail and not tail.isspace():
+                yield tail
+
+    def _leftover(self, tail: str) -> bool:
+        rest = self.attribute_pattern.sub(' ', tail)
+        return any(
+            word and not _FLAG.fullmatch(word) for word in _SEPARATORS.split(rest)
+        )
+
+    @staticmethod
+    def _names_something(message: str) -> bool:
+        text = _URL.sub(' ', message)
+        return any(word.lower() not in CHAT_WORDS for word in _WORD.findall(text))
+
+
+def format_log_line(trade: Trade) -> str:
+    """Rebuild the chat line a trade was parsed from."""
+    return (
+        f"[{trade.timestamp}] <{trade.player_name}> ({trade.server}) "
+        f"{trade.trade_type.value} {trade.message}"
+    )
+
+
+def _number(value: str) -> Optional[float]:
+    try:
+        return float(value.rstrip('+')) if value else None
+    except ValueError:
+        return None
+
+
+def merge_llm_rows(data: Dict, rows: List[Dict[str, str]]) -> Dict:
+    """Merge the LLM's item rows for a line into the regex result.
+
+    Line identity (date, time, player, server, type, message) always comes
+    from the regex. The LLM's items replace the regex items when it found
+    any; its price is used when the regex found none.
+    """
+    merged = dict(data)
+    items = []
+    for row in rows:
+        name = row.get('item_name', '')
+        if not name:
+            continue
+        rarity = row.get('rarity', '').lower()
+        items.append({
+            "name": name,
+            "rarity": rarity if rarity in _RARITIES else Rarity.COMMON.value,
+            "quality_level": _number(row.get('quality_level', '')),
+            "weight": _number(row.get('weight', '')),
+            "damage": _number(row.get('damage', '')),
+            "attributes": [
+                {"name": attr_name.strip(), "value": attr_value}
+                for attr_name, attr_value in _LLM_ATTRIBUTE.findall(row.get('attributes', ''))
+            ],
+            "fragment": None,
+        })
+    if items:
+        merged["items"] = items
+    if merged.get("price_amount") is None:
+        for row in rows:
+            amount = _number(row.get('price_amount', ''))
+            currency = row.get('price_currency', '').lower()
+            if amount is not None and currency in _CURRENCIES:
+                merged["price_amount"] = amount
+                merged["price_currency"] = currency
+                break
+    merged["parsed_by"] = "llm"
+    return merged
+
+
+class LLMResolver:
+    """Parses log lines with the LLM, many per request.
+
+    Lines are packed into prompts built from the ``data/prompt.md``
+    instructions by ``BatchPromptBuilder`` and tagged with line IDs; the
+    CSV answer is split back per line. Lines missing from an answer (or in
+    a request that failed) are queued again, up to ``max_attempts`` times;
+    after a failed request the next one waits with jittered exponential
+    backoff (``backoff_base`` doubling up to ``backoff_max`` seconds).
+
+    ``client`` is anything with a ``complete(prompt, max_tokens=...,
+    prefix=...)`` method returning text, such as
+    ``src.llm.claude_client.ClaudeClient``, which adds the response cache,
+    rate limits and per-request retries; the instructions are passed as
+    the ``prefix``, cached by the provider when they reach the model's
+    minimum cacheable length, and the tagged lines as ``prompt``. Results
+    are remembered by message, since reposted ads repeat verbatim, for the
+    ``max_answers`` most recently used messages.
+    """
+
+    def __init__(
+        self,
+        client,
+        template: Optional[str] = None,
+        token_budget: int = 8000,
+        max_tokens: int = 4096,
+        max_attempts: int = 3,
+        max_answers: int = 10000,
+        backoff_base: float = 1.0,
+        backoff_max: float = 30.0,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        if max_answers < 1:
+            raise ValueError("max_answers must be at least 1")
+        self.client = client
+        self.builder = BatchPromptBuilder(
+            template if template is not None else read_prompt_template(),
+            token_budget=token_budget,
+            max_output_tokens=max_tokens,
+        )
+        self.max_tokens = max_tokens
+        self.max_attempts = max_attempts
+        self.max_answers = max_answers
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._sleep = sleep
+        self.calls = 0
+        self.requeued = 0
+        # Estimated prompt tokens sent: the repeated instructions, the part of
+        # them long enough for the client's model to cache, and the lines
+        self.min_cache_tokens = min_cacheable_tokens(getattr(client, "model", None))
+        self.static_tokens = 0
+        self.cacheable_tokens = 0
+        self.dynamic_tokens = 0
+        # message -> item rows, least recently used first
+        self._answers: "OrderedDict[str, List[Dict[str, str]]]" = OrderedDict()
+
+    def resolve(self, trade: Trade) -> Optional[List[Dict[str, str]]]:
+        """Return the LLM's item rows for ``trade``, or None if it gave none."""
+        return self.resolve_many([trade])[0]
+
+    def resolve_many(self, trades: Sequence[Trade]) -> List[Optional[List[Dict[str, str]]]]:
+        """Item rows for each of ``trades``, in order; None where unresolved."""
+        queue: Deque[Tuple[str, str]] = deque()
+        queued = set()
+        answers: Dict[str, List[Dict[str, str]]] = {}
+        for trade in trades:
+            if trade.message in answers or trade.message in queued:
+                continue
+            known = self._answers.get(trade.message)
+            if known is not None:
+                self._answers.move_to_end(trade.message)
+                answers[trade.message] = known
+            else:
+                queued.add(trade.message)
+                queue.append((trade.message, format_log_line(trade)))
+
+        attempts: Counter = Counter()
+        failures = 0
+        while queue:
+            if failures:
+                self._backoff(failures)
+            count = self.builder.pack([line for _, line in islice(queue, self.builder.max_lines)])
+            batch = [queue.popleft() for _ in range(count)]
+            prompt = self.builder.render([line for _, line in batch])
+            self.calls += 1
+            self.static_tokens += prompt.prefix_tokens
+            if prompt.prefix_tokens >= self.min_cache_tokens:
+                self.cacheable_tokens += prompt.prefix_tokens
+            self.dynamic_tokens += prompt.suffix_tokens
+            METRICS.incr("router.llm_calls")
+            METRICS.incr("llm.prompt_static_tokens", prompt.prefix_tokens)
+            METRICS.incr("llm.prompt_dynamic_tokens", prompt.suffix_tokens)
+            try:
+                text = self.client.complete(
+                    prompt.suffix, max_tokens=self.max_tokens, prefix=prompt.prefix
+                )
+                results = parse_batch_response(text, len(batch))
+            except Exception as e:
+                logger.warning(f"LLM batch of {len(batch)} lines failed: {e}")
+                results = None
+            failures = failures + 1 if results is None else 0
+            for line_id, (message, line) in enumerate(batch, 1):
+                if results and line_id in results:
+                    self._remember(message, results[line_id])
+                    answers[message] = results[line_id]
+                    continue
+                attempts[message] += 1
+                if attempts[message] < self.max_attempts:
+                    self.requeued += 1
+                    METRICS.incr("router.llm_requeued")
+                    queue.append((message, line))
+        return [answers.get(trade.message) for trade in trades]
+
+    def _remember(self, message: str, rows: List[Dict[str, str]]):
+        self._answers[message] = rows
+        self._answers.move_to_end(message)
+        if len(self._answers) > self.max_answers:
+            self._answers.popitem(last=False)
+
+    def _backoff(self, failures: int):
+        """Wait before the request following ``failures`` failed ones in a row."""
+        ceiling = min(self.backoff_max, self.backoff_base * 2 ** (failures - 1))
+        delay = ceiling / 2 + random.uniform(0, ceiling / 2)
+        METRICS.observe("router.llm_backoff", delay)
+        self._sleep(delay)
+
+
+class HybridRouter:
+    """Sends low-confidence regex results to the LLM and merges the answers.
+
+    Uncertain records are held back until ``batch_lines`` of them are
+    waiting (or the input ends) and then resolved together. Records come
+    out in input order, so confident records read after an uncertain one
+    wait with it. Use ``batch_lines=1`` where each line must be stored
+    promptly, as when following a live log.
+    """
+
+    def __init__(
+        self,
+        parser: TradeParser,
+        resolver: Optional[LLMResolver] = None,
+        threshold: float = DEFAULT_THRESHOLD,
+        batch_lines: int = 100,
+    ):
+        if batch_lines < 1:
+            raise ValueError("batch_lines must be at least 1")
+        self.scorer = ConfidenceScorer(parser)
+        self.resolver = resolver
+        self.threshold = threshold
+        self.batch_lines = batch_lines
+        self.regex_lines = 0
+        self.llm_lines = 0
+        self.llm_errors = 0
+
+    def route(self, records: Iterable[ParsedTrade]) -> Iterator[ParsedTrade]:
+        """Yield every record, with LLM results merged into uncertain ones.
+
+        Without a resolver, uncertain records pass through unchanged and are
+        only counted, which shows what a run with the LLM would cost.
+        """
+        # Records since the first unresolved one, and the positions of those to resolve
+        held: List[ParsedTrade] = []
+        pending: List[int] = []
+        for record in records:
+            confidence = self.scorer.score(record.trade)
+            if confidence.score >= self.threshold:
+                self.regex_lines += 1
+                METRICS.incr("router.regex")
+            else:
+                self.llm_lines += 1
+                METRICS.incr("router.llm")
+                if self.resolver is not None:
+                    pending.append(len(held))
+            if not pending:
+                yield record
+                continue
+            held.append(record)
+            if len(pending) >= self.batch_lines:
+                yield from self._resolve(held, pending)
+                held, pending = [], []
+        if pending:
+            yield from self._resolve(held, pending)
+
+    def _resolve(self, held: List[ParsedTrade], pending: List[int]) -> List[ParsedTrade]:
+        answers = self.resolver.resolve_many([held[i].trade for i in pending])
+        for i, rows in zip(pending, answers):
+            record = held[i]
+            if rows is None:
+                self.llm_errors += 1
+                METRICS.incr("router.llm_errors")
+                logger.warning(f"LLM gave no result for line {record.line_no}, keeping regex result")
+            else:
+                held[i] = record._replace(data=merge_llm_rows(record.data, rows))
+        return held
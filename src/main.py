@@ -1,90 +1,295 @@
 import argparse
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, List
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
 
-from src.database.database import init_db, get_db, add_trade
+from src.compression import detect_compression
+from src.database.database import init_db, get_db
 from src.parser.trade_parser import TradeParser, FilterMode
+from src.follow import LogFollower
+from src.llm.router import DEFAULT_THRESHOLD, HybridRouter, LLMResolver
+from src.metrics import FORMATS, METRICS
+from src.pipeline import IngestStats, ParsedTrade, parse_lines, stream_trades, stream_trades_parallel
+from src.reporting import MODES, ProgressReporter, Reporter, make_reporter
+from src.scheduler import FileJob, expand_inputs, file_digest, parse_files, plan_files
 
 
-def process_file(file_path: Path, date: Optional[datetime] = None, filter_mode: FilterMode = FilterMode.ALL) -> None:
-    """Process a trade log file and store the data in the database."""
-    parser = TradeParser(filter_mode=filter_mode)
-    
-    print(f"📂 Reading {file_path}")
-    print(f"🔍 Filter mode: {filter_mode.value}")
-    
-    with open(file_path, "r", encoding="utf-8") as f:
-        lines = [line.strip() for line in f if line.strip()]
-    
-    total_lines = len(lines)
-    print(f"📊 Found {total_lines} lines")
-    
-    trades_processed = 0
-    trades_stored = 0
-    errors = 0
+def process_file(
+    file_path: Path,
+    date: Optional[datetime] = None,
+    filter_mode: FilterMode = FilterMode.ALL,
+    batch_size: int = 500,
+    queue_size: int = 1024,
+    workers: int = 1,
+    reporter: Optional[Reporter] = None,
+    llm_resolver: Optional[LLMResolver] = None,
+    llm_threshold: float = DEFAULT_THRESHOLD,
+) -> int:
+    """Process a trade log file and store the data in the database.
+
+    The file is streamed through the ingestion pipeline, so memory use does
+    not grow with the size of the log. With ``workers`` > 1 the file is
+    split on day boundaries and parsed in a process pool.
+
+    Compressed logs (gzip, xz, zstd, bzip2, recognised by their magic
+    bytes) are decompressed as they are read; they cannot be split, so they
+    are parsed in one process whatever ``workers`` says.
+
+    ``date`` is used for trades that appear before the first
+    ``Logging started`` line. Lines that were stored before are skipped.
+    Output goes through ``reporter`` (periodic progress by default); a
+    reporter passed in is left open, so it can cover several files.
+
+    With an ``llm_resolver``, lines the regex parser scores below
+    ``llm_threshold`` are parsed by the LLM as well (see ``src.llm.router``).
+
+    Returns the number of trades stored.
+    """
+    owns_reporter = reporter is None
+    if owns_reporter:
+        reporter = ProgressReporter()
+    log_date = date.strftime("%Y-%m-%d") if date else None
+    parser = TradeParser(filter_mode=filter_mode, log_date=log_date)
+    _instrument_parser(parser)
+    stats = IngestStats()
+    compression = detect_compression(file_path)
+    if compression is not None:
+        workers = 1
     
-    for i, line in enumerate(lines, 1):
-        if i % 100 == 0:
-            print(f"🔄 Processing line {i}/{total_lines}")
-        
+    if workers > 1:
+        records = stream_trades_parallel(
+            file_path, workers, filter_mode, stats, log_date=log_date, on_error=reporter.error
+        )
+    else:
+        records = stream_trades(file_path, parser, stats, queue_size=queue_size, on_error=reporter.error)
+    notes = []
+    if workers > 1:
+        notes.append(f"⚙️  Workers: {workers}")
+    if compression is not None:
+        notes.append(f"🗜️  Decompressing {compression} while parsing")
+    try:
+        return _store(
+            file_path, records, parser, stats, filter_mode, batch_size, reporter,
+            llm_resolver, llm_threshold, notes,
+        )
+    finally:
+        if owns_reporter:
+            reporter.close()
+
+
+def _store(
+    file_path: Path,
+    records: Iterable[ParsedTrade],
+    parser: TradeParser,
+    stats: IngestStats,
+    filter_mode: FilterMode,
+    batch_size: int,
+    reporter: Reporter,
+    llm_resolver: Optional[LLMResolver],
+    llm_threshold: float,
+    notes: Sequence[str] = (),
+) -> int:
+    """Write one file's parsed trades, reporting as they go; return rows stored."""
+    writer = get_db().writer(batch_size=batch_size)
+    router = None
+    if llm_resolver is not None:
+        router = HybridRouter(parser, llm_resolver, threshold=llm_threshold)
+        records = router.route(records)
+    reporter.start(file_path, filter_mode.value, stats)
+    for note in notes:
+        reporter.write(note)
+
+    with writer:
+        for record in records:
+            writer.add(record.data)
+            reporter.trade(record, stats)
+    if router is not None:
+        reporter.write(
+            f"🤖 LLM fallback: {router.llm_lines} of {router.llm_lines + router.regex_lines} trades, "
+            f"{llm_resolver.calls} API calls, {router.llm_errors} errors"
+        )
+        if llm_resolver.cacheable_tokens:
+            cacheable = f"~{llm_resolver.cacheable_tokens:,} cacheable"
+        else:
+            cacheable = f"below the {llm_resolver.min_cache_tokens:,}-token cache minimum"
+        reporter.write(
+            f"🧾 Prompt tokens: ~{llm_resolver.static_tokens:,} static ({cacheable}), "
+            f"~{llm_resolver.dynamic_tokens:,} per-request"
+        )
+    reporter.finish(stats, writer.rows_written, writer.rows_skipped, writer.rows_detached)
+    return writer.rows_written
+
+
+def process_files(
+    paths: Sequence[Path],
+    date: Optional[datetime] = None,
+    filter_mode: FilterMode = FilterMode.ALL,
+    batch_size: int = 500,
+    workers: int = 1,
+    reporter: Optional[Reporter] = None,
+    llm_resolver: Optional[LLMResolver] = None,
+    llm_threshold: float = DEFAULT_THRESHOLD,
+    force: bool = False,
+) -> Dict[str, int]:
+    """Ingest many log files, skipping those the manifest shows unchanged.
+
+    Each file's state is kept in the ``ingested_files`` manifest (see
+    ``src.scheduler``): it is marked running before its first trade is
+    written and done once all are, so an interrupted run resumes with the
+    files it had not finished. With ``workers`` > 1 and several files to
+    read, the day shards of all files are parsed in one process pool and
+    stored here, by one writer, in order.
+
+    Returns how many files were ingested, skipped as unchanged and failed.
+    """
+    owns_reporter = reporter is None
+    if owns_reporter:
+        reporter = ProgressReporter()
+    db = get_db()
+    jobs, unchanged = plan_files(db, paths, force=force)
+    for path in unchanged:
+        reporter.write(f"⏭️  Unchanged since the last run, skipping {path}")
+    counts = {"ingested": 0, "skipped": len(unchanged), "failed": 0}
+    log_date = date.strftime("%Y-%m-%d") if date else None
+
+    def fail(job: FileJob, content_hash: Optional[str], action: str, error: str):
+        db.save_manifest_entry(job.key, job.size, job.mtime, content_hash, "failed", error=error)
+        reporter.write(f"❌ Failed to {action} {job.path}: {error}")
+        counts["failed"] += 1
+
+    def ingest(job: FileJob, content_hash: str, store: Callable[[], int]):
+        db.save_manifest_entry(job.key, job.size, job.mtime, content_hash, "running")
         try:
-            trade = parser.parse_line(line)
-            if trade:
-                trades_processed += 1
-                trade_dict = parser.to_dict(trade)
-                add_trade(trade_dict)
-                trades_stored += 1
-                
-                # Log the processed trade
-                print(f"\n📝 Trade #{trades_processed}:")
-                print(f"   ⏰ {trade.timestamp}")
-                print(f"   👤 {trade.player_name} ({trade.server})")
-                print(f"   🏷️  {trade.trade_type.value}")
-                
-                if trade.items:
-                    print("   📦 Items:")
-                    for item in trade.items:
-                        item_str = f"      • {item.name}"
-                        if item.rarity != "common":
-                            item_str += f" [{item.rarity}]"
-                        if item.quality_level:
-                            item_str += f" QL:{item.quality_level}"
-                        if item.damage:
-                            item_str += f" DMG:{item.damage}"
-                        if item.weight:
-                            item_str += f" WT:{item.weight}"
-                        if item.fragment:
-                            item_str += f" {item.fragment}"
-                        print(item_str)
-                        if item.attributes:
-                            for attr in item.attributes:
-                                print(f"        - {attr.name}: {attr.value}")
-                
-                if trade.price_amount and trade.price_currency:
-                    print(f"   💰 Price: {trade.price_amount} {trade.price_currency.value}")
-                
-                print("   📄 Message:", trade.message)
-                print("   " + "─" * 50)
-                
+            rows = store()
         except Exception as e:
-            errors += 1
-            print(f"❌ Error on line {i}: {str(e)}")
-            continue
-    
-    # Print summary
-    print("\n=== Summary ===")
-    print(f"📊 Total lines: {total_lines}")
-    print(f"📝 Trades processed: {trades_processed}")
-    print(f"💾 Trades stored: {trades_stored}")
-    print(f"❌ Errors: {errors}")
-    print("==============\n")
+            fail(job, content_hash, "ingest", str(e))
+            return
+        db.save_manifest_entry(job.key, job.size, job.mtime, content_hash, "done", rows)
+        counts["ingested"] += 1
+
+    try:
+        if workers > 1 and len(jobs) > 1:
+            parser = TradeParser(filter_mode=filter_mode, log_date=log_date)
+            reporter.write(f"⚙️  Parsing {len(jobs)} files in {workers} processes")
+            for parsed in parse_files(jobs, workers, filter_mode, log_date):
+                job = parsed.job
+                if parsed.error is not None:
+                    fail(job, None, "read", parsed.error)
+                    continue
+                ingest(job, parsed.content_hash, lambda: _store(
+                    job.path, parsed.records, parser, parsed.stats, filter_mode, batch_size,
+                    reporter, llm_resolver, llm_threshold,
+                ))
+                for line_no, message in parsed.errors:
+                    reporter.error(line_no, message, job.path)
+        else:
+            for job in jobs:
+                # A file that vanished or cannot be read since planning fails on its own
+                try:
+                    content_hash = file_digest(job.path)
+                except OSError as e:
+                    fail(job, None, "read", f"{type(e).__name__}: {e}")
+                    continue
+                ingest(job, content_hash, lambda: process_file(
+                    job.path, date, filter_mode, batch_size=batch_size, workers=workers,
+                    reporter=reporter, llm_resolver=llm_resolver, llm_threshold=llm_threshold,
+                ))
+        if len(paths) > 1:
+            reporter.write(
+                f"🗂️  Files: {counts['ingested']} ingested, {counts['skipped']} unchanged, "
+                f"{counts['failed']} failed"
+            )
+    finally:
+        if owns_reporter:
+            reporter.close()
+    return counts
+
+
+def follow_file(
+    file_path: Path,
+    filter_mode: FilterMode = FilterMode.ALL,
+    batch_size: int = 500,
+    poll_interval: float = 1.0,
+    reporter: Optional[Reporter] = None,
+    llm_resolver: Optional[LLMResolver] = None,
+    llm_threshold: float = DEFAULT_THRESHOLD,
+) -> None:
+    """Tail a growing trade log and store trades as they are appended.
+
+    The read position is checkpointed in the database whenever a batch is
+    written and whenever the follower catches up, so a restart resumes from
+    the last stored line instead of re-reading the file. As in
+    ``process_file``, a reporter passed in is left open.
+    """
+    owns_reporter = reporter is None
+    if owns_reporter:
+        reporter = ProgressReporter()
+    db = get_db()
+    parser = TradeParser(filter_mode=filter_mode)
+    _instrument_parser(parser)
+    writer = db.writer(batch_size=batch_size)
+    stats = IngestStats()
+    path_key = str(Path(file_path).resolve())
+
+    def save_checkpoint():
+        if follower.identity is None:
+            return
+        device, inode = follower.identity
+        db.save_checkpoint(path_key, device, inode, follower.offset, follower.log_date)
+
+    def on_idle():
+        writer.flush()
+        save_checkpoint()
+
+    follower = LogFollower.from_checkpoint(
+        file_path,
+        db.get_checkpoint(path_key),
+        poll_interval=poll_interval,
+        on_idle=on_idle,
+    )
+    parser.log_date = follower.log_date
+    reporter.write(f"👀 Following {file_path} from byte {follower.offset}")
+    reporter.start(file_path, filter_mode.value, stats)
+
+    records = parse_lines(follower.lines(stats), parser, stats, reporter.error)
+    if llm_resolver is not None:
+        # Resolve each line as it arrives rather than waiting for a batch
+        router = HybridRouter(parser, llm_resolver, threshold=llm_threshold, batch_lines=1)
+        records = router.route(records)
+
+    try:
+        with writer:
+            for record in records:
+                rows_before = writer.rows_written
+                writer.add(record.data)
+                if writer.rows_written != rows_before:
+                    save_checkpoint()
+                reporter.trade(record, stats)
+    except KeyboardInterrupt:
+        reporter.write(f"\n⏹️  Stopped at byte {follower.offset}")
+
+    try:
+        reporter.finish(stats, writer.rows_written, writer.rows_skipped, writer.rows_detached)
+    finally:
+        if owns_reporter:
+            reporter.close()
+
+
+def _instrument_parser(parser: TradeParser) -> None:
+    """Time the parser stages when stats are enabled (no-op otherwise)."""
+    METRICS.instrument(parser, "parse_line", "parser.parse_line")
+    METRICS.instrument(parser, "_scan_message", "parser.scan_message")
+    METRICS.instrument(parser, "to_dict", "parser.to_dict")
 
 
 def main() -> None:
     """Main entry point for the trade data processor."""
     parser = argparse.ArgumentParser(description="Process trade log files")
-    parser.add_argument("file", type=Path, help="Path to the trade log file")
+    parser.add_argument(
+        "files",
+        nargs="+",
+        help="Trade log files, directories or glob patterns; files may be compressed (gzip, xz, zstd, bzip2)"
+    )
     parser.add_argument(
         "--date",
         type=lambda s: datetime.strptime(s, "%Y-%m-%d"),
@@ -97,13 +302,154 @@ def main() -> None:
         default=FilterMode.ALL.value,
         help="Filter mode: all, items_only, or no_items"
     )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=500,
+        help="Number of trades written per database transaction"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of parser processes (parses several files at once, or splits one file on day boundaries)"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Read files again even if the manifest shows them unchanged since the last run"
+    )
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="Keep watching the file and ingest lines as they are appended"
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=1.0,
+        help="Seconds between checks for new data in --follow mode"
+    )
+    parser.add_argument(
+        "--output",
+        choices=MODES,
+        default="progress",
+        help="Output mode: quiet, progress, verbose (every Nth trade) or jsonl (trades to --output-file)"
+    )
+    parser.add_argument(
+        "--sample-every",
+        type=int,
+        default=100,
+        help="Show every Nth trade in verbose mode (1 shows all)"
+    )
+    parser.add_argument(
+        "--output-file",
+        type=Path,
+        help="File receiving one JSON line per trade in jsonl mode"
+    )
+    parser.add_argument(
+        "--llm-fallback",
+        action="store_true",
+        help="Also parse lines the regex parser cannot fully resolve with the LLM (needs ANTHROPIC_API_KEY)"
+    )
+    parser.add_argument(
+        "--llm-threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Confidence below which a line goes to the LLM (0-1)"
+    )
+    parser.add_argument(
+        "--llm-batch-tokens",
+        type=int,
+        default=8000,
+        help="Input token budget of one LLM request; lines are packed into it"
+    )
+    parser.add_argument(
+        "--llm-cache",
+        type=Path,
+        default=Path("data/llm_cache"),
+        help="Directory caching LLM answers across runs"
+    )
+    parser.add_argument(
+        "--llm-requests-per-minute",
+        type=float,
+        default=50,
+        help="Client-side limit on LLM requests per minute"
+    )
+    parser.add_argument(
+        "--llm-tokens-per-minute",
+        type=float,
+        default=80000,
+        help="Client-side limit on LLM input tokens per minute"
+    )
+    parser.add_argument(
+        "--stats",
+        choices=FORMATS,
+        help="Print per-stage timings and counters at the end, as json or prometheus text"
+    )
     args = parser.parse_args()
+    if args.output == "jsonl" and args.output_file is None:
+        parser.error("--output jsonl requires --output-file")
+    if args.sample_every < 1:
+        parser.error("--sample-every must be at least 1")
+    try:
+        paths = expand_inputs(args.files)
+    except FileNotFoundError as e:
+        parser.error(str(e))
+    if args.follow and (len(paths) > 1 or detect_compression(paths[0])):
+        parser.error("--follow takes a single uncompressed log file")
+    llm_resolver = None
+    if args.llm_fallback:
+        from src.llm.claude_client import ClaudeClient
+        from src.parser.rate_limiter import RateLimiter
+        from src.parser.response_cache import ResponseCache
+
+        try:
+            client = ClaudeClient(
+                cache=ResponseCache(args.llm_cache),
+                rate_limiter=RateLimiter(args.llm_requests_per_minute, args.llm_tokens_per_minute),
+            )
+        except ValueError as e:
+            parser.error(str(e))
+        llm_resolver = LLMResolver(client, token_budget=args.llm_batch_tokens)
+    reporter = make_reporter(args.output, every=args.sample_every, path=args.output_file)
+
+    if args.stats:
+        METRICS.enable()
 
     # Initialize database
     init_db()
 
-    # Process file
-    process_file(args.file, args.date, FilterMode(args.filter))
+    try:
+        if args.follow:
+            follow_file(
+                paths[0],
+                FilterMode(args.filter),
+                batch_size=args.batch_size,
+                poll_interval=args.poll_interval,
+                reporter=reporter,
+                llm_resolver=llm_resolver,
+                llm_threshold=args.llm_threshold,
+            )
+        else:
+            process_files(
+                paths,
+                args.date,
+                FilterMode(args.filter),
+                batch_size=args.batch_size,
+                workers=args.workers,
+                reporter=reporter,
+                llm_resolver=llm_resolver,
+                llm_threshold=args.llm_threshold,
+                force=args.force,
+            )
+    finally:
+        reporter.close()
+        if llm_resolver is not None:
+            llm_resolver.client.close()
+
+    if args.stats:
+        print(METRICS.render(args.stats))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,219 @@
+"""Lightweight instrumentation: per-stage timers, counters and histograms.
+
+Everything goes through the module-level ``METRICS`` registry, which is
+disabled by default. While disabled, ``incr`` and ``observe`` return at
+once, ``timer`` hands back a shared no-op context manager, and hot loops
+check ``METRICS.enabled`` once before they start; per-line methods are only
+wrapped with timers by ``instrument`` after the registry is enabled, so the
+parser runs unmodified otherwise.
+
+Stage timers record every duration into a latency histogram, so each stage
+reports its call count, cumulative and mean time, maximum and bucket counts.
+Snapshots render as JSON or as Prometheus text exposition.
+"""
+
+import functools
+import json
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# Upper bounds in seconds, from a microsecond (one regex match) up to
+# seconds (an LLM request)
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    1e-6, 5e-6, 1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0,
+)
+
+FORMATS = ("json", "prometheus")
+
+
+class Histogram:
+    """Cumulative latency distribution over fixed bucket bounds."""
+
+    def __init__(self, bounds: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last bucket is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(upper bound, observations at or below it) pairs, Prometheus style."""
+        running = 0
+        buckets = []
+        for bound, count in zip(list(self.bounds) + [float("inf")], self.counts):
+            running += count
+            buckets.append(("+Inf" if bound == float("inf") else repr(bound), running))
+        return buckets
+
+
+class _Timer:
+    __slots__ = ("metrics", "stage", "start")
+
+    def __init__(self, metrics: "Metrics", stage: str):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.metrics.observe(self.stage, time.perf_counter() - self.start)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return None
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Metrics:
+    """Registry of named counters and stage latency histograms."""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.counters: Dict[str, int] = {}
+        self.stages: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.stages = {}
+
+    def incr(self, name: str, amount: int = 1):
+        """Add ``amount`` to counter ``name``."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, stage: str, seconds: float):
+        """Record one duration for ``stage``."""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def timer(self, stage: str):
+        """Context manager timing its block as one ``stage`` observation."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, stage)
+
+    def wrap(self, func: Callable, stage: str) -> Callable:
+        """Return ``func`` timed as ``stage``."""
+        observe = self.observe
+        clock = time.perf_counter
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                observe(stage, clock() - start)
+        return timed
+
+    def instrument(self, obj, method: str, stage: str):
+        """Time calls of ``obj.method``, including calls ``obj`` makes itself.
+
+        Does nothing while disabled, so per-line methods keep their
+        unwrapped speed unless stats were asked for.
+        """
+        if self.enabled:
+            setattr(obj, method, self.wrap(getattr(obj, method), stage))
+
+    def timed_iter(self, iterable: Iterable[T], stage: str) -> Iterator[T]:
+        """Yield from ``iterable``, timing the production of each item."""
+        if not self.enabled:
+            yield from iterable
+            return
+        it = iter(iterable)
+        clock = time.perf_counter
+        while True:
+            start = clock()
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+            self.observe(stage, clock() - start)
+            yield item
+
+    def snapshot(self) -> Dict:
+        """Counters and per-stage timing as plain data."""
+        with self._lock:
+            return {
+                "counters": dict(sorted(self.counters.items())),
+                "stages": {
+                    stage: {
+                        "count": h.count,
+                        "total_seconds": h.total,
+                        "mean_seconds": h.total / h.count if h.count else 0.0,
+                        "max_seconds": h.max,
+                        "buckets": dict(h.cumulative()),
+                    }
+                    for stage, h in sorted(self.stages.items())
+                },
+            }
+
+    def to_prometheus(self, prefix: str = "tradebot") -> str:
+        """Render the registry in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = []
+        for name, value in snapshot["counters"].items():
+            metric = f"{prefix}_{_metric_name(name)}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        if snapshot["stages"]:
+            metric = f"{prefix}_stage_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            for stage, data in snapshot["stages"].items():
+                for bound, count in data["buckets"].items():
+                    lines.append(f'{metric}_bucket{{stage="{stage}",le="{bound}"}} {count}')
+                lines.append(f'{metric}_sum{{stage="{stage}"}} {data["total_seconds"]!r}')
+                lines.append(f'{metric}_count{{stage="{stage}"}} {data["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def render(self, fmt: str = "json") -> str:
+        """Render a snapshot as ``json`` or ``prometheus`` text."""
+        if fmt == "json":
+            return json.dumps(self.snapshot(), indent=2)
+        if fmt == "prometheus":
+            return self.to_prometheus()
+        raise ValueError(f"Unknown stats format: {fmt}")
+
+
+def _metric_name(name: str) -> str:
+    return "".join(c if c.isalnum() else "_" for c in name)
+
+
+# Process-wide registry used by the parser, database and LLM clients
+METRICS = Metrics()
@@ -1,8 +1,10 @@
 from datetime import datetime
 from enum import Enum
-from typing import List
+from typing import List, Optional
 
-from sqlalchemy import DateTime, Enum as SQLEnum, ForeignKey, String, Numeric, Integer
+from sqlalchemy import (
+    JSON, DateTime, Enum as SQLEnum, Float, ForeignKey, Index, Integer, Numeric, String, UniqueConstraint
+)
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -14,6 +16,13 @@ class Server(str, Enum):
     HARMONY = "Harmony"
     MELODY = "Melody"
     CADENCE = "Cadence"
+    CELEBRATION = "Celebration"
+    DELIVERANCE = "Deliverance"
+    EXODUS = "Exodus"
+    INDEPENDENCE = "Independence"
+    PRISTINE = "Pristine"
+    RELEASE = "Release"
+    XANADU = "Xanadu"
 
 
 class TradeType(str, Enum):
@@ -39,13 +48,25 @@ class Currency(str, Enum):
 
 class Trade(Base):
     __tablename__ = "trades"
+    __table_args__ = (
+        Index("ix_trades_server_date_time", "server", "log_date", "timestamp"),
+        Index("ix_trades_log_date", "log_date", "timestamp"),  # month partitions
+        Index("ix_trades_player_name", "player_name"),
+        Index("ix_trades_trade_type", "trade_type"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
+    content_hash: Mapped[str] = mapped_column(String(32), unique=True)  # identity of the log line
+    log_date: Mapped[Optional[str]] = mapped_column(String(10), nullable=True)  # YYYY-MM-DD
     timestamp: Mapped[str] = mapped_column(String(8))  # HH:MM:SS format
     server: Mapped[Server] = mapped_column(SQLEnum(Server))
     player_name: Mapped[str] = mapped_column(String(100))
     trade_type: Mapped[TradeType] = mapped_column(SQLEnum(TradeType))
     message: Mapped[str] = mapped_column(String(1000))
+    price_amount: Mapped[Optional[float]] = mapped_column(Numeric(10, 2), nullable=True)
+    price_currency: Mapped[Optional[Currency]] = mapped_column(SQLEnum(Currency), nullable=True)
+    price_silver: Mapped[Optional[float]] = mapped_column(Float, nullable=True)  # price in silver
+    parsed_by: Mapped[str] = mapped_column(String(5), server_default="regex")  # "regex" or "llm"
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
@@ -56,16 +77,22 @@ class Trade(Base):
 
 class Item(Base):
     __tablename__ = "items"
+    __table_args__ = (
+        Index("ix_items_name_rarity", "name", "rarity"),
+        Index("ix_items_trade_id", "trade_id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     trade_id: Mapped[int] = mapped_column(ForeignKey("trades.id"))
     name: Mapped[str] = mapped_column(String(200))
     rarity: Mapped[Rarity] = mapped_column(SQLEnum(Rarity))
-    quality_level: Mapped[float] = mapped_column(Numeric(10, 4))
-    weight: Mapped[float] = mapped_column(Numeric(10, 4))
-    damage: Mapped[float] = mapped_column(Numeric(10, 4))
+    quality_level: Mapped[Optional[float]] = mapped_column(Numeric(10, 4), nullable=True)
+    weight: Mapped[Optional[float]] = mapped_column(Numeric(10, 4), nullable=True)
+    damage: Mapped[Optional[float]] = mapped_column(Numeric(10, 4), nullable=True)
+    fragment: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)  # e.g. "1/3"
     price_amount: Mapped[float] = mapped_column(Numeric(10, 2), nullable=True)
     price_currency: Mapped[Currency] = mapped_column(SQLEnum(Currency), nullable=True)
+    price_silver: Mapped[Optional[float]] = mapped_column(Float, nullable=True)  # price in silver
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
@@ -78,6 +105,9 @@ class Item(Base):
 
 class ItemAttribute(Base):
     __tablename__ = "item_attributes"
+    __table_args__ = (
+        Index("ix_item_attributes_item_id", "item_id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     item_id: Mapped[int] = mapped_column(ForeignKey("items.id"))
@@ -93,6 +123,9 @@ class ItemAttribute(Base):
 
 class ItemTrait(Base):
     __tablename__ = "item_traits"
+    __table_args__ = (
+        Index("ix_item_traits_item_id", "item_id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     item_id: Mapped[int] = mapped_column(ForeignKey("items.id"))
@@ -103,4 +136,30 @@ class ItemTrait(Base):
         DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
     )
 
-    item: Mapped["Item"] = relationship(back_populates="traits") 
\ No newline at end of file
+    item: Mapped["Item"] = relationship(back_populates="traits") 
+
+
+class PriceSummary(Base):
+    """Daily asking-price aggregates for one item, maintained on write."""
+
+    __tablename__ = "price_summaries"
+    __table_args__ = (
+        UniqueConstraint("item_name", "rarity", "server", "day", name="uq_price_summaries_key"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    item_name: Mapped[str] = mapped_column(String(200))
+    rarity: Mapped[Rarity] = mapped_column(SQLEnum(Rarity))
+    server: Mapped[Server] = mapped_column(SQLEnum(Server))
+    day: Mapped[str] = mapped_column(String(10))  # YYYY-MM-DD
+    count: Mapped[int] = mapped_column(Integer)
+    min_silver: Mapped[float] = mapped_column(Float)
+    max_silver: Mapped[float] = mapped_column(Float)
+    mean_silver: Mapped[float] = mapped_column(Float)
+    p25_silver: Mapped[float] = mapped_column(Float)
+    median_silver: Mapped[float] = mapped_column(Float)
+    p75_silver: Mapped[float] = mapped_column(Float)
+    sketch: Mapped[dict] = mapped_column(JSON)  # serialized QuantileSketch
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
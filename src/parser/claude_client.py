@@ -1,4 +1,6 @@
 import os
+import random
+from dataclasses import dataclass
 from typing import Dict, List, Optional
 import anthropic
 from anthropic.types import Message
@@ -6,17 +8,102 @@ import json
 import logging
 import asyncio
 
+from ..metrics import METRICS
+from .rate_limiter import RateLimiter, estimate_tokens, min_cacheable_tokens
+from .response_cache import ResponseCache, cache_key
+
 logger = logging.getLogger(__name__)
 
+DEFAULT_SYSTEM_PROMPT = "You are a text analysis assistant that provides structured analysis in JSON format."
+
+# HTTP statuses worth retrying: timeout, conflict, rate limit, server errors
+_RETRY_STATUSES = {408, 409, 429}
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, (anthropic.APIConnectionError, asyncio.TimeoutError)):
+        return True
+    if isinstance(error, anthropic.APIStatusError):
+        return error.status_code in _RETRY_STATUSES or error.status_code >= 500
+    return False
+
+
+def _text_of(content) -> str:
+    """Text of a system prompt or message, given as a string or as content blocks."""
+    if isinstance(content, str):
+        return content
+    return "".join(block.get("text", "") for block in content)
+
+
+def _cacheable_block(text: str, model: Optional[str]) -> Dict:
+    """Text content block, marked for prompt caching if it is long enough to be cached."""
+    block = {"type": "text", "text": text}
+    if estimate_tokens(text) >= min_cacheable_tokens(model):
+        block["cache_control"] = {"type": "ephemeral"}
+    return block
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds the server asked us to wait, if it said."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class AnalysisOutcome:
+    """Result of one text in a batch: ``result`` on success, else ``error``."""
+    text: str
+    result: Optional[Dict] = None
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
 class ClaudeClient:
-    def __init__(self, api_key: Optional[str] = None, model: str = "claude-3-7-sonnet"):
-        """Initialize the Claude client."""
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model: str = "claude-3-7-sonnet",
+        cache: Optional[ResponseCache] = None,
+        base_url: Optional[str] = None,
+        retry_attempts: int = 3,
+        timeout: float = 30.0,
+        rate_limiter: Optional[RateLimiter] = None,
+        backoff_base: float = 1.0,
+        backoff_max: float = 30.0
+    ):
+        """Initialize the Claude client.
+
+        With a ``cache``, identical requests are answered from disk instead
+        of the API. ``base_url`` points the client at another endpoint, such
+        as a local stub in tests.
+
+        Each call may take at most ``timeout`` seconds. Timeouts, connection
+        errors, 429s and server errors are retried up to ``retry_attempts``
+        times with exponential backoff and jitter, honouring Retry-After;
+        the SDK's own retries are turned off so this is the only policy.
+        """
         self.api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
         if not self.api_key:
             raise ValueError("ANTHROPIC_API_KEY environment variable is not set")
         
         self.model = model
-        self.client = anthropic.Anthropic(api_key=self.api_key)
+        self.cache = cache
+        self.retry_attempts = retry_attempts
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.client = anthropic.AsyncAnthropic(
+            api_key=self.api_key, base_url=base_url, timeout=timeout, max_retries=0
+        )
 
     async def analyze_text(
         self,
@@ -40,11 +127,10 @@ class ClaudeClient:
             Dict containing the analysis results
         """
         try:
-            # Construct the prompt
-            prompt = f"""Please analyze the following text and categorize it according to these categories: {', '.join(categories)}
-
-Text to analyze:
-{text}
+            # The instructions and output format are the same on every call,
+            # so they form the system prompt, cached once it is long enough;
+            # only the categories and the text go in the message
+            instructions = f"""{system_prompt or DEFAULT_SYSTEM_PROMPT}
 
 Please provide your analysis in the following JSON format:
 {{
@@ -59,13 +145,27 @@ Please provide your analysis in the following JSON format:
         "model_used": "{self.model}"
     }}
 }}"""
+            prompt = f"""Please analyze the following text and categorize it according to these categories: {', '.join(categories)}
+
+Text to analyze:
+{text}"""
+
+            # Identical requests are served from the response cache
+            key = None
+            if self.cache is not None:
+                key = cache_key(self.model, instructions, prompt, temperature, max_tokens)
+                cached = self.cache.get(key)
+                if cached is not None:
+                    METRICS.incr("llm.cache_hits")
+                    return cached
+                METRICS.incr("llm.cache_misses")
 
             # Make the API call
-            message = await self.client.messages.create(
+            message = await self._create_message(
                 model=self.model,
                 max_tokens=max_tokens,
                 temperature=temperature,
-                system=system_prompt or "You are a text analysis assistant that provides structured analysis in JSON format.",
+                system=[_cacheable_block(instructions, self.model)],
                 messages=[
                     {"role": "user", "content": prompt}
                 ]
@@ -75,37 +175,152 @@ Please provide your analysis in the following JSON format:
             try:
                 response_text = message.content[0].text
                 analysis_result = json.loads(response_text)
-                return analysis_result
             except json.JSONDecodeError as e:
                 logger.error(f"Failed to parse Claude response as JSON: {e}")
                 raise ValueError("Invalid response format from Claude")
+            if key is not None:
+                self.cache.put(key, analysis_result)
+            return analysis_result
 
         except Exception as e:
+            METRICS.incr("llm.errors")
             logger.error(f"Error in Claude API call: {e}")
             raise
 
+    async def complete(
+        self,
+        prompt: str,
+        max_tokens: int = 1024,
+        prefix: Optional[str] = None,
+        model: Optional[str] = None
+    ) -> str:
+        """Send ``prompt`` and return the reply text.
+
+        A static ``prefix`` (the instructions of a template) goes first,
+        marked for prompt caching if it reaches the model's minimum
+        cacheable length. Replies are kept in the response cache,
+        and calls share the rate limit and retry policy of ``analyze_text``.
+        """
+        model = model or self.model
+        key = None
+        if self.cache is not None:
+            key = cache_key(model, prefix or "", prompt, None, max_tokens)
+            cached = self.cache.get(key)
+            if cached is not None:
+                METRICS.incr("llm.cache_hits")
+                return cached["text"]
+            METRICS.incr("llm.cache_misses")
+        if prefix:
+            content = [_cacheable_block(prefix, model), {"type": "text", "text": prompt}]
+        else:
+            content = prompt
+        try:
+            message = await self._create_message(
+                model=model, max_tokens=max_tokens, messages=[{"role": "user", "content": content}]
+            )
+        except Exception:
+            METRICS.incr("llm.errors")
+            raise
+        text = message.content[0].text if message.content else ""
+        if key is not None:
+            self.cache.put(key, {"text": text})
+        return text
+
+    async def _create_message(self, **params) -> Message:
+        """Call the Messages API under the rate limit, with timeout and retries."""
+        # Output size is unknown until the response, so only the prompt is
+        # reserved; settle() charges the real usage afterwards
+        reserved = estimate_tokens(
+            _text_of(params.get("system", "")) + _text_of(params["messages"][0]["content"])
+        )
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                waited = await self.rate_limiter.acquire(reserved)
+                if waited:
+                    METRICS.observe("llm.rate_limit_wait", waited)
+            METRICS.incr("llm.requests")
+            try:
+                with METRICS.timer("llm.request"):
+                    message = await asyncio.wait_for(
+                        self.client.messages.create(**params), self.timeout
+                    )
+            except Exception as e:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.settle(reserved, 0)
+                if isinstance(e, asyncio.TimeoutError):
+                    METRICS.incr("llm.timeouts")
+                if attempt >= self.retry_attempts or not _is_retryable(e):
+                    raise
+                delay = self._backoff(attempt, e)
+                attempt += 1
+                METRICS.incr("llm.retries")
+                logger.warning(
+                    f"Claude API call failed ({e!r}), retry {attempt}/{self.retry_attempts} in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+                continue
+
+            used = message.usage.input_tokens + message.usage.output_tokens
+            if self.rate_limiter is not None:
+                self.rate_limiter.settle(reserved, used)
+            METRICS.incr("llm.input_tokens", message.usage.input_tokens)
+            METRICS.incr("llm.output_tokens", message.usage.output_tokens)
+            METRICS.incr("llm.cache_write_tokens", getattr(message.usage, "cache_creation_input_tokens", None) or 0)
+            METRICS.incr("llm.cache_read_tokens", getattr(message.usage, "cache_read_input_tokens", None) or 0)
+            return message
+
+    async def close(self):
+        """Close the HTTP connection pool."""
+        await self.client.close()
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        """Delay before retry ``attempt + 1``: Retry-After, else jittered 2**attempt."""
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        ceiling = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
+
     async def batch_analyze(
         self,
         texts: List[str],
         categories: List[str],
-        batch_size: int = 10
-    ) -> List[Dict]:
+        batch_size: int = 10,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 4096
+    ) -> List[AnalysisOutcome]:
         """
-        Analyze multiple texts in batches.
+        Analyze multiple texts with at most ``batch_size`` calls in flight.
+        
+        A new call starts as soon as any call finishes, so one slow text
+        does not hold up the others, and a failure only affects its own
+        text.
         
         Args:
             texts: List of texts to analyze
             categories: List of categories to analyze
-            batch_size: Number of texts to process in parallel
+            batch_size: Maximum number of concurrent calls
+            system_prompt: Optional custom system prompt
+            temperature: Model temperature (0.0 to 1.0)
+            max_tokens: Maximum tokens in each response
             
         Returns:
-            List of analysis results
+            One AnalysisOutcome per text, in input order
         """
-        results = []
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
-            batch_results = await asyncio.gather(
-                *[self.analyze_text(text, categories) for text in batch]
-            )
-            results.extend(batch_results)
-        return results 
\ No newline at end of file
+        outcomes: List[Optional[AnalysisOutcome]] = [None] * len(texts)
+        pending = iter(enumerate(texts))
+
+        async def worker():
+            for index, text in pending:
+                try:
+                    result = await self.analyze_text(
+                        text, categories, system_prompt, temperature, max_tokens
+                    )
+                    outcomes[index] = AnalysisOutcome(text, result=result)
+                except Exception as e:
+                    outcomes[index] = AnalysisOutcome(text, error=e)
+
+        await asyncio.gather(*[worker() for _ in range(min(batch_size, len(texts)))])
+        return outcomes
@@ -0,0 +1,116 @@
+"""Client-side rate limiting for LLM requests.
+
+The API limits both requests and tokens per minute. ``RateLimiter`` keeps a
+token bucket for each: a bucket holds up to one minute's allowance and
+refills continuously, so short bursts pass immediately while the sustained
+rate stays under the limit. Token use is not known until a response
+arrives, so callers reserve an estimate up front and ``settle`` it against
+the reported usage afterwards.
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Optional
+
+# Shortest prompt prefix, in tokens, the API will cache
+MIN_CACHEABLE_TOKENS = 1024
+MIN_CACHEABLE_TOKENS_HAIKU = 2048
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for reserving capacity (about four characters each)."""
+    return len(text) // 4 + 1
+
+
+def min_cacheable_tokens(model: Optional[str]) -> int:
+    """Shortest prompt prefix ``model`` caches; shorter ones are billed in full."""
+    return MIN_CACHEABLE_TOKENS_HAIKU if model and "haiku" in model else MIN_CACHEABLE_TOKENS
+
+
+class TokenBucket:
+    """Allowance of ``per_minute`` units, refilled continuously."""
+
+    def __init__(self, per_minute: float, clock: Callable[[], float] = time.monotonic):
+        if per_minute <= 0:
+            raise ValueError("per_minute must be positive")
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount: float) -> float:
+        """Seconds until ``amount`` units are available (0 if they are now)."""
+        self._refill()
+        # A request bigger than the bucket waits for a full bucket
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float):
+        """Spend ``amount`` units; the balance may go negative (debt)."""
+        self._refill()
+        self.tokens -= amount
+
+    def refund(self, amount: float):
+        """Return unused units."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limits; None means unlimited."""
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep
+    ):
+        self.requests = TokenBucket(requests_per_minute, clock) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute, clock) if tokens_per_minute else None
+        self._sleep = sleep
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def acquire(self, tokens: int = 0) -> float:
+        """Wait until one request and ``tokens`` tokens fit; return seconds waited.
+
+        Waiters are served in arrival order, so a large request is not
+        starved by a stream of small ones.
+        """
+        if self.requests is None and self.tokens is None:
+            return 0.0
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        waited = 0.0
+        async with self._lock:
+            while True:
+                delay = max(
+                    self.requests.delay(1) if self.requests else 0.0,
+                    self.tokens.delay(tokens) if self.tokens else 0.0,
+                )
+                if delay <= 0:
+                    break
+                await self._sleep(delay)
+                waited += delay
+            if self.requests:
+                self.requests.take(1)
+            if self.tokens:
+                self.tokens.take(tokens)
+        return waited
+
+    def settle(self, reserved: int, used: int):
+        """Correct a reservation of ``reserved`` tokens to the ``used`` count."""
+        if self.tokens is None:
+            return
+        if used < reserved:
+            self.tokens.refund(reserved - used)
+        elif used > reserved:
+            self.tokens.take(used - reserved)
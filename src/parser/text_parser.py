@@ -5,6 +5,8 @@ import yaml
 from pathlib import Path
 
 from .claude_client import ClaudeClient
+from .rate_limiter import RateLimiter
+from .response_cache import ResponseCache
 from ..database.database import Database
 
 logger = logging.getLogger(__name__)
@@ -14,7 +16,14 @@ class TextParser:
         """Initialize the text parser with configuration."""
         self.config = self._load_config(config_path)
         self.claude_client = ClaudeClient(
-            model=self.config["anthropic"]["model"]
+            model=self.config["anthropic"]["model"],
+            cache=self._create_cache(self.config.get("cache")),
+            retry_attempts=self.config["parser"].get("retry_attempts", 3),
+            timeout=self.config["parser"].get("timeout", 30),
+            rate_limiter=RateLimiter(
+                requests_per_minute=self.config["anthropic"].get("requests_per_minute"),
+                tokens_per_minute=self.config["anthropic"].get("tokens_per_minute")
+            )
         )
         self.db = Database(self.config["database"]["path"])
         self.categories = self.config["parser"]["default_categories"]
@@ -31,6 +40,12 @@ class TextParser:
             logger.error(f"Failed to load config: {e}")
             raise
 
+    def _create_cache(self, cache_config: Optional[Dict]) -> Optional[ResponseCache]:
+        """Create the response cache unless it is disabled in the config."""
+        if not cache_config or not cache_config.get("enabled", True):
+            return None
+        return ResponseCache(cache_config["path"], max_bytes=cache_config["max_size"])
+
     def set_categories(self, categories: List[str]):
         """Set custom categories for analysis."""
         self.categories = categories
@@ -94,21 +109,30 @@ class TextParser:
             metadata: Optional metadata to store with each analysis
             
         Returns:
-            List of analysis results
+            One entry per text, in input order: the stored analysis, or
+            ``{"text": ..., "error": ...}`` if analyzing that text failed
         """
         try:
-            # Process texts in batches
-            results = await self.claude_client.batch_analyze(
+            # Process texts with up to batch_size calls in flight
+            outcomes = await self.claude_client.batch_analyze(
                 texts=texts,
                 categories=self.categories,
-                batch_size=self.config["parser"]["batch_size"]
+                batch_size=self.config["parser"]["batch_size"],
+                system_prompt=custom_instructions or self.config["anthropic"]["system_prompt"],
+                temperature=self.config["anthropic"]["temperature"],
+                max_tokens=self.config["anthropic"]["max_tokens"]
             )
 
             # Store results in database
             stored_analyses = []
-            for text, analysis in zip(texts, results):
+            for outcome in outcomes:
+                if not outcome.ok:
+                    logger.warning(f"Analysis failed for {outcome.text[:50]!r}: {outcome.error}")
+                    stored_analyses.append({"text": outcome.text, "error": str(outcome.error)})
+                    continue
+                analysis = outcome.result
                 stored = self.db.store_analysis(
-                    text=text,
+                    text=outcome.text,
                     categories=analysis["categories"],
                     metadata={
                         **(metadata or {}),
@@ -1,8 +1,12 @@
 import re
-from typing import Dict, List, Optional, Tuple
+import sys
+from typing import Dict, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
+# Slotted records drop the per-instance __dict__ (Python 3.10+)
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
 class TradeType(str, Enum):
     WTS = "WTS"
     WTB = "WTB"
@@ -26,61 +30,145 @@ class FilterMode(str, Enum):
     ITEMS_ONLY = "items_only"  # Only messages with item links
     NO_ITEMS = "no_items"  # Only messages without item links
 
-@dataclass
+class SymbolTable(dict):
+    """Interns repeated strings so equal values share one object.
+
+    Player names, item names and enchant abbreviations repeat thousands of
+    times in a month of logs; interning them keeps only one copy of each.
+    Lookups of known symbols stay in C (``table[value]``); only new symbols
+    reach ``__missing__``. Once ``max_size`` symbols are held the table
+    starts over, so a long ``--follow`` run cannot grow it without limit.
+    """
+
+    def __init__(self, max_size: int = 65536):
+        super().__init__()
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+
+    def __missing__(self, value: str) -> str:
+        if len(self) >= self.max_size:
+            self.clear()
+        self[value] = value
+        return value
+
+    def intern(self, value: str) -> str:
+        """Return the shared instance of ``value``."""
+        return self[value]
+
+@dataclass(**_SLOTS)
 class ItemAttribute:
     name: str
     value: str
 
-@dataclass
+@dataclass(**_SLOTS)
 class Item:
     name: str
     rarity: Rarity
     quality_level: Optional[float]
     weight: Optional[float]
     damage: Optional[float]
-    attributes: List[ItemAttribute]
+    attributes: Tuple[ItemAttribute, ...]
     fragment: Optional[str] = None
 
-@dataclass
+@dataclass(**_SLOTS)
 class Trade:
     timestamp: str
     player_name: str
     server: str
     trade_type: TradeType
     message: str
-    items: List[Item]
+    items: Tuple[Item, ...]
     price_amount: Optional[float]
     price_currency: Optional[Currency]
+    log_date: Optional[str] = None  # YYYY-MM-DD from the last "Logging started" line
+
+_CURRENCY_UNITS = {
+    'g': 'gold',
+    's': 'silver',
+    'c': 'copper',
+    'i': 'iron'
+}
+
+# Value -> member lookups; much cheaper than calling the Enum per token
+_TRADE_TYPES = {t.value: t for t in TradeType}
+_RARITIES = {r.value: r for r in Rarity}
+_CURRENCIES = {c.value: c for c in Currency}
 
 class TradeParser:
-    def __init__(self, filter_mode: FilterMode = FilterMode.ALL):
+    def __init__(
+        self,
+        filter_mode: FilterMode = FilterMode.ALL,
+        log_date: Optional[str] = None,
+        symbols: Optional[SymbolTable] = None,
+    ):
         # Regular expressions for parsing
+        self.date_header_pattern = re.compile(r'Logging started (\d{4}-\d{2}-\d{2})')
         self.trade_line_pattern = re.compile(r'\[(\d{2}:\d{2}:\d{2})\] <([^>]+)> \(([^)]+)\) (WTS|WTB|WTT|PC) (.+)')
-        self.item_pattern = re.compile(r'\[(common|rare|supreme|fantastic)?\s*([^\]]+?)(?:\s+QL:(\d+\.?\d*))?(?:\s+DMG:(\d+\.?\d*))?(?:\s+WT:(\d+\.?\d*))?(?:\s+([^\]]+))?\]')
+        # Single-pass message scanner: each match is either a bracketed item
+        # link (with its fragment, QL/DMG/WT and enchant tail) or a price.
+        self.token_pattern = re.compile(r"""
+            \[
+                (?:(?P<rarity>common|rare|supreme|fantastic)\s+)?
+                (?P<name>[^\[\]:]+)
+                (?:\[(?P<frag_num>\d+)/(?P<frag_den>\d+)\])?
+                (?:\s+QL:(?P<ql>\d+\.?\d*))?
+                (?:\s+DMG:(?P<dmg>\d+\.?\d*))?
+                (?:\s+WT:(?P<wt>\d+\.?\d*))?
+                (?P<tail>\s[^\[\]]*)?
+            \]
+            | (?P<amount>\d+(?:\.\d+)?)\s*(?P<unit>[gsci])
+        """, re.VERBOSE)
         self.attribute_pattern = re.compile(r'(\w+)\s+(\d+)')
-        self.price_pattern = re.compile(r'(\d+(?:\.\d+)?)\s*(g|s|c|i)')
-        self.fragment_pattern = re.compile(r'\[(\d+)/(\d+)\]')
         
         # Server name mapping
         self.server_map = {
             'Har': 'Harmony',
             'Mel': 'Melody',
-            'Cad': 'Cadence'
+            'Cad': 'Cadence',
+            'Cel': 'Celebration',
+            'Del': 'Deliverance',
+            'Exo': 'Exodus',
+            'Ind': 'Independence',
+            'Pri': 'Pristine',
+            'Rel': 'Release',
+            'Xan': 'Xanadu'
         }
+        # Tags accepted in a line: abbreviations and full names. Lines from
+        # any other server are dropped, as the database only stores these.
+        self._servers = {**self.server_map, **{name: name for name in self.server_map.values()}}
         
         self.filter_mode = filter_mode
+        # Date of the log section being parsed, updated by "Logging started" lines
+        self.log_date = log_date
+        # Only low-cardinality fields are interned; timestamps and messages
+        # are mostly unique and would just fill the table
+        self.symbols = symbols if symbols is not None else SymbolTable()
 
     def parse_line(self, line: str) -> Optional[Trade]:
         """Parse a single trade line into a Trade object."""
+        # Cheap rejects before any regex work: every trade line starts with
+        # "[HH:MM:SS] <"; everything else is a date header or noise.
+        if not line.startswith('[') or line[9:12] != '] <':
+            date_match = self.date_header_pattern.match(line)
+            if date_match:
+                self.log_date = date_match.group(1)
+            return None
+        if line.startswith('System>', 12):
+            return None
+
         match = self.trade_line_pattern.match(line)
         if not match:
             return None
 
         timestamp, player_name, server, trade_type, message = match.groups()
+        server = self._servers.get(server)
+        if server is None:
+            return None
+        intern = self.symbols.__getitem__
         
-        # Parse items and price
-        items = self._parse_items(message)
-        price_amount, price_currency = self._parse_price(message)
+        # Parse items and price in one pass over the message
+        items, price_amount, price_currency = self._scan_message(message)
 
         # Apply filtering
         if self.filter_mode == FilterMode.ITEMS_ONLY and not items:
@@ -90,63 +178,63 @@ class TradeParser:
 
         return Trade(
             timestamp=timestamp,
-            player_name=player_name,
-            server=self.server_map.get(server, server),
-            trade_type=TradeType(trade_type),
+            player_name=intern(player_name),
+            server=server,
+            trade_type=_TRADE_TYPES[trade_type],
             message=message,
             items=items,
             price_amount=price_amount,
-            price_currency=Currency(price_currency) if price_currency else None
+            price_currency=_CURRENCIES[price_currency] if price_currency else None,
+            log_date=self.log_date
         )
 
-    def _parse_items(self, message: str) -> List[Item]:
-        """Parse items from the message."""
+    def _scan_message(self, message: str) -> Tuple[Tuple[Item, ...], Optional[float], Optional[str]]:
+        """Walk the message once, collecting item links and the first price.
+
+        Prices are only recognised outside item links, so numbers inside an
+        item such as its QL or weight are never taken for a price.
+        """
+        intern = self.symbols.__getitem__
         items = []
-        for match in self.item_pattern.finditer(message):
-            rarity, name, ql, dmg, wt, attributes = match.groups()
-            
-            # Parse fragment if present
-            fragment = None
-            fragment_match = self.fragment_pattern.search(name)
-            if fragment_match:
-                fragment = f"{fragment_match.group(1)}/{fragment_match.group(2)}"
-                name = name[:fragment_match.start()].strip()
-
-            # Parse attributes
-            item_attributes = []
-            if attributes:
-                for attr_match in self.attribute_pattern.finditer(attributes):
-                    attr_name, attr_value = attr_match.groups()
-                    item_attributes.append(ItemAttribute(
-                        name=attr_name,
-                        value=attr_value
-                    ))
+        price_amount, price_currency = None, None
+        for match in self.token_pattern.finditer(message):
+            if match.group('name') is None:
+                if price_currency is None:
+                    price_amount = float(match.group('amount'))
+                    price_currency = _CURRENCY_UNITS[match.group('unit')]
+                continue
+
+            rarity, name, frag_num, frag_den, ql, dmg, wt, tail = match.group(
+                'rarity', 'name', 'frag_num', 'frag_den', 'ql', 'dmg', 'wt', 'tail'
+            )
+
+            # Parse attributes (enchants such as "WoA 95 • CoC 93")
+            item_attributes = ()
+            if tail and not tail.isspace():
+                item_attributes = tuple(
+                    ItemAttribute(name=intern(attr_name), value=intern(attr_value))
+                    for attr_name, attr_value in self.attribute_pattern.findall(tail)
+                )
 
             items.append(Item(
-                name=name.strip(),
-                rarity=Rarity(rarity or "common"),
+                name=intern(name.strip()),
+                rarity=_RARITIES[rarity or "common"],
                 quality_level=float(ql) if ql else None,
                 weight=float(wt) if wt else None,
                 damage=float(dmg) if dmg else None,
                 attributes=item_attributes,
-                fragment=fragment
+                fragment=intern(f"{frag_num}/{frag_den}") if frag_num else None
             ))
-        return items
+        return tuple(items), price_amount, price_currency
+
+    def _parse_items(self, message: str) -> Tuple[Item, ...]:
+        """Parse items from the message."""
+        return self._scan_message(message)[0]
 
     def _parse_price(self, message: str) -> Tuple[Optional[float], Optional[str]]:
         """Parse price from the message."""
-        match = self.price_pattern.search(message)
-        if not match:
-            return None, None
-
-        amount, currency = match.groups()
-        currency_map = {
-            'g': 'gold',
-            's': 'silver',
-            'c': 'copper',
-            'i': 'iron'
-        }
-        return float(amount), currency_map.get(currency)
+        _, amount, currency = self._scan_message(message)
+        return amount, currency
 
     def to_dict(self, trade: Trade) -> Dict:
         """Convert a Trade object to a dictionary format suitable for database storage."""
@@ -172,5 +260,6 @@ class TradeParser:
                 for item in trade.items
             ],
             "price_amount": trade.price_amount,
-            "price_currency": trade.price_currency.value if trade.price_currency else None
+            "price_currency": trade.price_currency.value if trade.price_currency else None,
+            "log_date": trade.log_date
         }
@@ -0,0 +1,480 @@
+"""Streaming ingestion pipeline for trade log files.
+
+The pipeline is a chain of generators: read -> parse -> serialize -> write.
+``buffered`` runs an upstream stage in a background thread and hands its
+output over through a bounded queue, so memory use stays constant no matter
+how large the log file is.
+
+Log files are read through ``MappedLog``, a memory map scanned at the byte
+level. ``stream_trades_parallel`` uses it to split a file into shards at
+``Logging started`` day headers and parses them in a process pool, yielding
+results in file order.
+"""
+
+import mmap
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import (
+    BinaryIO, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, TypeVar
+)
+
+from src.compression import detect_compression, open_compressed
+from src.metrics import METRICS
+from src.parser.trade_parser import FilterMode, Trade, TradeParser
+
+T = TypeVar("T")
+
+_DONE = object()
+
+
+@dataclass
+class IngestStats:
+    """Counters shared between pipeline stages."""
+    bytes_total: int = 0
+    bytes_read: int = 0
+    lines: int = 0
+    trades: int = 0
+    errors: int = 0
+
+
+class LogLine(NamedTuple):
+    line_no: int
+    offset: int  # byte offset just past this line
+    text: str
+
+
+class ParsedTrade(NamedTuple):
+    line_no: int
+    offset: int
+    trade: Trade
+    data: Dict
+
+
+class _Failure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def buffered(iterable: Iterable[T], maxsize: int = 1024) -> Iterator[T]:
+    """Run ``iterable`` in a background thread behind a bounded queue.
+
+    Exceptions raised by the producer are re-raised in the consumer. If the
+    consumer stops early, the producer thread is told to stop as well.
+    """
+    items: "queue.Queue" = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        it = iter(iterable)
+        try:
+            for item in it:
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(_Failure(e))
+            return
+        finally:
+            close = getattr(it, "close", None)
+            if close is not None:
+                close()
+        put(_DONE)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is _DONE:
+                break
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+
+def _print_error(line_no: int, error: Exception) -> None:
+    print(f"❌ Error on line {line_no}: {str(error)}")
+
+
+DAY_HEADER = b"Logging started "
+
+# "[HH:MM:SS] <" is 12 bytes; the speaker's name starts after it
+_SPEAKER = 12
+_SYSTEM = b"System>"
+_WHITESPACE = b" \t\r\n\x0b\x0c"
+
+
+def _is_noise(data: bytes, start: int, end: int) -> bool:
+    """Whether ``data[start:end]`` is a ``<System>`` post or neither a trade nor a header.
+
+    Such lines can never produce a trade or change the log date, so they
+    are not decoded. Lines with leading whitespace are left to the parser.
+    Only the few bytes compared are read, so a mapped line is not copied.
+    """
+    first = data[start]
+    if first == 0x5B:  # "["
+        speaker = start + _SPEAKER
+        return data[speaker:min(speaker + len(_SYSTEM), end)] == _SYSTEM
+    return first not in _WHITESPACE and data[start:min(start + len(DAY_HEADER), end)] != DAY_HEADER
+
+
+class MappedLog:
+    """A read-only memory map of a log file; use as a context manager.
+
+    Line boundaries and ``Logging started`` headers are found with
+    ``find``/``rfind`` on the mapped bytes, and any byte range can be
+    inspected without reading the rest of the file, which is what sharding
+    and resuming at a checkpoint need.
+    """
+
+    def __init__(self, file_path: Path):
+        with open(file_path, "rb") as f:
+            self.size = os.fstat(f.fileno()).st_size
+            # An empty file cannot be mapped (and has no lines)
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+    def __enter__(self) -> "MappedLog":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def is_line_start(self, pos: int) -> bool:
+        """Whether ``pos`` starts a line (the end of the file counts)."""
+        return pos == 0 or (0 < pos <= self.size and self.data[pos - 1] == 0x0A)
+
+    def next_line_start(self, pos: int) -> int:
+        """The first line start at or after ``pos``, or the file size."""
+        if pos <= 0:
+            return 0
+        newline = self.data.find(b"\n", pos - 1)
+        return self.size if newline < 0 else newline + 1
+
+    def find_day_header(self, start: int, end: int) -> int:
+        """Offset of the first day header line beginning in [start, end), or -1.
+
+        ``start`` must be a line start.
+        """
+        if start < end and self.data[start:start + len(DAY_HEADER)] == DAY_HEADER:
+            return start
+        at = self.data.find(b"\n" + DAY_HEADER, start, end + len(DAY_HEADER))
+        return at + 1 if 0 <= at and at + 1 < end else -1
+
+    def log_date_before(self, pos: int) -> Optional[str]:
+        """Date of the last day header that lies before ``pos``."""
+        at = self.data.rfind(b"\n" + DAY_HEADER, 0, pos)
+        if at >= 0:
+            header = at + 1
+        elif pos >= len(DAY_HEADER) and self.data[:len(DAY_HEADER)] == DAY_HEADER:
+            header = 0
+        else:
+            return None
+        date = self.data[header + len(DAY_HEADER):header + len(DAY_HEADER) + 10]
+        return date.decode("ascii", errors="replace")
+
+    def lines(self, stats: IngestStats, start: int = 0, end: Optional[int] = None) -> Iterator[LogLine]:
+        """Yield the non-empty, stripped lines beginning in [start, end).
+
+        Lines end at "\n", "\r\n" or a bare "\r", as with universal
+        newlines. Noise lines (see ``_is_noise``) are checked in place and
+        skipped without being copied out of the map, but still counted, so
+        line numbers match a full read.
+        """
+        data = self.data
+        end = self.size if end is None else min(end, self.size)
+        pos = start
+        while pos < end:
+            newline = data.find(b"\n", pos)
+            stop = self.size if newline < 0 else newline
+            line_end = self.size if newline < 0 else newline + 1
+            # A "\r" before the last byte is a bare CR, not half of "\r\n"
+            cr = data.find(b"\r", pos, stop - 1)
+            if cr >= 0:
+                line_end = cr + 1
+            line_start, pos = pos, line_end
+            stats.bytes_read += line_end - line_start
+            if _is_noise(data, line_start, line_end):
+                stats.lines += 1
+                continue
+            text = data[line_start:line_end].decode("utf-8", errors="replace").strip()
+            if not text:
+                continue
+            stats.lines += 1
+            yield LogLine(stats.lines, line_end, text)
+
+
+def _universal_lines(f: BinaryIO) -> Iterator[bytes]:
+    """Raw lines of a binary stream, also split at bare "\r" like text mode."""
+    for raw in f:
+        if b"\r" in raw[:-2]:
+            yield from raw.splitlines(keepends=True)
+        else:
+            yield raw
+
+
+def _stream_lines(f: BinaryIO, stats: IngestStats) -> Iterator[LogLine]:
+    """``MappedLog.lines`` for a stream; offsets count decompressed bytes."""
+    offset = 0
+    for raw in _universal_lines(f):
+        offset += len(raw)
+        stats.bytes_read += len(raw)
+        if _is_noise(raw, 0, len(raw)):
+            stats.lines += 1
+            continue
+        text = raw.decode("utf-8", errors="replace").strip()
+        if not text:
+            continue
+        stats.lines += 1
+        yield LogLine(stats.lines, offset, text)
+
+
+def read_lines(
+    file_path: Path, stats: IngestStats, start: int = 0, end: Optional[int] = None
+) -> Iterator[LogLine]:
+    """Yield the non-empty, stripped lines of a log file with byte offsets.
+
+    ``start`` and ``end`` restrict reading to a byte range; ``start`` must be
+    the beginning of a line. Plain files are memory-mapped; compressed ones
+    (gzip, xz, zstd, bzip2) are decompressed as they are read and can only
+    be read whole. Noise lines are counted but not yielded.
+    """
+    compression = detect_compression(file_path)
+    if compression is None:
+        with MappedLog(file_path) as log:
+            yield from log.lines(stats, start, end)
+        return
+    if start or end is not None:
+        raise ValueError(f"{file_path} is {compression}-compressed and can only be read from the start")
+    with open_compressed(file_path, compression) as f:
+        yield from _stream_lines(f, stats)
+
+
+def parse_lines(
+    lines: Iterable[LogLine],
+    parser: TradeParser,
+    stats: IngestStats,
+    on_error: Callable[[int, Exception], None] = _print_error,
+) -> Iterator[ParsedTrade]:
+    """Parse and serialize log lines, skipping lines that are not trades."""
+    metrics = METRICS if METRICS.enabled else None
+    for line in lines:
+        try:
+            trade = parser.parse_line(line.text)
+            if trade is None:
+                if metrics:
+                    metrics.incr("parser.lines_rejected")
+                continue
+            data = parser.to_dict(trade)
+        except Exception as e:
+            stats.errors += 1
+            if metrics:
+                metrics.incr("parser.errors")
+            on_error(line.line_no, e)
+            continue
+        stats.trades += 1
+        if metrics:
+            metrics.incr("parser.lines_matched")
+            metrics.incr("parser.items", len(trade.items))
+            metrics.incr("parser.attributes", sum(len(item.attributes) for item in trade.items))
+        yield ParsedTrade(line.line_no, line.offset, trade, data)
+
+
+def stream_trades(
+    file_path: Path,
+    parser: TradeParser,
+    stats: Optional[IngestStats] = None,
+    queue_size: int = 1024,
+    on_error: Callable[[int, Exception], None] = _print_error,
+) -> Iterator[ParsedTrade]:
+    """Stream parsed trades from a file, reading and parsing in the background.
+
+    Compressed files are decompressed in the reader thread. Their
+    decompressed size is not known up front, so ``stats.bytes_total`` stays 0.
+    Lines that fail to parse are passed to ``on_error``, from the parser thread.
+    """
+    if stats is None:
+        stats = IngestStats()
+    stats.bytes_total = 0 if detect_compression(file_path) else Path(file_path).stat().st_size
+    lines = read_lines(file_path, stats)
+    if METRICS.enabled:
+        lines = METRICS.timed_iter(lines, "pipeline.read_line")
+    lines = buffered(lines, maxsize=queue_size)
+    return buffered(parse_lines(lines, parser, stats, on_error), maxsize=queue_size)
+
+
+class Shard(NamedTuple):
+    start: int
+    end: int
+
+
+@dataclass
+class ShardResult:
+    """Everything a worker produced for one shard."""
+    stats: IngestStats
+    trades: List[ParsedTrade] = field(default_factory=list)
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+
+
+def _next_shard_start(log: MappedLog, pos: int, window: int) -> int:
+    """Return the first day header at or after ``pos`` within ``window`` bytes.
+
+    Falls back to the first line start after ``pos`` when no header is found,
+    and to the end of the file when it is reached first.
+    """
+    line_start = log.next_line_start(pos)
+    header = log.find_day_header(line_start, line_start + window + 1)
+    if header >= 0:
+        return header
+    return log.size if line_start + window >= log.size else line_start
+
+
+# Bounds of the shard size picked for a file: below the minimum, process
+# start-up and result transfer outweigh the parsing; the maximum bounds the
+# memory of the results a worker sends back.
+MIN_SHARD_SIZE = 64 * 1024
+MAX_SHARD_SIZE = 8 * 1024 * 1024
+
+
+def shard_size_for(file_size: int, workers: int) -> int:
+    """Shard size splitting a file into about one shard per worker."""
+    share = -(-file_size // max(workers, 1))
+    return min(max(share, MIN_SHARD_SIZE), MAX_SHARD_SIZE)
+
+
+def find_shards(
+    file_path: Path, shard_size: int = MAX_SHARD_SIZE, header_window: int = 1024 * 1024
+) -> List[Shard]:
+    """Split a log file into byte ranges that start on day boundaries.
+
+    Each cut is moved forward to the next ``Logging started`` header if one
+    occurs within ``header_window`` bytes, otherwise to the next line start.
+    """
+    starts = [0]
+    with MappedLog(file_path) as log:
+        size = log.size
+        target = shard_size
+        while target < size:
+            start = _next_shard_start(log, target, header_window)
+            if start >= size:
+                break
+            if start > starts[-1]:
+                starts.append(start)
+            target = max(start, target) + shard_size
+    return [Shard(a, b) for a, b in zip(starts, starts[1:] + [size])]
+
+
+def log_date_before(file_path: Path, pos: int) -> Optional[str]:
+    """Find the date of the last day header that starts before ``pos``."""
+    with MappedLog(file_path) as log:
+        return log.log_date_before(pos)
+
+
+def parse_shard(
+    file_path: Path, shard: Shard, filter_mode: FilterMode, log_date: Optional[str] = None
+) -> ShardResult:
+    """Parse one shard of a log file. Runs inside a worker process.
+
+    Line numbers in the result are relative to the start of the shard.
+    Lines before the shard's first day header get the date of the header
+    preceding the shard, or ``log_date`` if there is none.
+    """
+    result = ShardResult(IngestStats(bytes_total=shard.end - shard.start))
+    lines = read_lines(file_path, result.stats, shard.start, shard.end)
+    if shard.start > 0:
+        log_date = log_date_before(file_path, shard.start) or log_date
+    parser = TradeParser(filter_mode=filter_mode, log_date=log_date)
+
+    def on_error(line_no: int, error: Exception) -> None:
+        result.errors.append((line_no, str(error)))
+
+    result.trades = list(parse_lines(lines, parser, result.stats, on_error))
+    return result
+
+
+def merge_shard(
+    result: ShardResult,
+    stats: IngestStats,
+    on_error: Callable[[int, str], None] = _print_error,
+) -> Iterator[ParsedTrade]:
+    """Add a shard's counters to the file's ``stats`` and yield its trades.
+
+    Shards must be merged in file order: line numbers are shifted by the
+    lines counted in ``stats`` so far, as are those passed to ``on_error``.
+    """
+    line_base = stats.lines
+    for line_no, message in result.errors:
+        on_error(line_base + line_no, message)
+    stats.lines += result.stats.lines
+    stats.bytes_read += result.stats.bytes_read
+    stats.trades += result.stats.trades
+    stats.errors += result.stats.errors
+    for record in result.trades:
+        yield record._replace(line_no=line_base + record.line_no)
+
+
+def stream_trades_parallel(
+    file_path: Path,
+    workers: int,
+    filter_mode: FilterMode = FilterMode.ALL,
+    stats: Optional[IngestStats] = None,
+    shard_size: Optional[int] = None,
+    log_date: Optional[str] = None,
+    on_error: Callable[[int, str], None] = _print_error,
+) -> Iterator[ParsedTrade]:
+    """Parse a file in a process pool and yield trades in file order.
+
+    ``log_date`` is the date of lines before the file's first day header.
+    ``shard_size`` defaults to ``shard_size_for`` the file and worker count.
+    Lines that failed to parse are passed to ``on_error`` as their shard
+    is merged.
+
+    At most ``2 * workers`` shards are in flight at once, which bounds the
+    memory held by finished but not yet consumed results.
+    """
+    if stats is None:
+        stats = IngestStats()
+    stats.bytes_total = Path(file_path).stat().st_size
+    if shard_size is None:
+        shard_size = shard_size_for(stats.bytes_total, workers)
+    shards = find_shards(file_path, shard_size)
+
+    def results() -> Iterator[ParsedTrade]:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending: deque = deque()
+            remaining = iter(shards)
+
+            def submit(shard: Shard) -> None:
+                pending.append(pool.submit(parse_shard, file_path, shard, filter_mode, log_date))
+
+            for shard in remaining:
+                submit(shard)
+                if len(pending) >= 2 * workers:
+                    break
+            while pending:
+                result = pending.popleft().result()
+                for shard in remaining:
+                    submit(shard)
+                    break
+                yield from merge_shard(result, stats, on_error)
+
+    return results()
@@ -0,0 +1,205 @@
+"""Pluggable output for ingestion runs.
+
+``process_file`` and ``follow_file`` report through a ``Reporter`` instead
+of printing every trade, so terminal I/O no longer bounds a large import:
+
+- quiet: only the final summary, which counts lines that failed to parse
+- progress: a status line at most once per interval, and each failed line
+- verbose: progress plus the full details of every Nth trade
+- jsonl: progress on the terminal, every trade as one JSON line in a file
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Optional, TextIO
+
+from src.parser.trade_parser import Trade
+from src.pipeline import IngestStats, ParsedTrade
+
+MODES = ("quiet", "progress", "verbose", "jsonl")
+
+# Trades between clock reads in ProgressReporter
+_CHECK_EVERY = 256
+
+
+def format_bytes(size: int) -> str:
+    """Format a byte count for progress output."""
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+class Reporter:
+    """Quiet reporter; the other modes override the events they show."""
+
+    def __init__(self, out: Optional[TextIO] = None):
+        self.out = out or sys.stdout
+
+    def write(self, text: str):
+        self.out.write(text + "\n")
+
+    def start(self, file_path: Path, filter_mode: str, stats: IngestStats):
+        """Called once before the first trade."""
+
+    def trade(self, record: ParsedTrade, stats: IngestStats):
+        """Called for every parsed trade."""
+
+    def error(self, line_no: int, error: object, file_path: Optional[Path] = None):
+        """Called for every line that failed to parse; counted in the summary."""
+
+    def finish(self, stats: IngestStats, rows_written: int, rows_skipped: int, rows_detached: int = 0):
+        """Print the run summary."""
+        self.write("\n=== Summary ===")
+        self.write(f"📊 Total lines: {stats.lines}")
+        self.write(f"📝 Trades processed: {stats.trades}")
+        self.write(f"💾 Trades stored: {rows_written}")
+        self.write(f"♻️  Duplicates skipped: {rows_skipped}")
+        if rows_detached:
+            self.write(f"🗄️  Not stored, month detached to an archive: {rows_detached}")
+        self.write(f"❌ Errors: {stats.errors}")
+        self.write("==============\n")
+
+    def close(self):
+        """Release files and flush buffered output."""
+        self.out.flush()
+
+
+class ProgressReporter(Reporter):
+    """Prints a progress line at most once every ``interval`` seconds."""
+
+    def __init__(self, interval: float = 2.0, out: Optional[TextIO] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        super().__init__(out)
+        self.interval = interval
+        self.clock = clock
+        self.trades = 0  # trades seen here; stats.trades runs ahead when parsing is buffered
+        self._started = 0.0
+        self._next_report = 0.0
+        self._countdown = _CHECK_EVERY
+
+    def start(self, file_path: Path, filter_mode: str, stats: IngestStats):
+        self.write(f"📂 Reading {file_path}")
+        self.write(f"🔍 Filter mode: {filter_mode}")
+        if stats.bytes_total:
+            self.write(f"📊 File size: {format_bytes(stats.bytes_total)}")
+        self.trades = 0
+        self._started = self.clock()
+        self._next_report = self._started + self.interval
+
+    def error(self, line_no: int, error: object, file_path: Optional[Path] = None):
+        where = f"line {line_no}" if file_path is None else f"line {line_no} of {file_path}"
+        self.write(f"❌ Error on {where}: {error}")
+
+    def trade(self, record: ParsedTrade, stats: IngestStats):
+        self.trades += 1
+        self._countdown -= 1
+        if self._countdown:
+            return
+        self._countdown = _CHECK_EVERY
+        now = self.clock()
+        if now >= self._next_report:
+            self._next_report = now + self.interval
+            self.progress(record.offset, stats, now)
+
+    def progress(self, offset: int, stats: IngestStats, now: float):
+        rate = self.trades / (now - self._started) if now > self._started else 0.0
+        if stats.bytes_total:
+            percent = 100 * offset / stats.bytes_total
+            position = f"{format_bytes(offset)}/{format_bytes(stats.bytes_total)} ({percent:.0f}%)"
+        else:
+            position = format_bytes(offset)
+        self.write(f"🔄 Read {position}, {self.trades:,} trades ({rate:,.0f}/s)")
+
+
+class VerboseReporter(ProgressReporter):
+    """Progress plus the full details of every ``every``-th trade."""
+
+    def __init__(self, every: int = 100, interval: float = 2.0, out: Optional[TextIO] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        if every < 1:
+            raise ValueError("every must be at least 1")
+        super().__init__(interval, out, clock)
+        self.every = every
+
+    def trade(self, record: ParsedTrade, stats: IngestStats):
+        super().trade(record, stats)
+        if self.trades % self.every == 0:
+            self.write(format_trade(self.trades, record.trade))
+
+
+class JsonLinesReporter(ProgressReporter):
+    """Progress on the terminal, every trade as a JSON line in ``path``."""
+
+    def __init__(self, path: Path, interval: float = 2.0, out: Optional[TextIO] = None,
+                 clock: Callable[[], float] = time.monotonic, buffer_size: int = 1 << 20):
+        super().__init__(interval, out, clock)
+        self.path = Path(path)
+        self._file = open(self.path, "w", encoding="utf-8", buffering=buffer_size)
+        self._dumps = json.JSONEncoder(ensure_ascii=False).encode
+
+    def trade(self, record: ParsedTrade, stats: IngestStats):
+        super().trade(record, stats)
+        self._file.write(self._dumps({"line_no": record.line_no, **record.data}) + "\n")
+
+    def finish(self, stats: IngestStats, rows_written: int, rows_skipped: int, rows_detached: int = 0):
+        super().finish(stats, rows_written, rows_skipped, rows_detached)
+        self.write(f"📄 Trades written to {self.path}")
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+def format_trade(number: int, trade: Trade) -> str:
+    """Render a trade as the multi-line block used by verbose output."""
+    lines = [
+        f"\n📝 Trade #{number}:",
+        f"   ⏰ {trade.timestamp}",
+        f"   👤 {trade.player_name} ({trade.server})",
+        f"   🏷️  {trade.trade_type.value}",
+    ]
+
+    if trade.items:
+        lines.append("   📦 Items:")
+        for item in trade.items:
+            item_str = f"      • {item.name}"
+            if item.rarity != "common":
+                item_str += f" [{item.rarity.value}]"
+            if item.quality_level:
+                item_str += f" QL:{item.quality_level}"
+            if item.damage:
+                item_str += f" DMG:{item.damage}"
+            if item.weight:
+                item_str += f" WT:{item.weight}"
+            if item.fragment:
+                item_str += f" {item.fragment}"
+            lines.append(item_str)
+            for attr in item.attributes:
+                lines.append(f"        - {attr.name}: {attr.value}")
+
+    if trade.price_amount and trade.price_currency:
+        lines.append(f"   💰 Price: {trade.price_amount} {trade.price_currency.value}")
+
+    lines.append(f"   📄 Message: {trade.message}")
+    lines.append("   " + "─" * 50)
+    return "\n".join(lines)
+
+
+def make_reporter(mode: str, every: int = 100, path: Optional[Path] = None,
+                  interval: float = 2.0) -> Reporter:
+    """Build the reporter for an ``--output`` mode."""
+    if mode == "quiet":
+        return Reporter()
+    if mode == "progress":
+        return ProgressReporter(interval)
+    if mode == "verbose":
+        return VerboseReporter(every, interval)
+    if mode == "jsonl":
+        if path is None:
+            raise ValueError("jsonl output needs a file path")
+        return JsonLinesReporter(path, interval)
+    raise ValueError(f"Unknown output mode: {mode}")
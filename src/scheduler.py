@@ -0,0 +1,229 @@
+"""Ingestion of many log files at once.
+
+``expand_inputs`` turns the command line's files, directories and glob
+patterns into a file list. ``plan_files`` checks each file against the
+``ingested_files`` manifest: a file recorded as done with the same size
+and mtime (or, if only the mtime changed, the same content hash) is
+skipped, so a backfill can be re-run and only new or changed files are
+read. Files left running or failed by an interrupted run are ingested
+again; their trades already stored are recognised as duplicates.
+
+``parse_files`` parses the files' day shards in a process pool, hashing
+each file there too, and yields the files in input order, their trades
+streamed shard by shard, so that one writer in the main process stores
+them. At most ``2 * workers`` shards are held in memory at once.
+"""
+
+import glob
+import hashlib
+import os
+import re
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from src.compression import detect_compression
+from src.parser.trade_parser import FilterMode, TradeParser
+from src.pipeline import (
+    IngestStats, ParsedTrade, buffered, find_shards, merge_shard, parse_lines, parse_shard, read_lines,
+    shard_size_for,
+)
+
+_GLOB_CHARS = frozenset("*?[")
+
+# Names of trade logs, plain or compressed, picked up inside directories
+LOG_NAME = re.compile(r"trade[.-].*\.txt(\.(gz|xz|zst|bz2))?", re.IGNORECASE)
+
+
+class FileJob(NamedTuple):
+    path: Path
+    key: str  # resolved path, the manifest's key
+    size: int
+    mtime: float
+
+
+def expand_inputs(inputs: Sequence[str]) -> List[Path]:
+    """Expand files, directories (recursively) and glob patterns into files.
+
+    Directories and patterns expand in sorted order. Inside a directory
+    only trade logs (``LOG_NAME``, e.g. ``Trade.2025-05.txt.gz``) are taken
+    and hidden paths are ignored; files and patterns named on the command
+    line are taken as they are. A file named twice is kept once. Raises
+    FileNotFoundError for a missing path or a pattern matching nothing.
+    """
+    paths: List[Path] = []
+    for arg in map(str, inputs):
+        if _GLOB_CHARS.intersection(arg):
+            matches = sorted(Path(p) for p in glob.glob(arg, recursive=True) if os.path.isfile(p))
+            if not matches:
+                raise FileNotFoundError(f"No files match {arg}")
+            paths.extend(matches)
+        elif os.path.isdir(arg):
+            paths.extend(sorted(
+                p for p in Path(arg).rglob("*")
+                if LOG_NAME.fullmatch(p.name) and p.is_file()
+                and not any(part.startswith(".") for part in p.relative_to(arg).parts)
+            ))
+        elif os.path.isfile(arg):
+            paths.append(Path(arg))
+        else:
+            raise FileNotFoundError(f"No such file or directory: {arg}")
+    seen = set()
+    unique = []
+    for path in paths:
+        key = path.resolve()
+        if key not in seen:
+            seen.add(key)
+            unique.append(path)
+    return unique
+
+
+def file_digest(path: Path, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's bytes, as stored (compressed or not)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def plan_files(db, paths: Sequence[Path], force: bool = False) -> Tuple[List[FileJob], List[Path]]:
+    """Split ``paths`` into files to ingest and files the manifest shows unchanged.
+
+    A file whose mtime changed but whose size and content hash did not is
+    skipped too, and its manifest entry gets the new mtime. With ``force``
+    every file is ingested. Files that can no longer be found are kept as
+    jobs, so the run records them as failed instead of stopping.
+    """
+    jobs: List[FileJob] = []
+    unchanged: List[Path] = []
+    for path in paths:
+        try:
+            st = path.stat()
+        except OSError:
+            # Gone since it was listed: reading it fails, and is recorded as failed
+            jobs.append(FileJob(path, str(path.resolve()), 0, 0.0))
+            continue
+        job = FileJob(path, str(path.resolve()), st.st_size, st.st_mtime)
+        entry = None if force else db.get_manifest_entry(job.key)
+        if entry is None or entry["status"] != "done" or entry["size"] != job.size:
+            jobs.append(job)
+        elif entry["mtime"] == job.mtime:
+            unchanged.append(path)
+        elif file_digest(path) == entry["content_hash"]:
+            db.save_manifest_entry(
+                job.key, job.size, job.mtime, entry["content_hash"], "done", entry["rows"]
+            )
+            unchanged.append(path)
+        else:
+            jobs.append(job)
+    return jobs, unchanged
+
+
+class ParsedFile(NamedTuple):
+    job: FileJob
+    content_hash: Optional[str]
+    stats: IngestStats
+    records: Iterator[ParsedTrade]  # the file's trades, parsed as they are consumed
+    errors: List[Tuple[int, str]]  # lines that failed to parse, filled in as records are consumed
+    error: Optional[str] = None  # why the file could not be read, if it could not
+
+
+class _Window:
+    """Tasks run ahead in a process pool, at most ``size`` in flight."""
+
+    def __init__(self, pool: ProcessPoolExecutor, tasks: Iterator[Tuple[int, Callable, tuple]], size: int):
+        self.pool = pool
+        self.tasks = tasks
+        self.size = size
+        self.pending: deque = deque()
+
+    def take(self, index: int) -> Iterator[Future]:
+        """Futures of the tasks of file ``index``, in order."""
+        while True:
+            while len(self.pending) < self.size:
+                task = next(self.tasks, None)
+                if task is None:
+                    break
+                task_index, fn, args = task
+                self.pending.append((task_index, self.pool.submit(fn, *args)))
+            if not self.pending or self.pending[0][0] != index:
+                return
+            yield self.pending.popleft()[1]
+
+
+def _shard_records(
+    futures: Iterator[Future], stats: IngestStats, on_error: Callable[[int, str], None]
+) -> Iterator[ParsedTrade]:
+    for future in futures:
+        yield from merge_shard(future.result(), stats, on_error)
+
+
+def _error_sink(errors: List[Tuple[int, str]]) -> Callable[[int, object], None]:
+    return lambda line_no, error: errors.append((line_no, str(error)))
+
+
+def parse_files(
+    jobs: Sequence[FileJob],
+    workers: int,
+    filter_mode: FilterMode = FilterMode.ALL,
+    log_date: Optional[str] = None,
+) -> Iterator[ParsedFile]:
+    """Parse files in a process pool and yield them in order.
+
+    Plain files are split into day shards (see ``find_shards``) and the
+    shards of all files go through one pool, at most ``2 * workers`` in
+    flight, so memory use does not grow with the size of the files. A
+    compressed file cannot be split; it is parsed here, streaming, while
+    the pool works ahead on the following files. Each file's records must
+    be consumed, or abandoned, before the next file is taken.
+
+    ``log_date`` is the date of lines before each file's first day header.
+    """
+    compressed = set()
+    failures: Dict[int, Exception] = {}
+
+    def tasks() -> Iterator[Tuple[int, Callable, tuple]]:
+        for index, job in enumerate(jobs):
+            shards = []
+            try:
+                if detect_compression(job.path) is not None:
+                    compressed.add(index)
+                else:
+                    shards = find_shards(job.path, shard_size_for(job.size, workers))
+            except Exception as e:
+                failures[index] = e
+            yield index, file_digest, (job.path,)
+            for shard in shards:
+                yield index, parse_shard, (job.path, shard, filter_mode, log_date)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        window = _Window(pool, tasks(), 2 * workers)
+        for index, job in enumerate(jobs):
+            futures = window.take(index)
+            errors: List[Tuple[int, str]] = []
+            try:
+                content_hash = next(futures).result()
+                if index in failures:
+                    raise failures[index]
+            except Exception as e:
+                # Unreadable file; the other files go on
+                for future in futures:
+                    future.cancel()
+                yield ParsedFile(job, None, IngestStats(), iter(()), errors, f"{type(e).__name__}: {e}")
+                continue
+            if index in compressed:
+                stats = IngestStats()
+                parser = TradeParser(filter_mode=filter_mode, log_date=log_date)
+                lines = buffered(read_lines(job.path, stats))
+                records = buffered(parse_lines(lines, parser, stats, _error_sink(errors)))
+            else:
+                stats = IngestStats(bytes_total=job.size)
+                records = _shard_records(futures, stats, _error_sink(errors))
+            try:
+                yield ParsedFile(job, content_hash, stats, records, errors)
+            finally:
+                records.close()
+                for future in futures:
+                    future.cancel()
@@ -0,0 +1,90 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+ANALYSIS = {
+    "categories": {"topic": "trade"},
+    "confidence_scores": {"topic": 0.9},
+    "metadata": {"analysis_timestamp": "2025-05-01T00:00:00Z", "model_used": "stub"},
+}
+
+
+class StubAPI:
+    """A local HTTP server standing in for the Anthropic Messages API.
+
+    Every request body is recorded. ``respond`` may be replaced with a
+    function of (request body, call number) returning ``(status, headers,
+    payload)`` or None for a normal analysis reply; ``delay`` slows replies.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.delay = 0.0
+        self.respond = lambda body, call: None
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with stub._lock:
+                    stub.requests.append(body)
+                    call = len(stub.requests)
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                try:
+                    if stub.delay:
+                        time.sleep(stub.delay)
+                    status, headers, payload = stub.respond(body, call) or (200, {}, stub.message(body, call))
+                    data = json.dumps(payload).encode()
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    @staticmethod
+    def message(body, call):
+        return {
+            "id": f"msg_{call}",
+            "type": "message",
+            "role": "assistant",
+            "model": body["model"],
+            "content": [{"type": "text", "text": json.dumps(ANALYSIS)}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {"input_tokens": 12, "output_tokens": 34},
+        }
+
+    @staticmethod
+    def error(message="error"):
+        return {"type": "error", "error": {"type": "api_error", "message": message}}
+
+
+@pytest.fixture
+def stub_api():
+    stub = StubAPI()
+    thread = threading.Thread(target=stub.server.serve_forever, daemon=True)
+    thread.start()
+    yield stub
+    stub.server.shutdown()
+    stub.server.server_close()
@@ -0,0 +1,145 @@
+import pytest
+
+from src.database import database
+from src.database.cache import QueryCache
+from src.database.database import Database
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Create a file-backed test database with a query cache."""
+    return Database(str(tmp_path / "trades.db"), cache_size=8, cache_ttl=60)
+
+
+def make_trade(i: int) -> dict:
+    return {
+        "timestamp": f"00:00:{i:02d}",
+        "player_name": f"Player{i}",
+        "server": "Cadence",
+        "trade_type": "WTS",
+        "message": f"WTS sleep powder {i}s",
+        "items": [],
+        "price_amount": float(i),
+        "price_currency": "silver",
+        "log_date": "2025-05-01",
+    }
+
+
+def test_lru_eviction_and_counters():
+    cache = QueryCache(max_entries=2)
+    loads = []
+
+    def load(key):
+        return cache.get_or_load(key, ["t"], lambda: loads.append(key) or key)
+
+    load("a")
+    load("b")
+    load("a")  # "b" is now least recently used
+    load("c")
+    assert loads == ["a", "b", "c"]
+    load("a")
+    load("b")
+    assert loads == ["a", "b", "c", "b"]
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 4
+    assert cache.stats()["evictions"] == 2
+
+
+def test_ttl_expiry():
+    clock = FakeClock()
+    cache = QueryCache(max_entries=4, ttl=10, clock=clock)
+    cache.get_or_load("k", [], lambda: 1)
+    clock.now = 9
+    assert cache.get_or_load("k", [], lambda: 2) == 1
+    clock.now = 10
+    assert cache.get_or_load("k", [], lambda: 3) == 3
+    assert cache.stats()["expirations"] == 1
+
+
+def test_invalidate_by_tag():
+    cache = QueryCache()
+    cache.get_or_load("a", ["analyses"], lambda: 1)
+    cache.get_or_load("t", ["trades"], lambda: 2)
+    cache.invalidate("trades")
+    assert len(cache) == 1
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_load_racing_an_invalidation_is_not_stored():
+    cache = QueryCache()
+
+    def load():
+        cache.invalidate("trades")  # a write lands while the query runs
+        return "stale"
+
+    assert cache.get_or_load("k", ["trades"], load) == "stale"
+    assert len(cache) == 0
+    assert cache.get_or_load("k", ["trades"], lambda: "fresh") == "fresh"
+    assert cache.get_or_load("k", ["trades"], lambda: "reloaded") == "fresh"
+
+    # Writes to other tables do not stop the result being cached
+    assert cache.get_or_load("a", ["analyses"], lambda: cache.invalidate("trades") or 1) == 1
+    assert cache.get_or_load("a", ["analyses"], lambda: 2) == 1
+
+
+def test_reads_are_cached_until_a_write(db):
+    db.store_analysis("rare iron pickaxe", {"kind": "wts"})
+    first = db.get_recent_analyses()
+    assert db.get_recent_analyses() == first
+    assert db.cache_stats()["hits"] == 1
+
+    db.store_analysis("sleep powder", {"kind": "wtb"})
+    assert len(db.get_recent_analyses()) == 2
+    assert db.search_analyses("pickaxe")[0].text_content == "rare iron pickaxe"
+
+
+def test_trade_writes_invalidate_trade_queries(db, monkeypatch):
+    with db.writer() as writer:
+        writer.add(make_trade(1))
+    assert len(db.find_trades()) == 1
+    analyses = db.get_recent_analyses()
+
+    with db.writer() as writer:
+        writer.add(make_trade(2))
+    assert len(db.find_trades()) == 2
+
+    monkeypatch.setattr(database, "_db", db)
+    database.add_trade(make_trade(3))
+    assert len(db.find_trades()) == 3
+    # Trade writes leave analysis results cached
+    hits = db.cache_stats()["hits"]
+    assert db.get_recent_analyses() == analyses
+    assert db.cache_stats()["hits"] == hits + 1
+
+
+def test_equivalent_calls_share_an_entry(db):
+    db.find_trades("Player1")
+    db.find_trades(player_name="Player1")
+    db.find_trades("Player1", None, limit=None)
+    assert db.cache_stats()["misses"] == 1 and db.cache_stats()["hits"] == 2
+    with pytest.raises(TypeError):
+        db.find_trades(nickname="Player1")
+
+
+def test_cached_lists_are_copies(db):
+    with db.writer() as writer:
+        writer.add(make_trade(1))
+    db.find_trades().clear()
+    assert len(db.find_trades()) == 1
+    db.search_trades("sleep")[0]["player_name"] = "Changed"
+    assert db.search_trades("sleep")[0]["player_name"] == "Player1"
+
+
+def test_cache_is_off_by_default(tmp_path):
+    db = Database(str(tmp_path / "plain.db"))
+    assert db.cache is None
+    assert db.cache_stats() is None
+    assert db.find_trades() == []
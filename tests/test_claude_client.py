@@ -0,0 +1,141 @@
+import asyncio
+import time
+
+import pytest
+
+from src.metrics import METRICS
+from src.parser.claude_client import ClaudeClient
+from src.parser.rate_limiter import RateLimiter, TokenBucket
+from tests.conftest import ANALYSIS, StubAPI
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.now += seconds
+
+
+def make_client(stub_api, **kwargs):
+    kwargs.setdefault("backoff_base", 0.01)
+    return ClaudeClient(api_key="test-key", base_url=stub_api.url, **kwargs)
+
+
+def test_token_bucket_refills_over_time():
+    clock = FakeClock()
+    bucket = TokenBucket(60, clock)
+    assert bucket.delay(60) == 0
+    bucket.take(60)
+    assert bucket.delay(1) == pytest.approx(1.0)
+    clock.now = 30
+    assert bucket.delay(30) == 0
+    # Bigger than the bucket: wait for a full one
+    assert bucket.delay(1000) == pytest.approx(30.0)
+
+
+def test_rate_limiter_spaces_requests():
+    clock = FakeClock()
+    limiter = RateLimiter(requests_per_minute=120, clock=clock, sleep=clock.sleep)
+
+    async def run():
+        return [await limiter.acquire() for _ in range(125)]
+
+    waits = asyncio.run(run())
+    assert waits[:120] == [0.0] * 120
+    assert waits[120:] == [pytest.approx(0.5)] * 5
+    assert clock.now == pytest.approx(2.5)
+
+
+def test_rate_limiter_settles_token_usage():
+    clock = FakeClock()
+    limiter = RateLimiter(tokens_per_minute=600, clock=clock, sleep=clock.sleep)
+
+    async def run():
+        await limiter.acquire(100)
+        limiter.settle(100, 700)  # used more than reserved: 100 tokens of debt
+        return await limiter.acquire(50)
+
+    assert asyncio.run(run()) == pytest.approx(15.0)
+
+
+def test_batch_keeps_window_full_and_order(stub_api):
+    stub_api.delay = 0.05
+    client = make_client(stub_api)
+    texts = [f"WTS item {i}" for i in range(12)]
+    outcomes = asyncio.run(client.batch_analyze(texts, ["topic"], batch_size=4))
+
+    assert [o.text for o in outcomes] == texts
+    assert all(o.ok and o.result == ANALYSIS for o in outcomes)
+    assert stub_api.max_in_flight == 4
+    assert len(stub_api.requests) == 12
+
+
+def test_batch_reports_failures_per_item(stub_api):
+    def respond(body, call):
+        if "bad" in body["messages"][0]["content"]:
+            return 400, {}, StubAPI.error("invalid request")
+    stub_api.respond = respond
+    client = make_client(stub_api)
+    outcomes = asyncio.run(client.batch_analyze(["WTS good", "WTS bad", "WTB good"], ["topic"]))
+
+    assert [o.ok for o in outcomes] == [True, False, True]
+    assert "invalid request" in str(outcomes[1].error)
+    # Client errors are not retried
+    assert len(stub_api.requests) == 3
+
+
+def test_retries_rate_limits_and_server_errors(stub_api):
+    def respond(body, call):
+        if call == 1:
+            return 429, {"retry-after": "0"}, StubAPI.error("slow down")
+        if call == 2:
+            return 529, {}, StubAPI.error("overloaded")
+    stub_api.respond = respond
+    METRICS.reset()
+    METRICS.enable()
+    try:
+        result = asyncio.run(make_client(stub_api).analyze_text("WTS lump", ["topic"]))
+        counters = METRICS.snapshot()["counters"]
+    finally:
+        METRICS.disable()
+        METRICS.reset()
+
+    assert result == ANALYSIS
+    assert len(stub_api.requests) == 3
+    assert counters["llm.retries"] == 2
+    assert counters["llm.requests"] == 3
+
+
+def test_instructions_go_in_a_cached_system_block(stub_api):
+    client = make_client(stub_api)
+    asyncio.run(client.analyze_text("WTS lump", ["topic"]))
+    system, = stub_api.requests[0]["system"]
+    assert "JSON format" in system["text"] and "cache_control" not in system
+    assert "WTS lump" in stub_api.requests[0]["messages"][0]["content"]
+    assert "JSON format" not in stub_api.requests[0]["messages"][0]["content"]
+
+    asyncio.run(client.analyze_text("WTS lump", ["topic"], system_prompt="Rules. " * 700))
+    assert stub_api.requests[1]["system"][0]["cache_control"] == {"type": "ephemeral"}
+
+
+def test_gives_up_after_retry_attempts(stub_api):
+    stub_api.respond = lambda body, call: (500, {}, StubAPI.error("boom"))
+    client = make_client(stub_api, retry_attempts=2)
+    with pytest.raises(Exception, match="boom"):
+        asyncio.run(client.analyze_text("WTS lump", ["topic"]))
+    assert len(stub_api.requests) == 3
+
+
+def test_timeout_is_retried(stub_api):
+    def respond(body, call):
+        if call == 1:
+            time.sleep(0.5)
+    stub_api.respond = respond
+    client = make_client(stub_api, timeout=0.2, retry_attempts=1)
+    assert asyncio.run(client.analyze_text("WTS lump", ["topic"])) == ANALYSIS
+    assert len(stub_api.requests) == 2
+
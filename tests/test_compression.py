@@ -0,0 +1,68 @@
+import bz2
+import gzip
+import lzma
+
+import pytest
+import zstandard
+
+from src.compression import detect_compression
+from src.parser.trade_parser import TradeParser
+from src.pipeline import IngestStats, read_lines, stream_trades
+
+LOG = (
+    "Logging started 2025-05-01\n"
+    "[00:19:24] <Valentyan> (Cad) WTB 100+C skiller pickaxe\n"
+    "[15:23:26] <System> This is the Trade channel.\n"
+    "\n"
+    "[01:02:27] <Muttleyita> (Har) WTS  [rare iron horse shoe QL:90.1003 DMG:0.0 WT:0.5 ] 10s\n"
+).encode("utf-8")
+
+COMPRESSORS = {
+    "gzip": gzip.compress,
+    "xz": lzma.compress,
+    "zstd": zstandard.ZstdCompressor().compress,
+    "bzip2": bz2.compress,
+}
+
+
+@pytest.fixture(params=sorted(COMPRESSORS))
+def archive(request, tmp_path):
+    # No telling extension: the format comes from the magic bytes
+    path = tmp_path / "Trade.2025-05.log"
+    path.write_bytes(COMPRESSORS[request.param](LOG))
+    return request.param, path
+
+
+def test_detect_compression(archive, tmp_path):
+    compression, path = archive
+    assert detect_compression(path) == compression
+    plain = tmp_path / "plain.txt"
+    plain.write_bytes(LOG)
+    assert detect_compression(plain) is None
+
+
+def test_compressed_lines_match_plain(archive, tmp_path):
+    _, path = archive
+    plain = tmp_path / "plain.txt"
+    plain.write_bytes(LOG)
+    plain_stats, stats = IngestStats(), IngestStats()
+
+    assert list(read_lines(path, stats)) == list(read_lines(plain, plain_stats))
+    assert stats.lines == plain_stats.lines == 4
+    assert stats.bytes_read == len(LOG)
+
+
+def test_compressed_stream_trades(archive):
+    _, path = archive
+    stats = IngestStats()
+    records = list(stream_trades(path, TradeParser(), stats, queue_size=2))
+
+    assert [r.trade.player_name for r in records] == ["Valentyan", "Muttleyita"]
+    assert records[0].trade.log_date == "2025-05-01"
+    assert stats.bytes_total == 0  # decompressed size is unknown up front
+
+
+def test_compressed_logs_cannot_be_read_from_an_offset(archive):
+    _, path = archive
+    with pytest.raises(ValueError, match="from the start"):
+        list(read_lines(path, IngestStats(), start=10))
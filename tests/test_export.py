@@ -0,0 +1,103 @@
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+import pytest
+
+from src.database.database import Database
+from src.export import export_database
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(str(tmp_path / "trades.db"))
+    with db.writer() as writer:
+        for i, day in enumerate(["2025-05-01", "2025-05-01", "2025-05-02", None]):
+            writer.add({
+                "timestamp": f"00:00:{i:02d}",
+                "player_name": f"Player{i}",
+                "server": "Cadence" if i % 2 else "Harmony",
+                "trade_type": "WTS",
+                "message": f"WTS [rare iron pickaxe QL:96.0 DMG:0.0 WT:2.0 WoA 89] {i + 1}s",
+                "items": [{
+                    "name": "iron pickaxe", "rarity": "rare", "quality_level": 96.0, "weight": 2.0,
+                    "damage": 0.0, "attributes": [{"name": "WoA", "value": "89"}], "fragment": None,
+                }],
+                "price_amount": float(i + 1),
+                "price_currency": "silver",
+                "log_date": day,
+            })
+    return db
+
+
+def test_export_parquet_tables(db, tmp_path):
+    out = tmp_path / "out"
+    counts = export_database(db, out, row_group_size=3)
+    assert counts == {"trades": 4, "items": 4, "item_attributes": 4, "item_traits": 0}
+
+    trades = pq.ParquetFile(out / "trades.parquet")
+    assert trades.metadata.num_row_groups == 2
+    table = trades.read()
+    assert "content_hash" not in table.column_names
+    assert table.schema.field("server").type == pa.dictionary(pa.int8(), pa.string())
+    assert table.column("server").to_pylist() == ["Harmony", "Cadence", "Harmony", "Cadence"]
+    assert table.column("price_currency").to_pylist() == ["silver"] * 4
+    assert table.column("log_date").to_pylist() == ["2025-05-01", "2025-05-01", "2025-05-02", None]
+
+    items = pq.read_table(out / "items.parquet")
+    assert items.column("rarity").to_pylist() == ["rare"] * 4
+    assert items.column("quality_level").to_pylist() == [96.0] * 4
+    attributes = pq.read_table(out / "item_attributes.parquet").to_pylist()
+    assert attributes[0]["attribute_name"] == "WoA" and attributes[0]["attribute_value"] == "89"
+    # Empty tables still get a file with the schema
+    assert pq.read_table(out / "item_traits.parquet").num_rows == 0
+
+
+def test_export_arrow_ipc(db, tmp_path):
+    out = tmp_path / "out"
+    export_database(db, out, fmt="arrow", row_group_size=1)
+    reader = ipc.open_file(out / "trades.arrow")
+    assert reader.num_record_batches == 4
+    assert reader.read_all().column("player_name").to_pylist() == [f"Player{i}" for i in range(4)]
+
+
+def test_export_partitioned_by_day(db, tmp_path):
+    out = tmp_path / "out"
+    export_database(db, out, partition_by_day=True)
+    days = sorted(path.name for path in (out / "trades").iterdir())
+    assert days == ["log_date=2025-05-01", "log_date=2025-05-02", "log_date=__HIVE_DEFAULT_PARTITION__"]
+    assert not (out / "item_traits").exists()
+
+    day = pq.read_table(out / "items" / "log_date=2025-05-01" / "part-0.parquet")
+    assert day.num_rows == 2
+    trades = ds.dataset(out / "trades", format="parquet", partitioning="hive").to_table()
+    assert trades.num_rows == 4
+    # The log date comes from the directories only, so plain readers merge the files
+    trades = pq.read_table(out / "trades")
+    assert sorted(trades.column("log_date").cast(pa.string()).to_pylist(), key=str) == [
+        "2025-05-01", "2025-05-01", "2025-05-02", None
+    ]
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_export_without_compression(db, tmp_path, fmt):
+    out = tmp_path / "out"
+    export_database(db, out, fmt=fmt, compression="none")
+    assert (out / f"trades.{fmt}").exists()
+
+
+def test_export_rejects_codecs_the_format_cannot_write(db, tmp_path):
+    with pytest.raises(ValueError):
+        export_database(db, tmp_path / "out", fmt="arrow", compression="snappy")
+
+
+def test_export_rejects_unknown_format(db, tmp_path):
+    with pytest.raises(ValueError):
+        export_database(db, tmp_path / "out", fmt="csv")
+
+
+def test_export_rejects_values_outside_an_enum(db, tmp_path):
+    with db.engine.begin() as conn:
+        conn.exec_driver_sql("UPDATE trades SET server = 'Zork' WHERE id = 1")
+    with pytest.raises(ValueError, match="Zork"):
+        export_database(db, tmp_path / "out")
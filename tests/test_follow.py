@@ -0,0 +1,119 @@
+import os
+
+import pytest
+
+from src.database.database import Database
+from src.follow import LogFollower
+
+DAY = "Logging started 2025-05-01\n"
+TRADE = "[00:19:24] <Valentyan> (Cad) WTB 100+C skiller pickaxe\n"
+
+
+def collect(follower, steps):
+    """Follow until every idle step has run, returning the yielded texts."""
+    steps = iter(steps)
+
+    def on_idle():
+        step = next(steps, None)
+        if step is None:
+            follower.stop()
+        else:
+            step()
+
+    follower.on_idle = on_idle
+    return [line.text for line in follower.lines()]
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    return tmp_path / "Trade.log"
+
+
+def append(path, text):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_follow_reads_appended_complete_lines(log_path):
+    log_path.write_text(DAY + TRADE, encoding="utf-8")
+    follower = LogFollower(log_path, poll_interval=0)
+
+    texts = collect(follower, [
+        lambda: append(log_path, "[00:20:00] <Sophon> (Cad) WTS"),
+        lambda: append(log_path, " [rare straw easter basket]\n"),
+    ])
+
+    assert texts == [DAY.strip(), TRADE.strip(), "[00:20:00] <Sophon> (Cad) WTS [rare straw easter basket]"]
+    assert follower.offset == log_path.stat().st_size
+    assert follower.log_date == "2025-05-01"
+
+
+def test_follow_restarts_after_truncation(log_path):
+    log_path.write_text(DAY + TRADE, encoding="utf-8")
+    follower = LogFollower(log_path, poll_interval=0)
+
+    texts = collect(follower, [lambda: log_path.write_text(TRADE, encoding="utf-8")])
+
+    assert texts == [DAY.strip(), TRADE.strip(), TRADE.strip()]
+    assert follower.offset == len(TRADE)
+
+
+def test_follow_switches_to_rotated_file(log_path):
+    log_path.write_text(DAY + TRADE, encoding="utf-8")
+    follower = LogFollower(log_path, poll_interval=0)
+
+    def rotate():
+        os.rename(log_path, log_path.with_suffix(".1"))
+        log_path.write_text("Logging started 2025-05-02\n", encoding="utf-8")
+
+    texts = collect(follower, [rotate])
+
+    assert texts[-1] == "Logging started 2025-05-02"
+    assert follower.log_date == "2025-05-02"
+
+
+def test_resume_from_checkpoint(tmp_path, log_path):
+    log_path.write_text(DAY + TRADE, encoding="utf-8")
+    db = Database(str(tmp_path / "trades.db"))
+
+    follower = LogFollower(log_path, poll_interval=0)
+    collect(follower, [])
+    device, inode = follower.identity
+    db.save_checkpoint(str(log_path), device, inode, follower.offset, follower.log_date)
+
+    append(log_path, TRADE)
+    resumed = LogFollower.from_checkpoint(log_path, db.get_checkpoint(str(log_path)), poll_interval=0)
+
+    assert resumed.log_date == "2025-05-01"
+    assert collect(resumed, []) == [TRADE.strip()]
+
+
+def test_checkpoint_recovers_log_date_from_file(log_path):
+    log_path.write_text(DAY + TRADE, encoding="utf-8")
+    st = log_path.stat()
+    checkpoint = {"device": st.st_dev, "inode": st.st_ino, "offset": len(DAY), "log_date": None}
+
+    follower = LogFollower.from_checkpoint(log_path, checkpoint)
+
+    assert follower.offset == len(DAY)
+    assert follower.log_date == "2025-05-01"
+
+
+def test_checkpoint_ignored_when_offset_is_mid_line(log_path):
+    log_path.write_text(DAY + TRADE, encoding="utf-8")
+    st = log_path.stat()
+    checkpoint = {"device": st.st_dev, "inode": st.st_ino, "offset": len(DAY) + 5, "log_date": "2025-05-01"}
+
+    follower = LogFollower.from_checkpoint(log_path, checkpoint)
+
+    assert follower.offset == 0
+
+
+def test_checkpoint_ignored_for_different_file(tmp_path, log_path):
+    log_path.write_text(DAY + TRADE, encoding="utf-8")
+    checkpoint = {"device": -1, "inode": -1, "offset": 10, "log_date": "2025-04-30"}
+
+    follower = LogFollower.from_checkpoint(log_path, checkpoint)
+
+    assert follower.offset == 0
+    assert follower.log_date is None
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from src.analysis.frame import TradeFrame, to_records
+from src.parser.trade_parser import TradeParser
+
+LINES = [
+    "Logging started 2025-05-01",
+    "[01:00:00] <Ann> (Cad) WTS [rare iron pickaxe QL:96.0 DMG:0.0 WT:2.0 ] 10s",
+    "[02:00:00] <Bob> (Cad) WTS [rare iron pickaxe QL:90.0 DMG:0.0 WT:2.0 ] 20s",
+    "[03:00:00] <Cid> (Cad) WTS [rare iron pickaxe QL:80.0 DMG:0.0 WT:2.0 ] 1g",
+    "[04:00:00] <Ann> (Har) WTS [rare iron pickaxe QL:70.0 DMG:0.0 WT:2.0 ] 50c",
+    "[05:00:00] <Dee> (Har) WTS [common iron hammer QL:50.0 DMG:0.0 WT:1.0 ][common iron anvil QL:50.0 DMG:0.0 WT:5.0 ] 5s",
+    "[06:00:00] <Eve> (Mel) WTB pickaxe",
+]
+
+
+@pytest.fixture
+def frame():
+    parser = TradeParser()
+    trades = [t for t in map(parser.parse_line, LINES) if t]
+    return TradeFrame.from_trades(trades)
+
+
+def test_columns(frame):
+    assert len(frame) == 6
+    assert frame.item_count == 6
+    assert list(frame.item_offsets) == [0, 1, 2, 3, 4, 6, 6]
+    assert list(frame.item_trade) == [0, 1, 2, 3, 4, 4]
+    assert frame.timestamp[0] == 1746057600 + 3600  # 2025-05-01 01:00:00 UTC
+    assert list(frame.server.decode()) == ["Cadence"] * 3 + ["Harmony"] * 2 + ["Melody"]
+    assert np.isnan(frame.price_amount[-1])
+    assert list(frame.price_silver[:4]) == [10.0, 20.0, 100.0, 0.5]
+
+
+def test_item_prices_only_for_single_item_trades(frame):
+    prices = frame.item_price_silver()
+    assert list(prices[:4]) == [10.0, 20.0, 100.0, 0.5]
+    assert np.isnan(prices[4:]).all()
+
+
+def test_items_where(frame):
+    mask = frame.items_where(rarity="rare", server="Cadence")
+    assert list(np.flatnonzero(mask)) == [0, 1, 2]
+    assert frame.items_where(server=["Harmony", "Melody"]).sum() == 3
+    assert frame.items_where(item_name="no such item").sum() == 0
+
+
+def test_median_price_per_item_and_server(frame):
+    result = to_records(frame.group_items(["item_name", "server"], agg="median"))
+
+    assert result == [
+        {"item_name": "iron pickaxe", "server": "Cadence", "median": 20.0},
+        {"item_name": "iron pickaxe", "server": "Harmony", "median": 0.5},
+    ]
+
+
+@pytest.mark.parametrize("agg, expected", [
+    ("count", 3.0), ("sum", 130.0), ("mean", 130.0 / 3), ("min", 10.0), ("max", 100.0),
+])
+def test_group_aggregations(frame, agg, expected):
+    mask = frame.items_where(server="Cadence")
+    result = frame.group_items(["item_name"], agg=agg, mask=mask)
+    assert result[agg][0] == pytest.approx(expected)
+
+
+def test_unknown_aggregation(frame):
+    with pytest.raises(ValueError):
+        frame.group_items(["server"], agg="mode")
@@ -0,0 +1,38 @@
+from pathlib import Path
+
+from benchmarks.loggen import ITEM, PRICE, LogGenerator, LogModel
+from src.parser.trade_parser import TradeParser
+
+SAMPLE = Path("data/trade-2025-05--small.txt")
+
+
+def test_model_cuts_items_and_prices_out_of_templates():
+    model = LogModel.from_log(SAMPLE)
+    assert model.templates and model.items and model.prices
+    assert len(model.players) == len(model.servers) == len(model.templates)
+    assert any(ITEM in t for t in model.templates)
+    assert any(PRICE in t for t in model.templates)
+
+
+def test_generated_log_has_days_and_parses(tmp_path):
+    path = tmp_path / "gen.txt"
+    written = LogGenerator(LogModel.from_log(SAMPLE), seed=7).write(path, lines=500, days=5)
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert written == len(lines) == 505
+    assert [l for l in lines if l.startswith("Logging started")] == [
+        f"Logging started 2025-05-0{d}" for d in range(1, 6)
+    ]
+
+    parser = TradeParser()
+    trades = [t for t in map(parser.parse_line, lines) if t is not None]
+    assert trades
+    assert trades[-1].log_date == "2025-05-05"
+    assert any(t.items for t in trades)
+    assert any(t.price_amount is not None for t in trades)
+
+
+def test_same_seed_same_log(tmp_path):
+    model = LogModel.from_log(SAMPLE)
+    LogGenerator(model, seed=3).write(tmp_path / "a.txt", lines=200)
+    LogGenerator(model, seed=3).write(tmp_path / "b.txt", lines=200)
+    assert (tmp_path / "a.txt").read_text() == (tmp_path / "b.txt").read_text()
@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+from src.database.database import Database
+from src.metrics import Histogram, Metrics
+from src.parser.trade_parser import TradeParser
+from src.pipeline import IngestStats, LogLine, parse_lines
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """Enable a fresh process-wide registry for one test."""
+    fresh = Metrics(enabled=True)
+    for module in ("src.metrics", "src.pipeline", "src.database.database"):
+        monkeypatch.setattr(f"{module}.METRICS", fresh)
+    return fresh
+
+
+def test_disabled_registry_records_nothing():
+    registry = Metrics()
+    registry.incr("lines")
+    with registry.timer("stage"):
+        pass
+    parser = TradeParser()
+    registry.instrument(parser, "parse_line", "parser.parse_line")
+    assert "parse_line" not in vars(parser)
+    assert registry.snapshot() == {"counters": {}, "stages": {}}
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram(bounds=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+    assert histogram.cumulative() == [("0.1", 2), ("1.0", 3), ("+Inf", 4)]
+    assert histogram.count == 4
+    assert histogram.max == 3.0
+
+
+def test_timers_and_instrumented_methods():
+    registry = Metrics(enabled=True)
+    with registry.timer("block"):
+        pass
+    parser = TradeParser()
+    registry.instrument(parser, "_scan_message", "parser.scan_message")
+    parser.parse_line("[01:02:27] <Muttleyita> (Har) WTS [rare iron horse shoe QL:90.1 DMG:0.0 WT:0.5 ] 10s")
+    stages = registry.snapshot()["stages"]
+    assert stages["block"]["count"] == 1
+    assert stages["parser.scan_message"]["count"] == 1
+    assert stages["parser.scan_message"]["total_seconds"] > 0
+
+
+def test_pipeline_and_writer_counters(registry, tmp_path):
+    lines = [
+        LogLine(1, 0, "Logging started 2025-05-01"),
+        LogLine(2, 0, "[01:02:27] <Muttleyita> (Har) WTS [rare iron horse shoe QL:90.1 DMG:0.0 WT:0.5 WoA 80] 10s"),
+        LogLine(3, 0, "[01:03:49] <Kamirazh> (Cad) PC 1k of roasting dishes to buy."),
+    ]
+    records = list(parse_lines(lines, TradeParser(), IngestStats()))
+    db = Database(str(tmp_path / "trades.db"))
+    with db.writer() as writer:
+        for record in records * 2:
+            writer.add(record.data)
+
+    counters = registry.snapshot()["counters"]
+    assert counters["parser.lines_matched"] == 2
+    assert counters["parser.lines_rejected"] == 1
+    assert counters["parser.items"] == 1
+    assert counters["parser.attributes"] == 1
+    assert counters["db.rows_written"] == 2
+    assert counters["db.rows_skipped"] == 2
+    assert counters["db.batches"] == 1
+    assert registry.snapshot()["stages"]["db.flush"]["count"] == 1
+
+
+def test_render_formats():
+    registry = Metrics(enabled=True)
+    registry.incr("db.rows_written", 3)
+    registry.observe("db.flush", 0.002)
+    assert json.loads(registry.render("json"))["counters"] == {"db.rows_written": 3}
+    text = registry.render("prometheus")
+    assert "tradebot_db_rows_written_total 3" in text
+    assert 'tradebot_stage_seconds_bucket{stage="db.flush",le="0.005"} 1' in text
+    assert 'tradebot_stage_seconds_count{stage="db.flush"} 1' in text
+    with pytest.raises(ValueError):
+        registry.render("xml")
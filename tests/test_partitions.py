@@ -0,0 +1,180 @@
+import os
+import sqlite3
+
+import pytest
+
+from src.database.database import Database
+from src.database.partitions import archives_for, month_bounds
+from src.models import Item, ItemAttribute, PriceSummary, Trade
+
+
+@pytest.fixture
+def db(tmp_path):
+    return Database(str(tmp_path / "trades.db"))
+
+
+def make_trade(i: int, log_date: str) -> dict:
+    return {
+        "timestamp": f"00:00:{i % 60:02d}",
+        "player_name": f"Player{i}",
+        "server": "Cadence",
+        "trade_type": "WTS",
+        "message": f"WTS [rare iron pickaxe QL:96.0 DMG:0.0 WT:2.0 WoA 89] {i}s",
+        "items": [{
+            "name": "iron pickaxe", "rarity": "rare", "quality_level": 96.0, "weight": 2.0,
+            "damage": 0.0, "attributes": [{"name": "WoA", "value": "89"}], "fragment": None,
+        }],
+        "price_amount": float(i + 1),
+        "price_currency": "silver",
+        "log_date": log_date,
+    }
+
+
+def fill(db):
+    with db.writer() as writer:
+        for i, day in enumerate(["2025-04-29", "2025-04-30", "2025-05-01", "2025-05-02", "2025-05-02", None]):
+            writer.add(make_trade(i, day))
+
+
+def count(db, model):
+    with db.get_session() as session:
+        return session.query(model).count()
+
+
+def test_month_bounds():
+    assert month_bounds("2025-05") == ("2025-05-01", "2025-06-01")
+    assert month_bounds("2024-12") == ("2024-12-01", "2025-01-01")
+    for bad in ("2025-13", "2025-5", "May 2025"):
+        with pytest.raises(ValueError):
+            month_bounds(bad)
+
+
+def test_partitions_list_months(db):
+    fill(db)
+    assert db.partitions() == [
+        {"month": "2025-04", "trades": 2, "first_day": "2025-04-29", "last_day": "2025-04-30"},
+        {"month": "2025-05", "trades": 3, "first_day": "2025-05-01", "last_day": "2025-05-02"},
+    ]
+
+
+def test_date_range_queries_use_the_log_date_index(db):
+    with db.engine.connect() as conn:
+        plan = " ".join(
+            str(row[-1]) for row in conn.exec_driver_sql(
+                "EXPLAIN QUERY PLAN SELECT * FROM trades WHERE log_date >= ? AND log_date <= ?",
+                ("2025-05-01", "2025-05-07"),
+            )
+        )
+    assert "ix_trades_log_date" in plan
+
+
+def test_detach_month_moves_rows_to_archive(db, tmp_path):
+    fill(db)
+    assert len(db.search_trades("0s")) == 1
+    archive_path = str(tmp_path / "2025-04.db")
+    moved = db.detach_month("2025-04", archive_path)
+
+    assert moved["trades"] == 2 and moved["items"] == 2 and moved["item_attributes"] == 2
+    assert moved["price_summaries"] == 2
+    assert [p["month"] for p in db.partitions()] == ["2025-05"]
+    assert count(db, Trade) == 4  # May plus the undated trade
+    assert count(db, Item) == 4 and count(db, ItemAttribute) == 4
+    assert count(db, PriceSummary) == 2
+
+    archive = Database(archive_path)
+    assert [p["month"] for p in archive.partitions()] == ["2025-04"]
+    assert [t["player_name"] for t in archive.find_trades()] == ["Player0", "Player1"]
+    assert len(archive.find_items(name="iron pickaxe")) == 2
+    assert count(archive, ItemAttribute) == 2
+    assert len(archive.search_trades("1s")) == 1
+    assert archive.price_summary("iron pickaxe", "rare", "Cadence", "2025-04-30")["count"] == 1
+
+
+def test_detaching_an_empty_month_is_a_no_op(db, tmp_path):
+    fill(db)
+    moved = db.detach_month("2024-01", str(tmp_path / "empty.db"))
+    assert set(moved.values()) == {0}
+    assert count(db, Trade) == 6
+
+
+def test_queries_route_to_archives_of_detached_months(db, tmp_path):
+    fill(db)
+    archive_path = str(tmp_path / "archive.db")
+    db.detach_month("2025-04", archive_path)
+
+    with db.engine.connect() as conn:
+        assert archives_for(conn, "2025-04-30", "2025-05-06") == [archive_path]
+        assert archives_for(conn, "2025-05-01", "2025-05-07") == []
+        assert archives_for(conn) == [archive_path]
+    assert [t["player_name"] for t in db.find_trades(since="2025-04-30")] == [
+        "Player1", "Player2", "Player3", "Player4"
+    ]
+    assert [t["log_date"] for t in db.find_trades(limit=3)] == [None, "2025-04-29", "2025-04-30"]
+    assert len(db.find_items(name="iron pickaxe", until="2025-04-30")) == 2
+    assert [t["player_name"] for t in db.search_trades("0s")] == ["Player0"]
+
+
+def test_months_share_an_archive_after_ids_are_reused(db, tmp_path):
+    archive_path = str(tmp_path / "archive.db")
+    with db.writer() as writer:
+        writer.add(make_trade(0, "2025-05-01"))
+    db.detach_month("2025-05", archive_path)
+    with db.writer() as writer:
+        writer.add(make_trade(1, "2025-06-01"))
+    db.detach_month("2025-06", archive_path)
+
+    archive = Database(archive_path)
+    trades = archive.find_trades()
+    assert [t["log_date"] for t in trades] == ["2025-05-01", "2025-06-01"]
+    items = archive.find_items(name="iron pickaxe")
+    assert [item["trade_id"] for item in items] == [t["id"] for t in trades]
+    assert count(archive, ItemAttribute) == 2 and count(archive, PriceSummary) == 2
+
+
+def test_reingesting_a_detached_month_stores_nothing(db, tmp_path):
+    fill(db)
+    archive_path = str(tmp_path / "archive.db")
+    db.detach_month("2025-04", archive_path)
+    with db.writer() as writer:
+        for i, day in enumerate(["2025-04-29", "2025-04-30"]):
+            writer.add(make_trade(i, day))
+    assert writer.rows_written == 0 and writer.rows_skipped == 0 and writer.rows_detached == 2
+    assert count(db, Trade) == 4
+    assert len(db.find_trades(since="2025-04-01", until="2025-04-30")) == 2
+
+    with pytest.raises(ValueError):
+        db.detach_month("2025-04", str(tmp_path / "other.db"))
+
+
+def test_search_ranks_within_each_partition(db, tmp_path):
+    fill(db)
+    db.detach_month("2025-04", str(tmp_path / "2025-04.db"))
+    with db.writer() as writer:
+        writer.add(make_trade(9, "2025-06-01"))
+    db.detach_month("2025-05", str(tmp_path / "2025-05.db"))
+
+    # Live trades first, then the most recent archive's
+    months = [(t["log_date"] or "live")[:7] for t in db.search_trades("pickaxe")]
+    assert sorted(months[:2]) == ["2025-06", "live"]
+    assert months[2:] == ["2025-05"] * 3 + ["2025-04"] * 2
+    assert len(db.search_trades("pickaxe", limit=3)) == 3
+
+
+def test_detach_month_gives_freed_pages_back(db, tmp_path):
+    with db.writer() as writer:
+        for i in range(2000):
+            writer.add(make_trade(i, "2025-04-01"))
+    size = os.path.getsize(db.engine.url.database)
+    db.detach_month("2025-04", str(tmp_path / "archive.db"))
+    assert os.path.getsize(db.engine.url.database) < size / 2
+
+
+def test_compact_switches_old_files_to_incremental_vacuum(tmp_path):
+    path = str(tmp_path / "old.db")
+    sqlite3.connect(path).execute("CREATE TABLE placeholder (x)")
+    db = Database(path)
+    with db.engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 0
+    db.compact()
+    with db.engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 2
@@ -0,0 +1,243 @@
+import gzip
+import threading
+
+import pytest
+
+from src.parser.trade_parser import TradeParser
+from src.pipeline import (
+    MAX_SHARD_SIZE,
+    MIN_SHARD_SIZE,
+    IngestStats,
+    MappedLog,
+    buffered,
+    find_shards,
+    log_date_before,
+    read_lines,
+    shard_size_for,
+    stream_trades,
+    stream_trades_parallel,
+)
+
+
+SAMPLE = (
+    "Logging started 2025-05-01\n"
+    "[00:19:24] <Valentyan> (Cad) WTB 100+C skiller pickaxe (grinding prospecting)\n"
+    "\n"
+    "[01:02:27] <Muttleyita> (Har) WTS  [rare iron horse shoe QL:90.1003 DMG:0.0 WT:0.5 ] 10s\n"
+    "[15:23:26] <System> This is the Trade channel.\n"
+)
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    path = tmp_path / "trade.txt"
+    path.write_text(SAMPLE, encoding="utf-8")
+    return path
+
+
+def test_buffered_preserves_order():
+    assert list(buffered(range(1000), maxsize=4)) == list(range(1000))
+
+
+def test_buffered_reraises_producer_errors():
+    def failing():
+        yield 1
+        raise ValueError("bad input")
+
+    with pytest.raises(ValueError, match="bad input"):
+        list(buffered(failing()))
+
+
+def test_buffered_stops_producer_when_consumer_stops():
+    before = threading.active_count()
+    stream = buffered(iter(range(10_000)), maxsize=2)
+    assert next(stream) == 0
+    stream.close()
+    assert threading.active_count() == before
+
+
+def test_read_lines_tracks_byte_offsets(log_file):
+    stats = IngestStats()
+    lines = list(read_lines(log_file, stats))
+
+    # The System line is counted but never decoded
+    assert [line.line_no for line in lines] == [1, 2, 3]
+    assert lines[0].text == "Logging started 2025-05-01"
+    assert lines[-1].offset == SAMPLE.encode("utf-8").index(b"[15:23:26]")
+    assert stats.lines == 4
+    assert stats.bytes_read == len(SAMPLE.encode("utf-8"))
+
+
+def test_stream_trades(log_file):
+    stats = IngestStats()
+    records = list(stream_trades(log_file, TradeParser(), stats, queue_size=2))
+
+    assert [r.trade.player_name for r in records] == ["Valentyan", "Muttleyita"]
+    assert records[1].data["price_amount"] == 10.0
+    assert stats.lines == 4
+    assert stats.trades == 2
+    assert stats.bytes_total == len(SAMPLE.encode("utf-8"))
+
+
+def test_find_shards_cut_on_day_headers(tmp_path):
+    day = "Logging started 2025-05-0{}\n" + "[00:19:24] <Valentyan> (Cad) WTB pickaxe\n" * 20
+    path = tmp_path / "month.txt"
+    path.write_text("".join(day.format(i) for i in range(1, 6)), encoding="utf-8")
+    data = path.read_bytes()
+
+    shards = find_shards(path, shard_size=len(day) // 2)
+
+    assert shards[0].start == 0
+    assert shards[-1].end == len(data)
+    for prev, shard in zip(shards, shards[1:]):
+        assert prev.end == shard.start
+        assert data[shard.start:].startswith(b"Logging started ")
+
+
+def test_find_shards_fall_back_to_line_starts(tmp_path):
+    path = tmp_path / "noheaders.txt"
+    path.write_text("[00:19:24] <Valentyan> (Cad) WTB pickaxe\n" * 50, encoding="utf-8")
+    data = path.read_bytes()
+
+    shards = find_shards(path, shard_size=100, header_window=10)
+
+    assert len(shards) > 1
+    for shard in shards[1:]:
+        assert data[shard.start - 1:shard.start] == b"\n"
+
+
+def test_parallel_matches_serial(tmp_path):
+    path = tmp_path / "month.txt"
+    path.write_text(SAMPLE * 50, encoding="utf-8")
+
+    serial_stats = IngestStats()
+    serial = list(stream_trades(path, TradeParser(), serial_stats))
+    parallel_stats = IngestStats()
+    parallel = list(stream_trades_parallel(path, 2, stats=parallel_stats, shard_size=512))
+
+    assert [r.data for r in parallel] == [r.data for r in serial]
+    assert [r.line_no for r in parallel] == [r.line_no for r in serial]
+    assert parallel_stats.lines == serial_stats.lines
+    assert parallel_stats.trades == serial_stats.trades
+
+
+def test_shard_size_follows_file_size_and_workers(tmp_path):
+    assert shard_size_for(400 * 1024, 4) == 100 * 1024
+    assert shard_size_for(10 * 1024, 4) == MIN_SHARD_SIZE
+    assert shard_size_for(1 << 30, 4) == MAX_SHARD_SIZE
+
+    path = tmp_path / "month.txt"
+    day = "Logging started 2025-05-{:02d}\n" + "[00:19:24] <Valentyan> (Cad) WTB pickaxe\n" * 200
+    path.write_text("".join(day.format(i) for i in range(1, 29)), encoding="utf-8")
+    size = path.stat().st_size
+    assert len(find_shards(path, shard_size_for(size, 4))) == 4
+
+
+def test_log_date_before(tmp_path):
+    path = tmp_path / "month.txt"
+    path.write_text(
+        "[00:00:01] <A> (Cad) WTS x\n"
+        "Logging started 2025-05-01\n"
+        "[00:00:02] <B> (Cad) WTS y\n"
+        "Logging started 2025-05-02\n"
+        "[00:00:03] <C> (Cad) WTS z\n",
+        encoding="utf-8",
+    )
+    data = path.read_bytes()
+
+    assert log_date_before(path, data.index(b"[00:00:01]")) is None
+    assert log_date_before(path, data.index(b"[00:00:02]")) == "2025-05-01"
+    assert log_date_before(path, data.index(b"[00:00:03]")) == "2025-05-02"
+
+
+def test_parallel_shards_inherit_log_date(tmp_path):
+    path = tmp_path / "month.txt"
+    day = "Logging started 2025-05-0{}\n" + "[00:19:24] <Valentyan> (Cad) WTB pickaxe\n" * 30
+    path.write_text("".join(day.format(i) for i in range(1, 4)), encoding="utf-8")
+
+    serial = list(stream_trades(path, TradeParser()))
+    parallel = list(stream_trades_parallel(path, 2, shard_size=200))
+
+    assert [r.data["log_date"] for r in parallel] == [r.data["log_date"] for r in serial]
+    assert serial[-1].data["log_date"] == "2025-05-03"
+
+
+def test_mapped_log_finds_lines_and_headers(tmp_path):
+    path = tmp_path / "month.txt"
+    text = (
+        "[00:00:01] <A> (Cad) WTS x\n"
+        "Logging started 2025-05-01\n"
+        "[00:00:02] <B> (Cad) WTS y\n"
+        "Logging started 2025-05-02\n"
+    )
+    path.write_text(text, encoding="utf-8")
+    data = text.encode("utf-8")
+    first_header = data.index(b"Logging")
+    second_header = data.rindex(b"Logging")
+
+    with MappedLog(path) as log:
+        assert log.size == len(data)
+        assert log.is_line_start(first_header) and not log.is_line_start(first_header + 1)
+        assert log.next_line_start(3) == first_header
+        assert log.next_line_start(first_header) == first_header
+        assert log.find_day_header(0, log.size) == first_header
+        assert log.find_day_header(first_header + 27, log.size) == second_header
+        assert log.find_day_header(0, first_header) == -1
+        assert log.log_date_before(log.size) == "2025-05-02"
+
+
+def test_mapped_log_skips_noise_but_counts_it(tmp_path):
+    path = tmp_path / "noise.txt"
+    path.write_text(
+        "[00:00:01] <System> Welcome\n"
+        "Some pasted text\n"
+        "  [00:00:02] <B> (Cad) WTS y\n"
+        "Logging started 2025-05-01\n"
+        "[00:00:03] \n"
+        "System> is checked within its own line\n",
+        encoding="utf-8",
+    )
+    stats = IngestStats()
+    with MappedLog(path) as log:
+        lines = list(log.lines(stats))
+
+    assert [(line.line_no, line.text) for line in lines] == [
+        (3, "[00:00:02] <B> (Cad) WTS y"),
+        (4, "Logging started 2025-05-01"),
+        (5, "[00:00:03]"),
+    ]
+    assert stats.lines == 6
+    assert stats.bytes_read == path.stat().st_size
+
+
+def test_bare_carriage_returns_end_lines(tmp_path):
+    raw = (
+        b"Logging started 2025-05-01\r\n"
+        b"[00:00:01] <A> (Cad) WTS services\r https://example.com/a\r\n"
+        b"[00:00:02] <B> (Cad) WTB lump\r"
+    )
+    expected = [
+        (1, "Logging started 2025-05-01"),
+        (2, "[00:00:01] <A> (Cad) WTS services"),
+        (3, "https://example.com/a"),
+        (4, "[00:00:02] <B> (Cad) WTB lump"),
+    ]
+    plain = tmp_path / "crlf.txt"
+    plain.write_bytes(raw)
+    packed = tmp_path / "crlf.txt.gz"
+    packed.write_bytes(gzip.compress(raw))
+
+    for path in (plain, packed):
+        stats = IngestStats()
+        lines = list(read_lines(path, stats))
+        assert [(line.line_no, line.text) for line in lines] == expected
+        assert lines[-1].offset == len(raw) and stats.bytes_read == len(raw)
+    assert [(i + 1, text.strip()) for i, text in enumerate(raw.decode().splitlines())] == expected
+
+
+def test_mapped_log_empty_file(tmp_path):
+    path = tmp_path / "empty.txt"
+    path.write_bytes(b"")
+    with MappedLog(path) as log:
+        assert list(log.lines(IngestStats())) == []
+        assert log.log_date_before(0) is None
@@ -0,0 +1,119 @@
+import pytest
+
+from src.database import database
+from src.database.database import Database
+from src.database.prices import QuantileSketch, price_observations, to_silver
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Create a file-backed test database."""
+    return Database(str(tmp_path / "trades.db"))
+
+
+def make_trade(i: int, amount, currency="silver", trade_type="WTS", server="Cadence",
+               log_date="2025-05-01", items=1) -> dict:
+    return {
+        "timestamp": f"00:00:{i:02d}",
+        "player_name": f"Player{i}",
+        "server": server,
+        "trade_type": trade_type,
+        "message": f"{trade_type} [rare horse shoe QL:90.0 DMG:0.0 WT:0.3] {amount}{currency[0]}",
+        "items": [
+            {
+                "name": "horse shoe",
+                "rarity": "rare",
+                "quality_level": 90.0,
+                "weight": 0.3,
+                "damage": 0.0,
+                "attributes": [],
+                "fragment": None,
+            }
+        ] * items,
+        "price_amount": amount,
+        "price_currency": currency,
+        "log_date": log_date,
+    }
+
+
+def test_to_silver():
+    assert to_silver(2, "gold") == 200
+    assert to_silver(50, "copper") == pytest.approx(0.5)
+    assert to_silver(None, "silver") is None
+    assert to_silver(3, None) is None
+
+
+def test_sketch_quantiles_within_accuracy():
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    values = [float(v) for v in range(1, 1001)]
+    for value in values:
+        sketch.add(value)
+    for q in (0.25, 0.5, 0.75):
+        exact = values[int(q * (len(values) - 1))]
+        assert sketch.quantile(q) == pytest.approx(exact, rel=0.011)
+
+
+def test_sketch_merge_and_roundtrip():
+    left, right = QuantileSketch(), QuantileSketch()
+    for value in (0, 1, 2):
+        left.add(value)
+    for value in (3, 4):
+        right.add(value)
+    left.merge(QuantileSketch.from_dict(right.to_dict()))
+    assert left.count == 5
+    assert left.quantile(0) == 0.0
+    assert left.quantile(0.5) == pytest.approx(2, rel=0.011)
+    assert QuantileSketch().quantile(0.5) is None
+
+
+def test_only_single_item_asking_prices_are_indexed():
+    assert price_observations(make_trade(1, 5)) == [(("horse shoe", "rare", "Cadence", "2025-05-01"), 5.0)]
+    assert price_observations(make_trade(1, 5, trade_type="WTB")) == []
+    assert price_observations(make_trade(1, 5, items=2)) == []
+    assert price_observations(make_trade(1, 5, log_date=None)) == []
+    assert price_observations(make_trade(1, None)) == []
+
+
+def test_summaries_update_incrementally(db):
+    with db.writer(batch_size=2) as writer:
+        writer.add(make_trade(1, 5))
+        writer.add(make_trade(2, 1, currency="gold"))
+        writer.add(make_trade(3, 50, currency="copper"))
+        writer.add(make_trade(4, 9, trade_type="WTB"))
+
+    summary = db.price_summary("horse shoe", "rare", "Cadence", "2025-05-01")
+    assert summary["count"] == 3
+    assert summary["min"] == pytest.approx(0.5)
+    assert summary["max"] == pytest.approx(100)
+    assert summary["mean"] == pytest.approx(105.5 / 3)
+    assert summary["median"] == pytest.approx(5, rel=0.011)
+    assert summary["p25"] <= summary["median"] <= summary["p75"]
+
+    # Re-ingesting the same lines must not count them twice
+    with db.writer() as writer:
+        writer.add(make_trade(1, 5))
+    assert db.price_summary("horse shoe", "rare", "Cadence", "2025-05-01")["count"] == 3
+    assert db.price_summary("horse shoe", "rare", "Harmony", "2025-05-01") is None
+
+
+def test_add_trade_updates_index(db, monkeypatch):
+    monkeypatch.setattr(database, "_db", db)
+    database.add_trade(make_trade(1, 2, currency="gold"))
+    trade, = db.find_trades()
+    assert trade["price_silver"] == 200
+    assert db.price_summary("horse shoe", "rare", "Cadence", "2025-05-01")["mean"] == 200
+
+
+def test_price_history_and_rebuild(db):
+    with db.writer() as writer:
+        writer.add(make_trade(1, 5, log_date="2025-05-01"))
+        writer.add(make_trade(2, 7, log_date="2025-05-02"))
+        writer.add(make_trade(3, 9, log_date="2025-05-02", server="Harmony"))
+
+    history = db.price_history("horse shoe", rarity="rare", server="Cadence")
+    assert [(h["day"], h["count"], h["max"]) for h in history] == [("2025-05-01", 1, 5), ("2025-05-02", 1, 7)]
+    assert len(db.price_history("horse shoe", since="2025-05-02")) == 2
+
+    before = db.price_history("horse shoe")
+    assert db.rebuild_price_index() == 3
+    assert db.price_history("horse shoe") == before
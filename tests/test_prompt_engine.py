@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from src.llm import claude_client
+from src.llm.prompt_engine import PromptTemplate, load_template
+from src.llm.prompt_utils import BatchPromptBuilder, format_prompt, read_prompt_template
+
+
+def test_template_splits_static_prefix():
+    template = PromptTemplate("Instructions.\n\nInput: {{ lines }}\nThanks, {{name}}.")
+    assert template.prefix == "Instructions.\n\nInput: "
+    assert template.fields == ("lines", "name")
+
+    prompt = template.render(lines="a|b", name="you")
+    assert prompt.prefix == "Instructions.\n\nInput: "
+    assert prompt.suffix == "a|b\nThanks, you."
+    assert prompt.text == "Instructions.\n\nInput: a|b\nThanks, you."
+    split = prompt.token_split()
+    assert split["static_tokens"] == template.prefix_tokens
+    assert split["static_tokens"] + split["dynamic_tokens"] > 0
+
+    with pytest.raises(KeyError, match="name"):
+        template.render(lines="x")
+
+
+def test_template_without_placeholders_is_all_prefix():
+    prompt = PromptTemplate("Just instructions.").render()
+    assert (prompt.prefix, prompt.suffix) == ("Just instructions.", "")
+
+
+def test_templates_are_read_once(tmp_path):
+    path = tmp_path / "prompt.md"
+    path.write_text("Version 1 {{x}}")
+    first = load_template(str(path))
+    path.write_text("Version 2 {{x}}")
+    assert load_template(str(path)) is first
+    assert read_prompt_template(str(path)) == "Version 1 {{x}}"
+
+
+def test_format_prompt_inserts_compact_json():
+    prompt = format_prompt("Parse: {{trade_data}}", {"message": "WTS lump", "price": 1})
+    assert prompt == 'Parse: {"message":"WTS lump","price":1}'
+
+
+def test_batch_prompt_keeps_instructions_in_prefix():
+    builder = BatchPromptBuilder(read_prompt_template())
+    one = builder.render(["1 line"])
+    two = builder.render(["other line", "and another"])
+    assert one.prefix == two.prefix
+    assert "Enchantment Glossary" in one.prefix
+    assert one.suffix.startswith("1|1 line\n")
+    assert builder.build(["x"]) == builder.render(["x"]).text
+
+
+def test_client_marks_prefix_for_caching(stub_api, monkeypatch):
+    monkeypatch.setattr(claude_client, "ANTHROPIC_API_KEY", "test-key")
+    monkeypatch.setenv("ANTHROPIC_BASE_URL", stub_api.url)
+    client = claude_client.ClaudeClient()
+    instructions = "Instructions. " * 400  # over the 1024-token minimum
+    text = client.complete("1|line", prefix=instructions)
+
+    assert json.loads(text)["categories"]
+    content = stub_api.requests[0]["messages"][0]["content"]
+    assert content == [
+        {"type": "text", "text": instructions, "cache_control": {"type": "ephemeral"}},
+        {"type": "text", "text": "1|line"},
+    ]
+    # A prefix too short to be cached is sent unmarked
+    client.complete("1|line", prefix="Instructions")
+    assert "cache_control" not in stub_api.requests[1]["messages"][0]["content"][0]
+    # Without a prefix the prompt is sent as plain text
+    client.complete("hello")
+    assert stub_api.requests[2]["messages"][0]["content"] == "hello"
+
+    client.close()
+    assert client.client.client.is_closed()
+    client.close()  # closing twice is harmless
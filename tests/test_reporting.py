@@ -0,0 +1,123 @@
+import io
+import json
+
+import pytest
+
+from src.database import database
+from src.database.database import Database
+from src.main import process_file
+from src.parser.trade_parser import TradeParser
+from src.pipeline import IngestStats, ParsedTrade
+from src.reporting import (
+    JsonLinesReporter, ProgressReporter, Reporter, VerboseReporter, make_reporter
+)
+
+LINE = "[01:02:27] <Muttleyita> (Har) WTS [rare iron horse shoe QL:90.1 DMG:0.0 WT:0.5 WoA 80] 10s"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def record(line_no: int = 1) -> ParsedTrade:
+    parser = TradeParser()
+    trade = parser.parse_line(LINE)
+    return ParsedTrade(line_no, 100 * line_no, trade, parser.to_dict(trade))
+
+
+def feed(reporter: Reporter, count: int, stats: IngestStats):
+    for i in range(1, count + 1):
+        stats.trades = i
+        reporter.trade(record(i), stats)
+
+
+def test_quiet_prints_only_summary():
+    out = io.StringIO()
+    reporter = Reporter(out)
+    stats = IngestStats(lines=3, trades=2)
+    reporter.start("log.txt", "all", stats)
+    feed(reporter, 2, stats)
+    reporter.finish(stats, rows_written=2, rows_skipped=0)
+    text = out.getvalue()
+    assert "📂" not in text and "📝 Trade #" not in text
+    assert "💾 Trades stored: 2" in text
+
+
+def test_parse_errors_go_through_the_reporter(tmp_path, monkeypatch, capsys):
+    log = tmp_path / "Trade.2025-05-01.txt"
+    log.write_text(f"Logging started 2025-05-01\n{LINE}\n[01:02:28] <Bad> (Har) WTS boom\n", encoding="utf-8")
+    parse_line = TradeParser.parse_line
+
+    def failing(self, line):
+        if "<Bad>" in line:
+            raise ValueError("boom")
+        return parse_line(self, line)
+    monkeypatch.setattr(TradeParser, "parse_line", failing)
+    monkeypatch.setattr(database, "_db", Database(str(tmp_path / "trades.db")))
+
+    for workers in (1, 2):
+        quiet, progress = io.StringIO(), io.StringIO()
+        process_file(log, workers=workers, reporter=Reporter(quiet))
+        process_file(log, workers=workers, reporter=ProgressReporter(out=progress))
+        assert "Error on line" not in quiet.getvalue() and "❌ Errors: 1" in quiet.getvalue()
+        assert "❌ Error on line 3: boom" in progress.getvalue()
+    assert capsys.readouterr().out == ""
+
+
+def test_progress_is_rate_limited():
+    out, clock = io.StringIO(), FakeClock()
+    reporter = ProgressReporter(interval=10, out=out, clock=clock)
+    stats = IngestStats(bytes_total=10_000_000)
+    reporter.start("log.txt", "all", stats)
+    feed(reporter, 1000, stats)
+    assert "🔄" not in out.getvalue()
+
+    clock.now = 11
+    feed(reporter, 1000, stats)
+    assert out.getvalue().count("🔄") == 1
+    assert "1,024 trades" in out.getvalue()
+
+
+def test_verbose_samples_every_nth_trade():
+    out = io.StringIO()
+    reporter = VerboseReporter(every=3, out=out, clock=FakeClock())
+    stats = IngestStats()
+    feed(reporter, 7, stats)
+    text = out.getvalue()
+    assert [n for n in range(1, 8) if f"Trade #{n}:" in text] == [3, 6]
+    assert "• iron horse shoe [rare] QL:90.1" in text
+    assert "- WoA: 80" in text
+
+    with pytest.raises(ValueError):
+        VerboseReporter(every=0)
+
+
+def test_jsonl_writes_every_trade(tmp_path):
+    path = tmp_path / "trades.jsonl"
+    out = io.StringIO()
+    reporter = JsonLinesReporter(path, out=out, clock=FakeClock())
+    stats = IngestStats()
+    feed(reporter, 3, stats)
+    reporter.finish(stats, 3, 0)
+    reporter.close()
+
+    rows = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [row["line_no"] for row in rows] == [1, 2, 3]
+    assert rows[0]["items"][0]["name"] == "iron horse shoe"
+    assert str(path) in out.getvalue()
+
+
+def test_make_reporter(tmp_path):
+    assert type(make_reporter("quiet")) is Reporter
+    assert type(make_reporter("progress")) is ProgressReporter
+    assert make_reporter("verbose", every=5).every == 5
+    reporter = make_reporter("jsonl", path=tmp_path / "out.jsonl")
+    reporter.close()
+    with pytest.raises(ValueError):
+        make_reporter("jsonl")
+    with pytest.raises(ValueError):
+        make_reporter("loud")
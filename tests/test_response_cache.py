@@ -0,0 +1,101 @@
+import asyncio
+import json
+import os
+
+import yaml
+
+from src.parser.claude_client import ClaudeClient
+from src.parser.response_cache import ResponseCache, cache_key
+from src.parser.text_parser import TextParser
+from tests.conftest import ANALYSIS
+
+
+def test_cache_key_covers_every_input():
+    base = ("model", "system", "prompt", 0.7, 100)
+    keys = {cache_key(*base)}
+    for i, changed in enumerate(("other", "other", "other", 0.2, 200)):
+        args = list(base)
+        args[i] = changed
+        keys.add(cache_key(*args))
+    assert len(keys) == 6
+    assert cache_key(*base) == cache_key(*base)
+
+
+def test_put_get_and_persist(tmp_path):
+    cache = ResponseCache(tmp_path / "cache")
+    key = cache_key("m", "s", "p", 0.0, 10)
+    assert cache.get(key) is None
+    cache.put(key, ANALYSIS)
+    assert cache.get(key) == ANALYSIS
+    assert (tmp_path / "cache" / key[:2] / f"{key}.json").exists()
+
+    reopened = ResponseCache(tmp_path / "cache")
+    assert len(reopened) == 1
+    assert reopened.get(key) == ANALYSIS
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_evicts_least_recently_used(tmp_path):
+    entry_size = len(json.dumps(ANALYSIS).encode())
+    cache = ResponseCache(tmp_path / "cache", max_bytes=2 * entry_size)
+    keys = [cache_key("m", "s", str(i), 0.0, 10) for i in range(3)]
+    cache.put(keys[0], ANALYSIS)
+    cache.put(keys[1], ANALYSIS)
+    cache.get(keys[0])
+    cache.put(keys[2], ANALYSIS)
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == ANALYSIS
+    assert cache.stats()["evictions"] == 1
+    assert cache.size == 2 * entry_size
+    assert len(list((tmp_path / "cache").glob("*/*.json"))) == 2
+
+
+def test_unreadable_entry_is_dropped(tmp_path):
+    cache = ResponseCache(tmp_path / "cache")
+    key = cache_key("m", "s", "p", 0.0, 10)
+    cache.put(key, ANALYSIS)
+    (tmp_path / "cache" / key[:2] / f"{key}.json").write_text("{not json")
+    assert cache.get(key) is None
+    assert len(cache) == 0
+
+
+def test_client_serves_repeats_from_cache(tmp_path, stub_api):
+    requests = stub_api.requests
+    client = ClaudeClient(api_key="test-key", cache=ResponseCache(tmp_path / "cache"), base_url=stub_api.url)
+
+    async def run():
+        first = await client.analyze_text("WTS rare iron pickaxe 5s", ["topic"])
+        second = await client.analyze_text("WTS rare iron pickaxe 5s", ["topic"])
+        other = await client.analyze_text("WTS rare iron pickaxe 5s", ["topic"], temperature=0.0)
+        return first, second, other
+
+    first, second, other = asyncio.run(run())
+    assert first == second == other == ANALYSIS
+    assert len(requests) == 2
+    assert [r["temperature"] for r in requests] == [0.7, 0.0]
+    assert client.cache.stats()["hits"] == 1
+
+
+def test_text_parser_uses_configured_cache(tmp_path, stub_api, monkeypatch):
+    requests = stub_api.requests
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+    monkeypatch.setenv("ANTHROPIC_BASE_URL", stub_api.url)
+    with open("config/config.yaml") as f:
+        config = yaml.safe_load(f)
+    config["database"]["path"] = str(tmp_path / "analyses.db")
+    config["cache"]["path"] = str(tmp_path / "cache")
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.safe_dump(config))
+
+    parser = TextParser(str(config_path))
+
+    async def run():
+        return [await parser.process_text(text) for text in ("WTS sleep powder 1s", "WTB lump", "WTS sleep powder 1s")]
+
+    stored = asyncio.run(run())
+    assert len(stored) == 3
+    assert len(requests) == 2  # the repeated text was analyzed once
+    assert requests[0]["system"][0]["text"].startswith(config["anthropic"]["system_prompt"])
+    assert os.path.isdir(tmp_path / "cache")
@@ -0,0 +1,227 @@
+from src.database.database import Database, TradeWriter
+import re
+
+from src.llm.prompt_utils import BATCH_COLUMNS, BatchPromptBuilder, parse_batch_response, parse_csv_response
+from src.llm.router import ConfidenceScorer, HybridRouter, LLMResolver, format_log_line, merge_llm_rows
+from src.models import Item
+from src.parser.trade_parser import TradeParser
+from src.pipeline import IngestStats, LogLine, parse_lines
+
+HEADER = "timestamp,player_name,server,trade_type,message,item_name,rarity,quality_level,weight,damage,price_amount,price_currency,attributes"
+
+
+class FakeClient:
+    """Answers batched prompts from canned item rows and records the prompts.
+
+    ``items`` maps a message substring to the CSV item columns for lines
+    containing it; ``skip`` lists substrings of lines to leave out of the
+    first answer that contains them.
+    """
+
+    def __init__(self, items=None, skip=()):
+        self.items = items or {}
+        self.skip = set(skip)
+        self.prompts = []
+
+    def complete(self, prompt, max_tokens=1024, prefix=None):
+        self.prompts.append((prefix or "") + prompt)
+        rows = [",".join(BATCH_COLUMNS)]
+        for line_id, line in re.findall(r"^(\d+)\|(.*)$", prompt, re.MULTILINE):
+            skipped = [s for s in self.skip if s in line]
+            if skipped:
+                self.skip.difference_update(skipped)
+                continue
+            answer = [v for k, v in self.items.items() if k in line]
+            rows += [f"{line_id},{item}" for item in answer] or [line_id]
+        return "```\n" + "\n".join(rows) + "\n```"
+
+
+def parse(message, trade_type="WTS"):
+    return TradeParser().parse_line(f"[10:00:00] <Tester> (Cad) {trade_type} {message}")
+
+
+def reasons(message, trade_type="WTS"):
+    return ConfidenceScorer(TradeParser()).score(parse(message, trade_type)).reasons
+
+
+def records(messages):
+    parser = TradeParser()
+    lines = [LogLine(i + 1, 0, f"[10:00:0{i}] <Tester> (Cad) WTS {m}") for i, m in enumerate(messages)]
+    return list(parse_lines(lines, parser, IngestStats())), parser
+
+
+def test_complete_regex_results_are_confident():
+    assert reasons("[rare iron pickaxe QL:96.0 DMG:0.0 WT:2.0 WoA 89 • CoC 90] 5s") == ()
+    # Valueless runes are part of a complete attribute list
+    assert reasons("[common leather troll mask QL:30.8 DMG:0.0 WT:0.2 RSeF • MD]") == ()
+    # Chatter with no price or QL has nothing to extract
+    assert reasons("pm me for offers https://forum.wurmonline.com/x") == ()
+    # A price in a conversational reply names nothing to sell
+    assert reasons("maybe 5s at most tbh", "PC") == ()
+
+
+def test_incomplete_regex_results_are_flagged():
+    assert reasons("20 Large Crates 2.5s") == ("price_without_item",)
+    assert reasons("Steel Lumps QL 90+") == ("ql_without_item",)
+    assert reasons("kahvesi 95ql 1s per small barrel") == ("price_without_item", "ql_without_item")
+    assert reasons("[rare iron carving knife QL:91.6 DMG:4.89816E-4 WT:0.4 RLM] 6s") == ("unconsumed_attributes",)
+    assert reasons("[common amphora [kahvesi] QL:7.1 DMG:0.0 WT:236.9 ]") == ("unparsed_link",)
+    assert reasons("[iron lump QL:50.0 DMG:0.0 WT:1.0 ] [tin lump QL:50.0 DMG:0.0 WT:1.0 ] 1s") == ("ambiguous_price",)
+
+
+def test_batch_prompt_packs_lines_within_budget():
+    builder = BatchPromptBuilder("Parse these.", max_output_tokens=400, output_tokens_per_line=40)
+    builder.token_budget = builder.prefix_tokens + 4 * 23
+    line = "x" * 80  # 23 tokens with its tag
+    assert builder.pack([line] * 20) == 4
+    # Output room caps the batch even when input is cheap
+    assert builder.pack(["x"] * 20) == 10
+    # A line over budget still goes out on its own
+    assert builder.pack(["x" * 1000]) == 1
+
+    prompt = builder.build(["first line", "second line"])
+    assert prompt.startswith("Parse these.")
+    assert "\n1|first line\n2|second line\n" in prompt
+
+
+def test_parse_batch_response():
+    text = "\n".join([
+        ",".join(BATCH_COLUMNS),
+        "1,large crate,,,,,2.5,silver,",
+        "1,small crate,,,,,1,silver,",
+        "2",
+        "7,stray,,,,,,,",
+        "x,bad id,,,,,,,",
+    ])
+    results = parse_batch_response(text, 3)
+    assert [row["item_name"] for row in results[1]] == ["large crate", "small crate"]
+    assert results[2] == []
+    assert 3 not in results and 7 not in results
+
+
+def test_parse_csv_response():
+    text = "Here you go:\n```\n" + HEADER + "\n10:00:00,Tester,Cadence,WTS,\"crates, large\",large crate,,,,,2.5,silver,\n```"
+    rows = parse_csv_response(text)
+    assert len(rows) == 1
+    assert rows[0]["message"] == "crates, large"
+    assert rows[0]["price_amount"] == "2.5"
+    assert parse_csv_response("no csv here") == []
+
+
+def test_merge_keeps_line_identity():
+    trade = parse("kahvesi 95ql 1s per small barrel")
+    data = TradeParser().to_dict(trade)
+    rows = parse_csv_response("\n".join([
+        HEADER,
+        "10:00:00,Someone,Melody,WTB,other,kahvesi,legendary,95+,,,2,gold,WoA:95; CoC:100+",
+    ]))
+    merged = merge_llm_rows(data, rows)
+
+    for field in ("timestamp", "player_name", "server", "trade_type", "message", "log_date"):
+        assert merged[field] == data[field]
+    assert merged["items"] == [{
+        "name": "kahvesi", "rarity": "common", "quality_level": 95.0, "weight": None, "damage": None,
+        "attributes": [{"name": "WoA", "value": "95"}, {"name": "CoC", "value": "100+"}], "fragment": None,
+    }]
+    # The regex already found a price, so it is kept
+    assert (merged["price_amount"], merged["price_currency"]) == (1.0, "silver")
+    assert merged["parsed_by"] == "llm"
+
+
+def test_router_only_calls_llm_for_uncertain_lines():
+    client = FakeClient({"Crates": "large crate,,,,,2.5,silver,"})
+    resolver = LLMResolver(client, template="Parse this.")
+    parsed, parser = records([
+        "20 Large Crates 2.5s",
+        "[rare iron pickaxe QL:96.0 DMG:0.0 WT:2.0 WoA 89] 5s",
+        "20 Large Crates 2.5s",
+        "Steel Lumps QL 90+",
+    ])
+    router = HybridRouter(parser, resolver)
+    routed = list(router.route(parsed))
+
+    # Uncertain lines are resolved together, and everything comes out in log order
+    assert [r.line_no for r in routed] == [1, 2, 3, 4]
+    assert [r.data.get("parsed_by") for r in routed] == ["llm", None, "llm", "llm"]
+    assert routed[0].data["items"][0]["name"] == "large crate"
+    assert routed[3].data["items"] == []  # answered without items: regex result kept
+    assert (router.regex_lines, router.llm_lines, resolver.calls) == (1, 3, 1)
+    # Reposts are sent once
+    assert len(re.findall(r"^\d+\|", client.prompts[0], re.MULTILINE)) == 2
+    assert "1|" + format_log_line(parsed[0].trade) in client.prompts[0]
+
+
+def test_static_tokens_are_cacheable_only_above_the_minimum():
+    parsed, _ = records(["20 Large Crates 2.5s"])
+    short = LLMResolver(FakeClient(), template="Parse these.")
+    short.resolve(parsed[0].trade)
+    assert short.static_tokens > 0 and short.cacheable_tokens == 0
+
+    long = LLMResolver(FakeClient(), template="Parse these. " * 400)
+    long.resolve(parsed[0].trade)
+    assert long.cacheable_tokens == long.static_tokens >= long.min_cache_tokens
+
+
+def test_missing_lines_are_requeued():
+    client = FakeClient({"Crates": "large crate,,,,,2.5,silver,"}, skip=["Crates"])
+    resolver = LLMResolver(client, template="")
+    parsed, parser = records(["20 Large Crates 2.5s", "Steel Lumps QL 90+"])
+    routed = list(HybridRouter(parser, resolver).route(parsed))
+
+    assert resolver.calls == 2 and resolver.requeued == 1
+    assert "1|" in client.prompts[1] and "Crates" in client.prompts[1] and "Steel" not in client.prompts[1]
+    assert routed[0].data["items"][0]["name"] == "large crate"
+
+
+def test_router_flushes_every_batch_lines():
+    client = FakeClient()
+    parsed, parser = records(["20 Large Crates 2.5s", "Steel Lumps QL 90+"])
+    router = HybridRouter(parser, LLMResolver(client, template=""), batch_lines=1)
+    assert [r.line_no for r in router.route(parsed)] == [1, 2]
+    assert len(client.prompts) == 2
+
+
+def test_router_keeps_regex_result_when_llm_fails():
+    class FailingClient:
+        def complete(self, prompt, max_tokens=1024, prefix=None):
+            raise RuntimeError("overloaded")
+
+    parsed, parser = records(["20 Large Crates 2.5s"])
+    waits = []
+    resolver = LLMResolver(FailingClient(), template="", max_attempts=3, backoff_base=2.0, sleep=waits.append)
+    router = HybridRouter(parser, resolver)
+    routed = list(router.route(parsed))
+    assert routed[0].data == parsed[0].data
+    assert router.llm_errors == 1
+    assert resolver.calls == 3
+    # The retries wait, longer after each failure in a row
+    assert len(waits) == 2 and 1.0 <= waits[0] <= 2.0 and 2.0 <= waits[1] <= 4.0
+
+
+def test_remembered_answers_are_bounded():
+    client = FakeClient({"Crates": "large crate,,,,,2.5,silver,"})
+    resolver = LLMResolver(client, template="", max_answers=2)
+    trades = [parse(f"{n} Large Crates 2.5s") for n in (10, 20, 30)]
+    for trade in trades:
+        resolver.resolve(trade)
+    assert len(client.prompts) == 3
+
+    resolver.resolve(trades[2])
+    assert len(client.prompts) == 3
+    resolver.resolve(trades[0])  # the least recently used answer was dropped
+    assert len(client.prompts) == 4
+
+
+def test_llm_results_are_stored_with_regex_results(tmp_path):
+    db = Database(str(tmp_path / "trades.db"))
+    client = FakeClient({"Crates": "large crate,,,,,2.5,silver,"})
+    parsed, parser = records(["[rare iron pickaxe QL:96.0 DMG:0.0 WT:2.0 WoA 89] 5s", "20 Large Crates 2.5s"])
+    with TradeWriter(db) as writer:
+        for record in HybridRouter(parser, LLMResolver(client, template="")).route(parsed):
+            writer.add(record.data)
+
+    assert writer.rows_written == 2
+    with db.get_session() as session:
+        names = sorted(item.name for item in session.query(Item))
+    assert names == ["iron pickaxe", "large crate"]
+    assert [t["parsed_by"] for t in db.find_trades()] == ["regex", "llm"]
@@ -0,0 +1,209 @@
+import gzip
+import io
+import os
+
+import pytest
+
+from src.database import database
+from src.database.database import Database
+from src import main
+from src.main import process_files
+from src.parser.trade_parser import TradeParser
+from src.pipeline import find_shards, shard_size_for, stream_trades
+from src.reporting import Reporter
+from src.scheduler import expand_inputs, file_digest, parse_files, plan_files
+
+
+def day_log(day: int, players=("A", "B")) -> str:
+    lines = [f"Logging started 2025-05-{day:02d}"]
+    lines += [f"[00:00:0{i}] <{name}> (Cad) WTS [rare iron pickaxe QL:9{i}.0 DMG:0.0 WT:2.0 ] {i + 1}s"
+              for i, name in enumerate(players)]
+    return "\n".join(lines) + "\n"
+
+
+@pytest.fixture
+def logs(tmp_path):
+    root = tmp_path / "logs"
+    (root / "2025").mkdir(parents=True)
+    (root / "Trade.2025-05-01.txt").write_text(day_log(1), encoding="utf-8")
+    (root / "2025" / "Trade.2025-05-02.txt.gz").write_bytes(gzip.compress(day_log(2).encode("utf-8")))
+    (root / "2025" / "Trade.2025-05-03.txt").write_text(day_log(3), encoding="utf-8")
+    (root / ".hidden").write_text("not a log", encoding="utf-8")
+    (root / "trades.db").write_bytes(b"SQLite format 3\x00")
+    (root / "README.md").write_text("not a log either", encoding="utf-8")
+    return root
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    db = Database(str(tmp_path / "trades.db"))
+    monkeypatch.setattr(database, "_db", db)
+    return db
+
+
+def names(paths):
+    return [path.name for path in paths]
+
+
+def test_expand_inputs(logs):
+    assert names(expand_inputs([str(logs)])) == [
+        "Trade.2025-05-02.txt.gz", "Trade.2025-05-03.txt", "Trade.2025-05-01.txt",
+    ]
+    pattern = str(logs / "**" / "*.txt")
+    assert names(expand_inputs([pattern])) == ["Trade.2025-05-03.txt", "Trade.2025-05-01.txt"]
+    # A file named twice is kept once
+    single = str(logs / "Trade.2025-05-01.txt")
+    assert names(expand_inputs([single, str(logs)])) == [
+        "Trade.2025-05-01.txt", "Trade.2025-05-02.txt.gz", "Trade.2025-05-03.txt",
+    ]
+    with pytest.raises(FileNotFoundError):
+        expand_inputs([str(logs / "missing.txt")])
+    with pytest.raises(FileNotFoundError):
+        expand_inputs([str(logs / "*.zst")])
+
+
+def test_plan_files_uses_the_manifest(logs, db):
+    path = logs / "Trade.2025-05-01.txt"
+    st = path.stat()
+    key = str(path.resolve())
+
+    jobs, unchanged = plan_files(db, [path])
+    assert [job.path for job in jobs] == [path] and unchanged == []
+
+    db.save_manifest_entry(key, st.st_size, st.st_mtime, file_digest(path), "running")
+    assert plan_files(db, [path])[0]  # an unfinished file is read again
+
+    db.save_manifest_entry(key, st.st_size, st.st_mtime, file_digest(path), "done", rows=2)
+    assert plan_files(db, [path]) == ([], [path])
+    assert plan_files(db, [path], force=True)[0]
+
+    # Touched but identical: skipped, and the manifest learns the new mtime
+    os.utime(path, (st.st_atime, st.st_mtime + 10))
+    assert plan_files(db, [path]) == ([], [path])
+    assert db.get_manifest_entry(key)["mtime"] == st.st_mtime + 10
+
+    path.write_text(day_log(1, players=("C", "D")), encoding="utf-8")
+    os.utime(path, (st.st_atime, st.st_mtime + 20))
+    assert plan_files(db, [path])[0]
+
+
+def test_parse_files_keeps_order_and_reports_bad_files(logs, db):
+    broken = logs / "broken.gz"
+    broken.write_bytes(gzip.compress(day_log(4).encode("utf-8"))[:-12])
+    month = logs / "Trade.2025-06.txt"
+    month.write_text("".join(day_log(day, players="ABCDEFGH") for day in range(1, 29)), encoding="utf-8")
+    paths = expand_inputs([str(logs / "**" / "*.gz"), str(month), str(logs / "Trade.2025-05-01.txt")])
+    jobs, _ = plan_files(db, paths)
+    assert names(paths) == ["Trade.2025-05-02.txt.gz", "broken.gz", "Trade.2025-06.txt", "Trade.2025-05-01.txt"]
+
+    parsed = []
+    for result in parse_files(jobs, workers=2):
+        try:
+            records = list(result.records)
+        except EOFError:
+            records = None
+        parsed.append((result, records))
+
+    assert [p.job.path for p, _ in parsed] == paths
+    assert [r.trade.log_date for r in parsed[0][1]] == ["2025-05-02", "2025-05-02"]
+    assert parsed[1][1] is None  # truncated archive
+    result, records = parsed[2]
+    assert len(records) == 28 * 8 and result.stats.trades == 28 * 8
+    assert [r.line_no for r in records[:9]] == [2, 3, 4, 5, 6, 7, 8, 9, 11]
+    assert records[-1].trade.log_date == "2025-05-28"
+    assert result.content_hash == file_digest(month)
+    assert parsed[3][0].content_hash == file_digest(paths[3])
+
+
+def test_parse_files_streams_large_files_shard_by_shard(logs, db):
+    month = logs / "Trade.2025-06.txt"
+    month.write_text("".join(day_log(day) for day in range(1, 29)) * 300, encoding="utf-8")
+    jobs, _ = plan_files(db, [month])
+    assert len(find_shards(month, shard_size_for(month.stat().st_size, 2))) == 2
+
+    records = [record for result in parse_files(jobs, workers=2) for record in result.records]
+
+    serial = list(stream_trades(month, TradeParser()))
+    assert [r.line_no for r in records] == [r.line_no for r in serial]
+    assert [r.data for r in records] == [r.data for r in serial]
+
+
+def test_parse_files_reports_unreadable_files(logs, db):
+    path = logs / "Trade.2025-05-01.txt"
+    jobs, _ = plan_files(db, [path])
+    path.unlink()
+
+    result, = parse_files(jobs, workers=2)
+
+    assert result.error.startswith("FileNotFoundError") and list(result.records) == []
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_process_files_skips_unchanged_files_on_rerun(logs, db, workers):
+    out = io.StringIO()
+    paths = expand_inputs([str(logs)])
+
+    counts = process_files(paths, workers=workers, reporter=Reporter(out))
+    assert counts == {"ingested": 3, "skipped": 0, "failed": 0}
+    assert len(db.find_trades()) == 6
+    entry = db.get_manifest_entry(str(paths[0].resolve()))
+    assert entry["status"] == "done" and entry["rows"] == 2
+
+    counts = process_files(paths, workers=workers, reporter=Reporter(out))
+    assert counts == {"ingested": 0, "skipped": 3, "failed": 0}
+    assert "Unchanged since the last run" in out.getvalue()
+
+
+def test_process_files_resumes_after_interruption(logs, db):
+    paths = expand_inputs([str(logs)])
+    process_files(paths[:1], reporter=Reporter(io.StringIO()))
+    # The second file was being written when the run stopped
+    job = plan_files(db, paths[1:2])[0][0]
+    db.save_manifest_entry(job.key, job.size, job.mtime, None, "running")
+
+    counts = process_files(paths, reporter=Reporter(io.StringIO()))
+
+    assert counts == {"ingested": 2, "skipped": 1, "failed": 0}
+    assert len(db.find_trades()) == 6
+
+
+def test_process_files_records_unreadable_files(logs, db):
+    broken = logs / "Trade.2025-05-04.txt.gz"
+    broken.write_bytes(gzip.compress(day_log(4).encode("utf-8"))[:-12])
+    paths = expand_inputs([str(logs)])
+
+    counts = process_files(paths, workers=2, reporter=Reporter(io.StringIO()))
+
+    assert counts == {"ingested": 3, "skipped": 0, "failed": 1}
+    assert db.get_manifest_entry(str(broken.resolve()))["status"] == "failed"
+    # Failed files are tried again on the next run
+    assert plan_files(db, paths)[0][0].path == broken
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_process_files_records_files_gone_since_planning(logs, db, workers):
+    paths = expand_inputs([str(logs)])
+    paths[1].unlink()
+
+    counts = process_files(paths, workers=workers, reporter=Reporter(io.StringIO()))
+
+    assert counts == {"ingested": 2, "skipped": 0, "failed": 1}
+    entry = db.get_manifest_entry(str(paths[1].resolve()))
+    assert entry["status"] == "failed" and entry["error"].startswith("FileNotFoundError")
+    assert len(db.find_trades()) == 4
+
+
+def test_process_files_records_unreadable_files_among_good_ones(logs, db, monkeypatch):
+    paths = expand_inputs([str(logs)])
+
+    def digest(path):
+        if path == paths[0]:
+            raise PermissionError(13, "Permission denied", str(path))
+        return file_digest(path)
+    monkeypatch.setattr(main, "file_digest", digest)
+
+    counts = process_files(paths, reporter=Reporter(io.StringIO()))
+
+    assert counts == {"ingested": 2, "skipped": 0, "failed": 1}
+    entry = db.get_manifest_entry(str(paths[0].resolve()))
+    assert entry["status"] == "failed" and entry["error"].startswith("PermissionError")
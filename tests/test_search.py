@@ -0,0 +1,89 @@
+import pytest
+
+from src.database.database import Database
+from src.database.search import fts_query
+from src.models import Trade
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Create a file-backed test database."""
+    return Database(str(tmp_path / "trades.db"))
+
+
+def make_trade(i: int, message: str) -> dict:
+    return {
+        "timestamp": f"00:00:{i:02d}",
+        "player_name": f"Player{i}",
+        "server": "Cadence",
+        "trade_type": "WTS",
+        "message": message,
+        "items": [],
+        "price_amount": None,
+        "price_currency": None,
+        "log_date": "2025-05-01",
+    }
+
+
+@pytest.fixture
+def trades(db):
+    messages = [
+        "[rare iron pickaxe QL:96.0 DMG:0.0 WT:2.0 WoA 89] 5s",
+        "100+C skiller pickaxe (grinding prospecting)",
+        "[common iron lump QL:40.0 DMG:0.0 WT:1.0] pickup at the market",
+        "iron pickaxe iron pickaxe cheap iron pickaxe",
+    ]
+    with db.writer() as writer:
+        for i, message in enumerate(messages):
+            writer.add(make_trade(i, message))
+    return messages
+
+
+def players(results):
+    return [r["player_name"] for r in results]
+
+
+def test_fts_query_quotes_terms():
+    assert fts_query("iron pick*") == '"iron" "pick"*'
+    assert fts_query('"iron pickaxe" 100+C') == '"iron pickaxe" "100+C"'
+    assert fts_query('"rare pi"* ""') == '"rare pi"*'
+    assert fts_query("   ") == ""
+
+
+def test_search_trades_token_prefix_and_phrase(db, trades):
+    assert sorted(players(db.search_trades("pickaxe"))) == ["Player0", "Player1", "Player3"]
+    assert sorted(players(db.search_trades("pick*"))) == ["Player0", "Player1", "Player2", "Player3"]
+    assert sorted(players(db.search_trades('"iron pickaxe"'))) == ["Player0", "Player3"]
+    assert players(db.search_trades("100+C")) == ["Player1"]
+    assert db.search_trades("") == []
+
+
+def test_search_trades_ranks_and_snippets(db, trades):
+    results = db.search_trades('"iron pickaxe"', highlight=("[", "]"))
+    assert results[0]["player_name"] == "Player3"
+    assert results[0]["rank"] <= results[1]["rank"]
+    assert "[iron pickaxe]" in results[0]["snippet"]
+    assert results[0]["message"] == trades[3]
+
+
+def test_search_index_follows_deletes(db, trades):
+    with db.get_session() as session:
+        session.query(Trade).filter(Trade.player_name == "Player3").delete()
+        session.commit()
+    assert sorted(players(db.search_trades('"iron pickaxe"'))) == ["Player0"]
+
+
+def test_search_index_built_for_existing_rows(tmp_path, trades, db):
+    with db.engine.begin() as conn:
+        conn.exec_driver_sql("DROP TABLE trades_fts")
+    db.engine.dispose()
+    reopened = Database(str(tmp_path / "trades.db"))
+    assert len(reopened.search_trades("pickaxe")) == 3
+
+
+def test_search_analyses(db):
+    db.store_analysis("selling a rare iron pickaxe", {"kind": "wts"})
+    db.store_analysis("buying sleep powder", {"kind": "wtb"})
+    assert [a.categories for a in db.search_analyses("pickaxe")] == [{"kind": "wts"}]
+    assert db.search_analyses("pick*")[0].text_content == "selling a rare iron pickaxe"
+    assert db.search_analyses("lamp") == []
@@ -0,0 +1,126 @@
+import sys
+
+import pytest
+
+from src.parser.trade_parser import Currency, FilterMode, Rarity, SymbolTable, TradeParser, TradeType
+
+
+@pytest.fixture
+def parser():
+    return TradeParser()
+
+
+def test_parse_trade_line(parser):
+    trade = parser.parse_line(
+        "[00:19:24] <Valentyan> (Cad) WTS [rare iron pickaxe QL:96.0086 DMG:0.0 WT:2.0 WoA 89 • CoC 93] 10s"
+    )
+
+    assert trade.timestamp == "00:19:24"
+    assert trade.player_name == "Valentyan"
+    assert trade.server == "Cadence"
+    assert trade.trade_type == TradeType.WTS
+    assert trade.price_amount == 10.0
+    assert trade.price_currency == Currency.SILVER
+
+    item, = trade.items
+    assert item.name == "iron pickaxe"
+    assert item.rarity == Rarity.RARE
+    assert item.quality_level == 96.0086
+    assert item.damage == 0.0
+    assert item.weight == 2.0
+    assert [(a.name, a.value) for a in item.attributes] == [("WoA", "89"), ("CoC", "93")]
+
+
+def test_parse_multiple_items_and_fragments(parser):
+    trade = parser.parse_line(
+        "[02:22:48] <Edwadostark> (Har) WTS "
+        "[common metal imperial lamp head fragment [1/3] QL:93.522 DMG:2.37041 WT:0.266 ]"
+        "[common iron large shield QL:71.0496 DMG:0.0 WT:4.5 CoC 95 • RStV]"
+    )
+
+    lamp, shield = trade.items
+    assert lamp.name == "metal imperial lamp head fragment"
+    assert lamp.fragment == "1/3"
+    assert lamp.quality_level == 93.522
+    assert lamp.attributes == ()
+    assert shield.name == "iron large shield"
+    assert shield.fragment is None
+    assert [(a.name, a.value) for a in shield.attributes] == [("CoC", "95")]
+
+
+def test_price_is_not_taken_from_item_links(parser):
+    trade = parser.parse_line("[01:02:27] <Muttleyita> (Har) WTS [rare iron horse shoe QL:90.1003 DMG:0.0 WT:0.5 ]")
+
+    assert trade.items[0].name == "iron horse shoe"
+    assert trade.price_amount is None
+    assert trade.price_currency is None
+
+
+def test_price_without_items(parser):
+    trade = parser.parse_line("[01:04:10] <Asukasoryu> (Har) WTS pottery bricks 1k 4s")
+
+    assert trade.items == ()
+    assert (trade.price_amount, trade.price_currency) == (4.0, Currency.SILVER)
+
+
+@pytest.mark.parametrize("line", [
+    "[15:23:26] <System> This is the Trade channel.",
+    "[00:21:28] <Sevenhavenz> (Cad) wts lowercase trade type",
+    "Invalid line format",
+    "",
+])
+def test_non_trade_lines_are_rejected(parser, line):
+    assert parser.parse_line(line) is None
+
+
+def test_date_headers_set_log_date(parser):
+    assert parser.parse_line("Logging started 2025-05-02") is None
+    trade = parser.parse_line("[00:19:24] <Valentyan> (Cad) WTB pickaxe")
+
+    assert trade.log_date == "2025-05-02"
+    assert parser.to_dict(trade)["log_date"] == "2025-05-02"
+
+
+def test_filter_modes():
+    with_items = "[00:55:42] <Sophon> (Cad) WTS [rare straw easter basket QL:55.0 DMG:0.0 WT:0.15 ]"
+    without_items = "[01:03:49] <Kamirazh> (Cad) PC 1k of roasting dishes to buy."
+
+    items_only = TradeParser(filter_mode=FilterMode.ITEMS_ONLY)
+    no_items = TradeParser(filter_mode=FilterMode.NO_ITEMS)
+
+    assert items_only.parse_line(with_items) is not None
+    assert items_only.parse_line(without_items) is None
+    assert no_items.parse_line(with_items) is None
+    assert no_items.parse_line(without_items) is not None
+
+
+def test_server_tags_are_normalized_and_unknown_servers_dropped(parser):
+    line = "[00:19:24] <Valentyan> ({}) WTS [rare iron pickaxe QL:96.0 DMG:0.0 WT:2.0] 10s"
+
+    assert parser.parse_line(line.format("Cad")).server == "Cadence"
+    assert parser.parse_line(line.format("Cadence")).server == "Cadence"
+    assert parser.parse_line(line.format("Zork")) is None
+
+
+def test_repeated_strings_are_interned():
+    symbols = SymbolTable()
+    parser = TradeParser(symbols=symbols)
+    line = "[00:19:24] <Valentyan> (Cad) WTS [rare iron pickaxe QL:96.0 DMG:0.0 WT:2.0 WoA 89] 10s"
+
+    first = parser.parse_line(line)
+    second = parser.parse_line(line[:-3] + "11s")
+
+    assert second.player_name is first.player_name
+    assert second.server is first.server
+    assert second.items[0].name is first.items[0].name
+    assert second.items[0].attributes[0].name is first.items[0].attributes[0].name
+    assert first.message not in symbols and first.timestamp not in symbols
+    if sys.version_info >= (3, 10):
+        assert not hasattr(first, "__dict__")
+
+
+def test_symbol_table_is_bounded():
+    symbols = SymbolTable(max_size=2)
+    for name in ("CoC", "WoA", "Nim"):
+        symbols.intern(name)
+    assert len(symbols) == 1 and "Nim" in symbols
@@ -0,0 +1,188 @@
+import pytest
+
+from src.database import database
+from src.database.database import Database, TradeWriter, trade_hash
+from src.models import Item, ItemAttribute, Server, Trade
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Create a file-backed test database."""
+    return Database(str(tmp_path / "trades.db"))
+
+
+def make_trade(i: int) -> dict:
+    return {
+        "timestamp": "00:19:24",
+        "player_name": f"Player{i}",
+        "server": "Cadence",
+        "trade_type": "WTS",
+        "message": f"WTS [rare iron pickaxe QL:96.0 DMG:0.0 WT:2.0 WoA 89] {i}s",
+        "items": [
+            {
+                "name": "iron pickaxe",
+                "rarity": "rare",
+                "quality_level": 96.0,
+                "weight": 2.0,
+                "damage": 0.0,
+                "attributes": [{"name": "WoA", "value": "89"}],
+                "fragment": None,
+            }
+        ],
+        "price_amount": float(i),
+        "price_currency": "silver",
+        "log_date": "2025-05-01",
+    }
+
+
+def count_rows(db, model=Trade) -> int:
+    with db.get_session() as session:
+        return session.query(model).count()
+
+
+def test_writer_flushes_full_batches(db):
+    """Rows are written as soon as a batch fills up."""
+    writer = TradeWriter(db, batch_size=2)
+    for i in range(3):
+        writer.add(make_trade(i))
+
+    assert writer.rows_written == 2
+    assert count_rows(db) == 2
+
+    writer.flush()
+    assert writer.rows_written == 3
+    assert count_rows(db) == 3
+
+
+def test_writer_context_flushes_remainder(db):
+    """Leaving the context writes the partial last batch."""
+    with db.writer(batch_size=100) as writer:
+        for i in range(5):
+            writer.add(make_trade(i))
+
+    assert writer.rows_written == 5
+    assert count_rows(db, Item) == 5
+    assert count_rows(db, ItemAttribute) == 5
+    with db.get_session() as session:
+        trade = session.query(Trade).filter(Trade.player_name == "Player3").one()
+        assert trade.server == Server.CADENCE
+        assert trade.log_date == "2025-05-01"
+        assert float(trade.price_amount) == 3.0
+        assert trade.created_at is not None
+        item, = trade.items
+        assert item.name == "iron pickaxe"
+        assert float(item.quality_level) == 96.0
+        assert float(item.price_amount) == 3.0
+        assert [(a.attribute_name, a.attribute_value) for a in item.attributes] == [("WoA", "89")]
+
+
+def test_writer_discards_pending_on_error(db):
+    """A failing block does not write its partial batch."""
+    with pytest.raises(RuntimeError):
+        with db.writer(batch_size=100) as writer:
+            writer.add(make_trade(1))
+            raise RuntimeError("boom")
+
+    assert count_rows(db) == 0
+
+
+def test_writer_rejects_invalid_batch_size(db):
+    with pytest.raises(ValueError):
+        TradeWriter(db, batch_size=0)
+
+
+def test_writer_skips_trades_already_stored(db):
+    """Re-ingesting the same trades stores nothing new."""
+    with db.writer(batch_size=2) as writer:
+        for i in range(5):
+            writer.add(make_trade(i))
+
+    with db.writer(batch_size=2) as writer:
+        for i in range(7):
+            writer.add(make_trade(i))
+
+    assert writer.rows_written == 2
+    assert writer.rows_skipped == 5
+    assert count_rows(db) == 7
+    assert count_rows(db, Item) == 7
+
+
+def test_writer_skips_duplicates_within_batch(db):
+    with db.writer(batch_size=100) as writer:
+        writer.add(make_trade(1))
+        writer.add(make_trade(1))
+
+    assert writer.rows_written == 1
+    assert writer.rows_skipped == 1
+
+
+def test_writer_hashes_each_trade_once(db, monkeypatch):
+    hashed = []
+    monkeypatch.setattr(database, "trade_hash", lambda data: hashed.append(data) or trade_hash(data))
+    with TradeWriter(db, batch_size=2) as writer:
+        for i in range(3):
+            writer.add(make_trade(i))
+    assert writer.rows_written == 3 and len(hashed) == 3
+
+
+def test_trade_hash_includes_log_date():
+    trade = make_trade(1)
+    assert trade_hash(trade) == trade_hash(dict(trade))
+    assert trade_hash(trade) != trade_hash({**trade, "log_date": "2025-05-02"})
+    assert trade_hash(trade) == trade_hash({**trade, "price_amount": 99.0})
+
+
+def test_multi_item_trades_keep_price_on_trade_only(db):
+    trade = make_trade(1)
+    trade["items"] = trade["items"] * 2
+    with db.writer() as writer:
+        writer.add(trade)
+
+    items = db.find_items(name="iron pickaxe")
+    assert len(items) == 2
+    assert all(item["price_amount"] is None for item in items)
+    assert items[0]["trade"]["price_amount"] == 1.0
+
+
+def test_find_items_and_trades(db):
+    trades = [make_trade(i) for i in range(4)]
+    trades[1]["server"] = "Harmony"
+    trades[2]["items"][0]["rarity"] = "common"
+    trades[3]["log_date"] = "2025-05-09"
+    with db.writer() as writer:
+        for trade in trades:
+            writer.add(trade)
+
+    found = db.find_items(name="iron pickaxe", rarity="rare", server="Cadence", since="2025-05-01", until="2025-05-07")
+    assert [item["trade"]["player_name"] for item in found] == ["Player0"]
+    assert found[0]["rarity"] == "rare"
+
+    assert [t["player_name"] for t in db.find_trades(server="Harmony")] == ["Player1"]
+    assert [t["player_name"] for t in db.find_trades(since="2025-05-02")] == ["Player3"]
+    assert len(db.find_trades(trade_type="WTS", limit=2)) == 2
+
+
+def test_indexes_are_used(db):
+    with db.engine.connect() as conn:
+        plan = conn.exec_driver_sql(
+            "EXPLAIN QUERY PLAN SELECT * FROM items JOIN trades ON items.trade_id = trades.id "
+            "WHERE items.name = 'iron pickaxe' AND items.rarity = 'RARE' AND trades.server = 'CADENCE'"
+        ).all()
+    details = " ".join(row[-1] for row in plan)
+    assert "USING INDEX" in details or "USING INTEGER PRIMARY KEY" in details
+    assert "SCAN items" not in details
+
+
+def test_older_databases_gain_new_trade_columns(tmp_path):
+    path = str(tmp_path / "old.db")
+    db = Database(path)
+    with db.writer() as writer:
+        writer.add(make_trade(1))
+    with db.engine.begin() as conn:
+        conn.exec_driver_sql("ALTER TABLE trades DROP COLUMN parsed_by")
+    db.engine.dispose()
+
+    db = Database(path)
+    with db.writer() as writer:
+        writer.add(dict(make_trade(2), parsed_by="llm"))
+    assert [t["parsed_by"] for t in db.find_trades()] == ["regex", "llm"]